@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+
+"""
+Benchmark netconf-deploy.py against a fleet of local mock RESTCONF devices.
+
+One mock device is started per loopback address (127.0.0.2 ... ) and a
+template named after each address is generated, so the deploy script's
+"template name == device name" convention still holds.
+
+Two measurements are reported:
+* in-process: process_template() driven with increasing thread counts
+* end-to-end: ./netconf-deploy.py run as a subprocess (canary rollout)
+
+Example:
+    ./bench_restconf.py --devices 50 --latency 0.05 --concurrency 1,8,32
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import subprocess
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+
+from preflight import YANG_DIR, load_schema, run_preflight
+from restconf_mock import MockBehaviour, start_fleet, stop_fleet
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEPLOY_SCRIPT = os.path.join(HERE, "netconf-deploy.py")
+
+PAYLOAD = {
+    "Cisco-IOS-XE-native:native": {
+        "router": {
+            "Cisco-IOS-XE-ospf:router-ospf": {
+                "ospf": {"process-id": [{"id": 1, "router-id": "192.168.5.101"}]}
+            }
+        },
+        "interface": {
+            "GigabitEthernet": [
+                {
+                    "name": str(idx),
+                    "ip": {
+                        "Cisco-IOS-XE-ospf:router-ospf": {
+                            "ospf": {
+                                "process-id": [{"id": 1, "area": [{"area-id": 0}]}],
+                                "network": {"point-to-point": [None]},
+                            }
+                        }
+                    },
+                }
+                for idx in (2, 3, 4)
+            ]
+        },
+    }
+}
+
+
+def load_deploy_module():
+    """Import netconf-deploy.py (the dash keeps it from a plain import)."""
+    spec = importlib.util.spec_from_file_location("netconf_deploy", DEPLOY_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def write_templates(workdir: str, count: int) -> str:
+    template_dir = os.path.join(workdir, "device-templates")
+    os.makedirs(template_dir)
+    for idx in range(count):
+        with open(os.path.join(template_dir, f"127.0.0.{idx + 2}.json"), "w") as fd:
+            json.dump(PAYLOAD, fd)
+    os.symlink(os.path.join(HERE, YANG_DIR), os.path.join(workdir, YANG_DIR))
+    return template_dir
+
+
+def bench_in_process(deploy, templates: list, concurrency: int) -> tuple:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(deploy.process_template, templates))
+    elapsed = time.perf_counter() - start
+    return elapsed, results.count(False)
+
+
+def bench_end_to_end(workdir: str) -> tuple:
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, DEPLOY_SCRIPT],
+        cwd=workdir,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return time.perf_counter() - start, proc.returncode
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--devices", type=int, default=20)
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--concurrency", default="1,4,16")
+    parser.add_argument("--patch-405", action="store_true")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--skip-e2e", action="store_true")
+    args = parser.parse_args()
+
+    os.environ["RESTCONF_SCHEME"] = "http"
+    os.environ["RESTCONF_PORT"] = str(args.port)
+    os.environ.setdefault("DEVICE_USERNAME", "expert")
+    os.environ.setdefault("DEVICE_PASSWORD", "bench")
+
+    behaviour = MockBehaviour(
+        latency=args.latency,
+        patch_405=args.patch_405,
+        error_rate=args.error_rate,
+    )
+    servers = start_fleet(args.devices, args.port, behaviour)
+    workdir = tempfile.mkdtemp(prefix="restconf-bench-")
+
+    try:
+        template_dir = write_templates(workdir, args.devices)
+        schema = load_schema(os.path.join(HERE, YANG_DIR))
+        report = run_preflight(template_dir, schema=schema)
+        if not report.ok:
+            raise RuntimeError(report.format())
+
+        deploy = load_deploy_module()
+        logging.getLogger().setLevel(logging.CRITICAL)
+
+        print(f"{args.devices} mock devices, latency {args.latency * 1000:.0f} ms")
+        print(f"{'mode':<22}{'seconds':>10}{'deploys/s':>12}{'failed':>8}")
+
+        for concurrency in (int(c) for c in args.concurrency.split(",")):
+            elapsed, failed = bench_in_process(
+                deploy, report.templates, concurrency
+            )
+            print(
+                f"{f'in-process x{concurrency}':<22}{elapsed:>10.3f}"
+                f"{args.devices / elapsed:>12.1f}{failed:>8}"
+            )
+
+        if not args.skip_e2e:
+            elapsed, rc = bench_end_to_end(workdir)
+            print(
+                f"{'netconf-deploy.py':<22}{elapsed:>10.3f}"
+                f"{args.devices / elapsed:>12.1f}{'rc=' + str(rc):>8}"
+            )
+
+        requests = sum(sum(s.stats.requests.values()) for s in servers)
+        print(f"mock devices served {requests} requests")
+    finally:
+        stop_fleet(servers)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,9 @@ import base64
 import ssl
 from urllib import request, error
 
+from preflight import Template, run_preflight
+from rollout import PROGRESS_FILE, RolloutPlan, RolloutScheduler
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s [%(levelname)s] %(message)s",
@@ -62,24 +65,12 @@ def deploy_restconf(device_name: str, payload: str) -> bool:
     return False
 
 
-def process_template(template_name: str) -> bool:
-    """Process a JSON template and deploy it to the target device."""
-    try:
-        with open(f"./device-templates/{template_name}") as fd:
-            payload = fd.read()
-    except OSError:
-        logging.exception(f"Failed to open ./device-templates/{template_name}")
-        return False
-
-    # Ensure strict JSON (JSONC with // comments will FAIL here)
-    try:
-        json.loads(payload)
-    except json.JSONDecodeError:
-        logging.exception(f"Template {template_name} is not valid JSON")
-        return False
+def process_template(template: Template) -> bool:
+    """Deploy a template that already passed the pre-flight check."""
+    device_name = template.device
 
-    # Template should be named RTR_NAME.json and RTR_NAME must be in DNS
-    device_name = template_name.rsplit(".", 1)[0]
+    # Send the object parsed during pre-flight instead of re-reading the file
+    payload = json.dumps(template.payload, separators=(",", ":"))
 
     logging.info(f"Deploying template to {device_name}...")
     ok = deploy_restconf(device_name, payload)
@@ -93,15 +84,26 @@ def process_template(template_name: str) -> bool:
 
 def main() -> None:
     """Deploy configuration snippets using RESTCONF (JSON templates only)."""
-    result = True
-
-    with os.scandir("./device-templates") as pd:
-        for entry in pd:
-            if entry.is_file() and entry.name.endswith(".json"):
-                result &= process_template(entry.name)
-
-    if not result:
+    # Validate every template before any device is touched
+    report = run_preflight("./device-templates")
+    if not report.ok:
+        logging.error(report.format())
+        exit(1)
+    logging.info(report.format())
+
+    # Canary first, then growing waves; progress is checkpointed so an
+    # interrupted rollout can simply be restarted
+    scheduler = RolloutScheduler(
+        process_template,
+        plan=RolloutPlan.from_env(),
+        progress_file=os.environ.get("ROLLOUT_PROGRESS_FILE", PROGRESS_FILE),
+    )
+    result = scheduler.run(report.templates)
+
+    if not result.ok:
+        logging.error(result.format())
         exit(1)
+    logging.info(result.format())
 
 
 if __name__ == "__main__":
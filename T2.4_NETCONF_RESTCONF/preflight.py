@@ -0,0 +1,358 @@
+#!/usr/bin/env python
+
+"""
+Pre-flight validation of RESTCONF JSON templates.
+
+Every template in ./device-templates is parsed and checked against a schema
+derived from the YANG modules in ./yang-modules *before* any device is
+touched. Small files are handled in a thread pool, large files are handed to a
+process pool so that json.loads on big payloads does not serialize on the GIL.
+
+The parsed objects are kept on the returned Template instances so the deploy
+step can send them without reading or parsing the files a second time.
+
+Templates must be strict JSON; a // TODO comment or an empty (non-presence)
+container fails the check, so unfinished templates never reach a device.
+PREFLIGHT_ALLOW_COMMENTS=1 accepts // and /* */ comments.
+"""
+
+import os
+import re
+import sys
+import json
+import logging
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+TEMPLATE_DIR = "./device-templates"
+YANG_DIR = "./yang-modules"
+
+# RESTCONF target used by netconf-deploy.py, the payload must start here
+ROOT_NODE = "Cisco-IOS-XE-native:native"
+
+# Templates at or above this size are parsed in a separate process
+LARGE_FILE_BYTES = 1024 * 1024
+
+DATA_KEYWORDS = ("container", "list", "leaf", "leaf-list", "anydata", "anyxml")
+
+_YANG_TOKEN_RE = re.compile(
+    r"""
+      (?P<skip>\s+|//[^\n]*|/\*.*?\*/)
+    | (?P<dq>"(?:[^"\\]|\\.)*")
+    | (?P<sq>'[^']*')
+    | (?P<punct>[{};])
+    | (?P<bare>[^\s{};"']+)
+    """,
+    re.S | re.X,
+)
+
+# Comments allowed with allow_comments (PREFLIGHT_ALLOW_COMMENTS=1); strings
+# are matched so that "//" in a value is left alone
+_JSONC_RE = re.compile(r'("(?:[^"\\]|\\.)*")|//[^\n]*|/\*.*?\*/', re.S)
+
+
+@dataclass
+class YangSchema:
+    """Node vocabulary extracted from a set of YANG modules."""
+
+    modules: Set[str] = field(default_factory=set)
+    # node name -> kinds it is declared as (container, list, leaf, ...)
+    nodes: Dict[str, Set[str]] = field(default_factory=dict)
+    # list name -> possible key tuples
+    keys: Dict[str, Set[Tuple[str, ...]]] = field(default_factory=dict)
+    # containers declared with a presence statement, may be sent empty
+    presence: Set[str] = field(default_factory=set)
+
+
+@dataclass
+class Template:
+    """A device template and the outcome of its pre-flight check."""
+
+    name: str
+    size: int = 0
+    payload: Optional[Dict[str, Any]] = None
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def device(self) -> str:
+        # Template should be named RTR_NAME.json and RTR_NAME must be in DNS
+        return self.name.rsplit(".", 1)[0]
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors and self.payload is not None
+
+
+@dataclass
+class PreflightReport:
+    """Result of validating every template in a directory."""
+
+    templates: List[Template] = field(default_factory=list)
+
+    @property
+    def failed(self) -> List[Template]:
+        return [t for t in self.templates if not t.ok]
+
+    @property
+    def ok(self) -> bool:
+        return bool(self.templates) and not self.failed
+
+    def format(self) -> str:
+        """Return a human readable report covering every failed template."""
+        if not self.templates:
+            return "Pre-flight: no .json templates found"
+
+        lines = [
+            f"Pre-flight: {len(self.templates) - len(self.failed)}/"
+            f"{len(self.templates)} templates valid"
+        ]
+        for template in self.failed:
+            lines.append(f"  {template.name}:")
+            for err in template.errors:
+                lines.append(f"    - {err}")
+        return "\n".join(lines)
+
+
+# -----------------------------------------------------------------------------
+# YANG schema
+# -----------------------------------------------------------------------------
+def _yang_statements(text: str) -> List[list]:
+    """Parse YANG text into nested [keyword, argument, children] lists."""
+    root: List[list] = []
+    stack = [root]
+    words: List[str] = []
+
+    for m in _YANG_TOKEN_RE.finditer(text):
+        kind = m.lastgroup
+        if kind == "skip":
+            continue
+        token = m.group(kind)
+        if kind in ("dq", "sq"):
+            words.append(token[1:-1])
+        elif kind == "bare":
+            words.append(token)
+        elif token == ";":
+            if words:
+                stack[-1].append([words[0], " ".join(words[1:]), []])
+            words = []
+        elif token == "{":
+            stmt = [words[0] if words else "", " ".join(words[1:]), []]
+            stack[-1].append(stmt)
+            stack.append(stmt[2])
+            words = []
+        elif len(stack) > 1:
+            stack.pop()
+            words = []
+
+    return root
+
+
+def _collect(statements: List[list], schema: YangSchema) -> None:
+    for keyword, arg, children in statements:
+        if keyword == "module":
+            schema.modules.add(arg)
+        elif keyword in DATA_KEYWORDS:
+            schema.nodes.setdefault(arg, set()).add(keyword)
+            if keyword == "container" and any(c[0] == "presence" for c in children):
+                schema.presence.add(arg)
+            if keyword == "list":
+                for child in children:
+                    if child[0] == "key":
+                        key = tuple(child[1].split())
+                        schema.keys.setdefault(arg, set()).add(key)
+        _collect(children, schema)
+
+
+def load_schema(yang_dir: str = YANG_DIR) -> YangSchema:
+    """Build a YangSchema from every .yang file in yang_dir."""
+    schema = YangSchema()
+    with os.scandir(yang_dir) as pd:
+        for entry in pd:
+            if entry.is_file() and entry.name.endswith(".yang"):
+                with open(entry.path, encoding="utf-8") as fd:
+                    _collect(_yang_statements(fd.read()), schema)
+    return schema
+
+
+# -----------------------------------------------------------------------------
+# Template validation
+# -----------------------------------------------------------------------------
+def _check_node(
+    schema: YangSchema, name: str, value: Any, path: str, errors: List[str]
+) -> None:
+    module, _, local = name.rpartition(":")
+    node_path = f"{path}/{name}"
+
+    if module and module not in schema.modules:
+        errors.append(f"{node_path}: unknown YANG module '{module}'")
+        return
+
+    kinds = schema.nodes.get(local)
+    if not kinds:
+        errors.append(f"{node_path}: '{local}' is not defined in the YANG modules")
+        return
+
+    if isinstance(value, dict):
+        if not kinds & {"container", "anydata", "anyxml"}:
+            expected = "JSON array" if "list" in kinds else "scalar value"
+            errors.append(f"{node_path}: expected {expected}, got JSON object")
+            return
+        if not value and local not in schema.presence and not kinds & {"anydata", "anyxml"}:
+            # An empty non-presence container configures nothing, usually
+            # a template whose payload was never filled in
+            errors.append(f"{node_path}: empty object, '{local}' is not a presence container")
+            return
+        for child, child_value in value.items():
+            _check_node(schema, child, child_value, node_path, errors)
+        return
+
+    if isinstance(value, list):
+        if value and all(isinstance(v, dict) for v in value):
+            if "list" not in kinds:
+                errors.append(f"{node_path}: '{local}' is not a YANG list")
+                return
+            key_sets = schema.keys.get(local, set())
+            for idx, entry in enumerate(value):
+                entry_path = f"{node_path}[{idx}]"
+                if key_sets and not any(
+                    all(k in entry for k in key) for key in key_sets
+                ):
+                    wanted = " or ".join("/".join(k) for k in sorted(key_sets))
+                    errors.append(f"{entry_path}: missing list key {wanted}")
+                for child, child_value in entry.items():
+                    _check_node(schema, child, child_value, entry_path, errors)
+            return
+        # leaf-list, or [null] for a leaf of type empty
+        if not kinds & {"leaf-list", "leaf", "anydata", "anyxml"}:
+            errors.append(f"{node_path}: expected JSON object, got array of scalars")
+        return
+
+    if not kinds & {"leaf", "anydata", "anyxml"}:
+        errors.append(f"{node_path}: expected JSON object or array, got scalar value")
+
+
+def validate_payload(schema: YangSchema, payload: Any) -> List[str]:
+    """Check a parsed template against the YANG-derived schema."""
+    if not isinstance(payload, dict) or list(payload) != [ROOT_NODE]:
+        return [f"top level must be a single '{ROOT_NODE}' object"]
+
+    errors: List[str] = []
+    _check_node(schema, ROOT_NODE, payload[ROOT_NODE], "", errors)
+    return errors
+
+
+def strip_comments(text: str) -> str:
+    """JSON text without // and /* */ comments."""
+    return _JSONC_RE.sub(lambda m: m.group(1) or "", text)
+
+
+def validate_template(
+    path: str, schema: YangSchema, allow_comments: bool = False
+) -> Template:
+    """Read, parse and schema check a single template file."""
+    template = Template(name=os.path.basename(path))
+
+    try:
+        with open(path, "rb") as fd:
+            raw = fd.read()
+    except OSError as exc:
+        template.errors.append(f"failed to open: {exc}")
+        return template
+
+    template.size = len(raw)
+
+    # Strict JSON unless allow_comments: comments in a template usually mark
+    # an unfinished payload (// TODO ...), which must not reach a device
+    try:
+        text = raw.decode("utf-8")
+        payload = json.loads(strip_comments(text) if allow_comments else text)
+    except (json.JSONDecodeError, UnicodeDecodeError) as exc:
+        template.errors.append(f"not valid JSON: {exc}")
+        return template
+
+    template.errors.extend(validate_payload(schema, payload))
+    template.payload = payload
+    return template
+
+
+_WORKER_SCHEMA: Optional[YangSchema] = None
+_WORKER_ALLOW_COMMENTS = False
+
+
+def _init_worker(schema: YangSchema, allow_comments: bool) -> None:
+    global _WORKER_SCHEMA, _WORKER_ALLOW_COMMENTS
+    _WORKER_SCHEMA = schema
+    _WORKER_ALLOW_COMMENTS = allow_comments
+
+
+def _validate_in_worker(path: str) -> Template:
+    return validate_template(path, _WORKER_SCHEMA, _WORKER_ALLOW_COMMENTS)
+
+
+def run_preflight(
+    template_dir: str = TEMPLATE_DIR,
+    schema: Optional[YangSchema] = None,
+    large_file_bytes: int = LARGE_FILE_BYTES,
+    workers: Optional[int] = None,
+    allow_comments: Optional[bool] = None,
+) -> PreflightReport:
+    """
+    Validate every .json template in template_dir in parallel.
+
+    allow_comments accepts // and /* */ comments in templates; it defaults
+    to PREFLIGHT_ALLOW_COMMENTS=1 and is off otherwise.
+
+    All templates are checked even if some of them fail, so the returned
+    report lists every problem at once.
+    """
+    if schema is None:
+        schema = load_schema()
+    if allow_comments is None:
+        allow_comments = os.environ.get("PREFLIGHT_ALLOW_COMMENTS", "0") == "1"
+
+    small: List[str] = []
+    large: List[str] = []
+    with os.scandir(template_dir) as pd:
+        for entry in pd:
+            if entry.is_file() and entry.name.endswith(".json"):
+                if entry.stat().st_size >= large_file_bytes:
+                    large.append(entry.path)
+                else:
+                    small.append(entry.path)
+
+    templates: List[Template] = []
+
+    with ThreadPoolExecutor(max_workers=workers) as threads:
+        futures = [threads.submit(validate_template, p, schema, allow_comments) for p in small]
+
+        if large:
+            with ProcessPoolExecutor(
+                max_workers=min(len(large), workers or os.cpu_count() or 1),
+                initializer=_init_worker,
+                initargs=(schema, allow_comments),
+            ) as procs:
+                templates.extend(procs.map(_validate_in_worker, large))
+
+        templates.extend(f.result() for f in futures)
+
+    templates.sort(key=lambda t: t.name)
+    return PreflightReport(templates=templates)
+
+
+def main() -> None:
+    """Validate the templates without deploying anything."""
+    report = run_preflight()
+    if not report.ok:
+        logging.error(report.format())
+        sys.exit(1)
+    logging.info(report.format())
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+        handlers=[logging.StreamHandler()],
+    )
+    main()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+
+"""
+Local RESTCONF stand-in for an IOS XE device.
+
+Accepts PATCH/PUT on /restconf/data/Cisco-IOS-XE-native:native so that
+netconf-deploy.py can be exercised and benchmarked without real routers.
+
+Behaviour knobs:
+* latency     - seconds to sleep before answering each request
+* patch_405   - answer PATCH with 405 so the client falls back to PUT
+* error_rate  - fraction of requests answered with error_status
+
+Example:
+    ./restconf_mock.py --host 127.0.0.2 --port 8080 --latency 0.05
+    RESTCONF_SCHEME=http RESTCONF_PORT=8080 ./netconf-deploy.py
+"""
+
+import json
+import time
+import base64
+import random
+import logging
+import argparse
+import threading
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+NATIVE_PATH = "/restconf/data/Cisco-IOS-XE-native:native"
+
+
+@dataclass
+class MockBehaviour:
+    """How a mock device answers requests."""
+
+    latency: float = 0.0
+    patch_405: bool = False
+    error_rate: float = 0.0
+    error_status: int = 500
+    username: Optional[str] = None
+    password: Optional[str] = None
+
+
+@dataclass
+class MockStats:
+    """Counters collected by a mock device."""
+
+    requests: Dict[str, int] = field(default_factory=dict)
+    statuses: Dict[int, int] = field(default_factory=dict)
+    last_payload: Any = None
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, method: str, status: int, payload: Any = None) -> None:
+        with self.lock:
+            self.requests[method] = self.requests.get(method, 0) + 1
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            if payload is not None:
+                self.last_payload = payload
+
+
+class RestconfHandler(BaseHTTPRequestHandler):
+    """Request handler, behaviour and stats live on the server object."""
+
+    server: "MockRestconfServer"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logging.debug("%s %s", self.address_string(), format % args)
+
+    def _reply(self, method: str, status: int, payload: Any = None) -> None:
+        self.server.stats.record(method, status, payload)
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _authorized(self) -> bool:
+        behaviour = self.server.behaviour
+        if behaviour.username is None:
+            return True
+        token = base64.b64encode(
+            f"{behaviour.username}:{behaviour.password}".encode("utf-8")
+        ).decode("ascii")
+        return self.headers.get("Authorization") == f"Basic {token}"
+
+    def _handle_write(self, method: str) -> None:
+        behaviour = self.server.behaviour
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length) if length else b""
+
+        if behaviour.latency:
+            time.sleep(behaviour.latency)
+
+        if self.path != NATIVE_PATH:
+            return self._reply(method, 404)
+        if not self._authorized():
+            return self._reply(method, 401)
+        if method == "PATCH" and behaviour.patch_405:
+            return self._reply(method, 405)
+        if behaviour.error_rate and random.random() < behaviour.error_rate:
+            return self._reply(method, behaviour.error_status)
+
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return self._reply(method, 400)
+
+        self._reply(method, 204, payload)
+
+    def do_PATCH(self) -> None:
+        self._handle_write("PATCH")
+
+    def do_PUT(self) -> None:
+        self._handle_write("PUT")
+
+    def do_POST(self) -> None:
+        self._reply("POST", 405)
+
+    def do_GET(self) -> None:
+        self._reply("GET", 405)
+
+
+class MockRestconfServer(ThreadingHTTPServer):
+    """A single mock device listening on host:port."""
+
+    daemon_threads = True
+
+    def __init__(
+        self, host: str, port: int, behaviour: Optional[MockBehaviour] = None
+    ) -> None:
+        super().__init__((host, port), RestconfHandler)
+        self.behaviour = behaviour or MockBehaviour()
+        self.stats = MockStats()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "MockRestconfServer":
+        """Serve in a background daemon thread."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+        if self._thread:
+            self._thread.join()
+
+
+def start_fleet(
+    count: int, port: int, behaviour: Optional[MockBehaviour] = None
+) -> List[MockRestconfServer]:
+    """
+    Start count mock devices on 127.0.0.2, 127.0.0.3, ... all using port.
+
+    netconf-deploy.py uses a single RESTCONF_PORT for every device, so the
+    devices are told apart by loopback address rather than by port.
+    """
+    if count > 250:
+        raise ValueError("At most 250 mock devices are supported")
+
+    servers: List[MockRestconfServer] = []
+    try:
+        for idx in range(count):
+            host = f"127.0.0.{idx + 2}"
+            servers.append(MockRestconfServer(host, port, behaviour).start())
+    except OSError:
+        stop_fleet(servers)
+        raise
+    return servers
+
+
+def stop_fleet(servers: List[MockRestconfServer]) -> None:
+    for server in servers:
+        server.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--patch-405", action="store_true")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--username")
+    parser.add_argument("--password")
+    args = parser.parse_args()
+
+    behaviour = MockBehaviour(
+        latency=args.latency,
+        patch_405=args.patch_405,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        username=args.username,
+        password=args.password,
+    )
+    server = MockRestconfServer(args.host, args.port, behaviour)
+    logging.info(f"Mock RESTCONF device listening on {args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+        handlers=[logging.StreamHandler()],
+    )
+    main()
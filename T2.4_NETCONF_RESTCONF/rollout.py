@@ -0,0 +1,235 @@
+"""
+Staged (canary) rollout of validated RESTCONF templates.
+
+Templates are deployed in waves: a small canary wave first, then batches
+that grow by a fixed factor up to a maximum size. Every device inside a wave
+is deployed concurrently. After each wave the failure budget is checked and
+the rollout is aborted once it is exceeded (any canary failure aborts).
+
+Progress is appended to a journal (one JSON line per device) as soon as the
+device is done, so an interrupted or aborted rollout can be restarted and
+will skip devices that already received the same payload. The file is
+removed once a rollout completes cleanly.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, TextIO
+
+from preflight import Template
+
+PROGRESS_FILE = "./.rollout-progress.jsonl"
+PROGRESS_VERSION = 2
+
+
+@dataclass
+class RolloutPlan:
+    """Wave sizing and abort policy."""
+
+    canary: int = 1
+    growth: float = 2.0
+    max_batch: int = 32
+    # Fraction of attempted devices allowed to fail before aborting
+    failure_budget: float = 0.1
+
+    @classmethod
+    def from_env(cls) -> "RolloutPlan":
+        return cls(
+            canary=int(os.environ.get("ROLLOUT_CANARY", cls.canary)),
+            growth=float(os.environ.get("ROLLOUT_GROWTH", cls.growth)),
+            max_batch=int(os.environ.get("ROLLOUT_MAX_BATCH", cls.max_batch)),
+            failure_budget=float(
+                os.environ.get("ROLLOUT_FAILURE_BUDGET", cls.failure_budget)
+            ),
+        )
+
+    def waves(self, templates: List[Template]) -> List[List[Template]]:
+        """Split templates into canary + growing batches."""
+        waves: List[List[Template]] = []
+        size = max(1, self.canary)
+        idx = 0
+        while idx < len(templates):
+            waves.append(templates[idx : idx + size])
+            idx += size
+            size = min(max(size + 1, int(size * self.growth)), self.max_batch)
+        return waves
+
+
+@dataclass
+class RolloutResult:
+    """Outcome of a rollout run."""
+
+    deployed: List[str] = field(default_factory=list)
+    failed: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)
+    waves: int = 0
+    aborted: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed and self.aborted is None
+
+    def format(self) -> str:
+        lines = [
+            f"Rollout: {len(self.deployed)} deployed, {len(self.failed)} failed, "
+            f"{len(self.skipped)} skipped (already done) in {self.waves} waves"
+        ]
+        if self.failed:
+            lines.append(f"  failed: {', '.join(self.failed)}")
+        if self.aborted:
+            lines.append(f"  aborted: {self.aborted}")
+        return "\n".join(lines)
+
+
+def payload_digest(template: Template) -> str:
+    """Stable hash of a template payload, used to detect changed templates."""
+    data = json.dumps(template.payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+class RolloutScheduler:
+    """Deploy templates wave by wave with a persisted checkpoint."""
+
+    def __init__(
+        self,
+        deploy: Callable[[Template], bool],
+        plan: Optional[RolloutPlan] = None,
+        progress_file: str = PROGRESS_FILE,
+    ) -> None:
+        self.deploy = deploy
+        self.plan = plan or RolloutPlan()
+        self.progress_file = progress_file
+        self._lock = threading.Lock()
+        self._progress: Dict[str, Dict] = {}
+        self._journal: Optional[TextIO] = None
+
+    # -------------------------------------------------------------------------
+    # Checkpoint handling
+    # -------------------------------------------------------------------------
+    def _load_progress(self) -> None:
+        self._progress = {}
+        try:
+            with open(self.progress_file) as fd:
+                header = fd.readline()
+                if json.loads(header).get("version") != PROGRESS_VERSION:
+                    logging.warning(f"Ignoring {self.progress_file}: unknown version")
+                    return
+                for line in fd:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Last line cut short by a crash, the device is redone
+                        continue
+                    self._progress[entry.pop("device")] = entry
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError, AttributeError):
+            logging.exception(f"Ignoring unreadable {self.progress_file}")
+            self._progress = {}
+
+    def _open_journal(self) -> None:
+        """Rewrite the journal once with the loaded entries, then append to it."""
+        tmp = f"{self.progress_file}.tmp"
+        with open(tmp, "w") as fd:
+            fd.write(json.dumps({"version": PROGRESS_VERSION}) + "\n")
+            for device, entry in sorted(self._progress.items()):
+                fd.write(json.dumps({"device": device, **entry}) + "\n")
+        os.replace(tmp, self.progress_file)
+        self._journal = open(self.progress_file, "a")
+
+    def _record(self, template: Template, digest: str, wave: int, ok: bool) -> None:
+        entry = {"digest": digest, "status": "ok" if ok else "failed", "wave": wave}
+        line = json.dumps({"device": template.device, **entry}) + "\n"
+        with self._lock:
+            self._progress[template.device] = entry
+            # One short append per device; flushed so a crash loses at most
+            # the devices still in flight
+            self._journal.write(line)
+            self._journal.flush()
+
+    def _already_done(self, template: Template, digest: str) -> bool:
+        entry = self._progress.get(template.device)
+        return bool(entry) and entry["status"] == "ok" and entry["digest"] == digest
+
+    # -------------------------------------------------------------------------
+    # Rollout
+    # -------------------------------------------------------------------------
+    def _deploy_one(self, template: Template, digest: str, wave: int) -> bool:
+        try:
+            ok = self.deploy(template)
+        except Exception:
+            logging.exception(f"Unhandled error deploying to {template.device}")
+            ok = False
+        self._record(template, digest, wave, ok)
+        return ok
+
+    def _run_waves(
+        self, pending: List[Template], digests: Dict[str, str], result: RolloutResult
+    ) -> None:
+        for wave_no, wave in enumerate(self.plan.waves(pending)):
+            kind = "canary" if wave_no == 0 else f"wave {wave_no}"
+            logging.info(f"Rollout {kind}: {len(wave)} devices")
+
+            with ThreadPoolExecutor(max_workers=len(wave)) as pool:
+                oks = list(
+                    pool.map(
+                        lambda t: self._deploy_one(t, digests[t.device], wave_no),
+                        wave,
+                    )
+                )
+            result.waves += 1
+
+            for template, ok in zip(wave, oks):
+                (result.deployed if ok else result.failed).append(template.device)
+
+            if wave_no == 0 and result.failed:
+                result.aborted = "canary wave failed"
+                return
+
+            attempted = len(result.deployed) + len(result.failed)
+            if len(result.failed) > self.plan.failure_budget * attempted:
+                result.aborted = (
+                    f"failure budget exceeded "
+                    f"({len(result.failed)}/{attempted} > "
+                    f"{self.plan.failure_budget:.0%})"
+                )
+                return
+
+    def run(self, templates: List[Template]) -> RolloutResult:
+        """Roll templates out, resuming from the progress file if present."""
+        self._load_progress()
+        result = RolloutResult()
+
+        pending: List[Template] = []
+        digests: Dict[str, str] = {}
+        for template in templates:
+            digest = digests[template.device] = payload_digest(template)
+            if self._already_done(template, digest):
+                result.skipped.append(template.device)
+            else:
+                pending.append(template)
+
+        if result.skipped:
+            logging.info(
+                f"Resuming rollout, {len(result.skipped)} devices already done"
+            )
+
+        self._open_journal()
+        try:
+            self._run_waves(pending, digests, result)
+        finally:
+            self._journal.close()
+            self._journal = None
+
+        if result.ok:
+            try:
+                os.remove(self.progress_file)
+            except FileNotFoundError:
+                pass
+
+        return result
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+
+"""
+Benchmark config rendering for a large number of host_vars files.
+
+Compares the original per-device generate_config (new Environment, template
+load/compile and YAML parse every call) with RenderService, cold and warm.
+
+Example:
+    ./bench_render.py --devices 10000
+"""
+
+import os
+import time
+import shutil
+import argparse
+import tempfile
+
+import yaml
+from jinja2 import Environment, FileSystemLoader
+
+from render_service import RenderService, TEMPLATE_DIR, TEMPLATE_NAME
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def legacy_generate_config(device, host_vars_dir):
+    """The pre-RenderService implementation of generate_config."""
+    hostname = device["hostname"]
+    with open(f"{host_vars_dir}/{hostname}.yaml") as fd:
+        config_data = yaml.safe_load(fd)
+    env = Environment(
+        loader=FileSystemLoader(os.path.join(HERE, TEMPLATE_DIR)),
+        trim_blocks=True,
+        lstrip_blocks=True,
+    )
+    template = env.get_template(TEMPLATE_NAME)
+    return template.render(config_data)
+
+
+def write_host_vars(host_vars_dir, count):
+    devices = []
+    for idx in range(count):
+        hostname = f"rtr-bench-{idx:05d}"
+        data = {
+            "BGP": {
+                "ASN": "65533",
+                "networks": [
+                    {
+                        "network_int": f"10.{idx // 256 % 256}.{idx % 256}.0",
+                        "mask_int": "255.255.255.255",
+                        "network_ext": "172.16.114.0",
+                        "mask_ext": "255.255.254.0",
+                    }
+                ],
+                "peers": [
+                    {
+                        "neighbor": f"172.16.{idx % 256}.1",
+                        "peer_asn": str(65000 + idx % 500),
+                        "route_map": {"name": "RM-OUT", "direction": "out"},
+                    }
+                ],
+                "redistribute": [{"protocol": "ospf", "process_id": "1"}],
+            }
+        }
+        with open(os.path.join(host_vars_dir, f"{hostname}.yaml"), "w") as fd:
+            yaml.safe_dump(data, fd)
+        devices.append({"hostname": hostname, "host": f"192.0.2.{idx % 254 + 1}"})
+    return devices
+
+
+def timed(label, count, func):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28}{elapsed:>10.3f}{count / elapsed:>14.0f}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--devices", type=int, default=10000)
+    parser.add_argument(
+        "--legacy-sample",
+        type=int,
+        default=1000,
+        help="devices rendered with the legacy path (it is slow)",
+    )
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="render-bench-")
+    try:
+        devices = write_host_vars(workdir, args.devices)
+        sample = devices[: args.legacy_sample]
+
+        print(f"{args.devices} host_vars files")
+        print(f"{'mode':<28}{'seconds':>10}{'renders/s':>14}")
+
+        timed(
+            f"legacy x{len(sample)}",
+            len(sample),
+            lambda: [legacy_generate_config(d, workdir) for d in sample],
+        )
+
+        service = RenderService(
+            template_dir=os.path.join(HERE, TEMPLATE_DIR), host_vars_dir=workdir
+        )
+        timed(
+            "RenderService.render cold",
+            len(devices),
+            lambda: [service.render(d) for d in devices],
+        )
+        timed(
+            "RenderService.render warm",
+            len(devices),
+            lambda: [service.render(d) for d in devices],
+        )
+        timed(
+            "RenderService.render_many",
+            len(devices),
+            lambda: service.render_many(devices),
+        )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
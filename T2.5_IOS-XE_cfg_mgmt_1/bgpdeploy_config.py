@@ -1,55 +1,180 @@
 import os
 import asyncio
-import yaml
-from jinja2 import Environment, FileSystemLoader
 from scrapli.driver.core import AsyncIOSXEDriver
-from inv import DEVICES
+from deploy_engine import DeployEngine, MAX_WORKERS, RENDER_WORKERS
+from render_service import RenderService
+from inventory import Inventory, parse_filter
+from config_diff import RUNNING_BGP_COMMAND, CheckCache, missing_lines
+from session_pool import SessionPool, IDLE_TIMEOUT
+from tracing import Tracer
 
 username = os.environ['XE_VAR_USER']
 password = os.environ['XE_VAR_PASS']
 
+# Upper bound on simultaneous SSH sessions
+max_workers = int(os.environ.get('XE_VAR_MAX_WORKERS', MAX_WORKERS))
+
+# Per-device phase spans; written to XE_VAR_TRACE when set
+# (XE_VAR_TRACE_FORMAT=chrome|otlp, default chrome)
+tracer = Tracer()
+
+# One Jinja environment / compiled template shared by every render
+renderer = RenderService()
+
+# Opt-in: devices verified as converged within this many seconds are not
+# contacted again while their rendered config is unchanged. Manual changes
+# on such a device go unnoticed until the TTL expires (0 = always check)
+check_cache = CheckCache(ttl=float(os.environ.get('XE_VAR_CHECK_TTL', 0)))
+
+
+def open_driver(device):
+    return AsyncIOSXEDriver(
+        host=device["host"],
+        auth_username=username,
+        auth_password=password,
+        auth_strict_key=False,
+        transport="asyncssh",
+    )
+
+
+# SSH sessions stay open between the deploy and verify phases and are
+# closed after a device's last phase; never more than max_workers open
+sessions = SessionPool(
+    open_driver,
+    idle_timeout=float(os.environ.get('XE_VAR_IDLE_TIMEOUT', IDLE_TIMEOUT)),
+    max_sessions=max_workers,
+    tracer=tracer,
+)
+
 
 def generate_config(device):
     """
     Load yaml from host vars for each device in list.
-    Render config via Jinja2
+    Render config via Jinja2 (cached environment, template and host vars)
     """
     hostname = device["hostname"]
-    config_data = yaml.safe_load(open(f"host_vars/{hostname}.yaml"))
-    env = Environment(
-        loader=FileSystemLoader("./templates"), trim_blocks=True, lstrip_blocks=True
-    )
-    template = env.get_template("bgp.j2")
-    configuration = template.render(config_data)
-    return configuration
+    with tracer.span("yaml_load", hostname):
+        config_data = renderer.host_vars(hostname)
+    with tracer.span("render", hostname):
+        return renderer.template.render(config_data)
 
 
-async def deploy_config(device):
+def load_devices():
     """
-    Coroutine to open connection and push config
+    Devices from XE_VAR_INVENTORY (YAML, CSV or SQLite) or from inv.DEVICES,
+    narrowed down by XE_VAR_FILTER, e.g. "role=edge,tags=dc1"
     """
-    async with AsyncIOSXEDriver(
-        host=device["host"],
-        auth_username=username,
-        auth_password=password,
-        auth_strict_key=False,
-        transport="asyncssh",
-    ) as conn:
-        prompt_result = await conn.get_prompt()
-        cfg = generate_config(device).splitlines()
-        configs_result = await conn.send_configs(configs=cfg)
+    source = os.environ.get('XE_VAR_INVENTORY')
+    if source is None:
+        from inv import DEVICES
+        source = DEVICES
+    inventory = Inventory(source)
+    return inventory.select(**parse_filter(os.environ.get('XE_VAR_FILTER')))
+
+
+async def deploy_config(device, cfg=None):
+    """
+    Coroutine to compare the running BGP section with the rendered config
+    and push only the missing lines, over a pooled session.
+    cfg is the pre-rendered config, rendered here when not supplied.
+    configs_result is None when there was nothing to push.
+    """
+    hostname = device["hostname"]
+    if cfg is None:
+        cfg = generate_config(device)
+    if check_cache.is_converged(hostname, cfg):
+        return None, None
+
+    async with sessions.session(device) as conn:
+        with tracer.span("get_prompt", hostname):
+            prompt_result = await conn.get_prompt()
+        with tracer.span("show_running", hostname) as span:
+            running = await conn.send_command(RUNNING_BGP_COMMAND)
+            span.attrs["device_elapsed"] = running.elapsed_time
+        with tracer.span("diff", hostname) as span:
+            delta = missing_lines(cfg, running.result)
+            span.attrs["lines"] = len(delta)
+        configs_result = None
+        if delta:
+            with tracer.span("send_configs", hostname) as span:
+                configs_result = await conn.send_configs(configs=delta)
+                span.attrs["device_elapsed"] = configs_result.elapsed_time
+
+    if configs_result is None:
+        # Nothing to verify, this was the device's last phase
+        check_cache.mark_converged(hostname, cfg)
+        await sessions.release(device)
     return prompt_result, configs_result
 
 
+async def verify_config(device, cfg):
+    """
+    Coroutine to re-read the BGP section after a push, reusing the session
+    from deploy_config. Returns the lines still missing on the device.
+    """
+    async with sessions.session(device) as conn:
+        with tracer.span("verify", device["hostname"]) as span:
+            running = await conn.send_command(RUNNING_BGP_COMMAND)
+            span.attrs["device_elapsed"] = running.elapsed_time
+    await sessions.release(device)
+    still_missing = missing_lines(cfg, running.result)
+    if still_missing:
+        check_cache.forget(device["hostname"])
+    else:
+        check_cache.mark_converged(device["hostname"], cfg)
+    return still_missing
+
+
 async def main():
     """
     Main coroutine
     """
-    coroutines = [deploy_config(device) for device in DEVICES]
-    results = await asyncio.gather(*coroutines)
+    devices = list(load_devices())
+    async with sessions:
+        engine = DeployEngine(
+            render=generate_config,
+            deploy=deploy_config,
+            max_workers=max_workers,
+            render_workers=RENDER_WORKERS,
+            tracer=tracer,
+        )
+        results = await engine.run(devices)
+
+        # Verify only the devices that received config
+        pushed = [r.device for r in results if r.ok and r.result[1] is not None]
+        engine.deploy = verify_config
+        verified = {
+            r.device["hostname"]: r for r in await engine.run(pushed)
+        }
+
     for result in results:
-        print(f"{result[0]}")
-        print(f"{result[1].result}\n\n")
+        hostname = result.device["hostname"]
+        if not result.ok:
+            print(f"{hostname}: FAILED {result.error!r}")
+        elif result.result[0] is None:
+            print(f"{hostname}: skipped, verified within XE_VAR_CHECK_TTL (not re-checked)")
+        elif result.result[1] is None:
+            print(f"{result.result[0]}")
+            print(f"{hostname}: already compliant, nothing pushed")
+        else:
+            print(f"{result.result[0]}")
+            print(f"{result.result[1].result}")
+            check = verified[hostname]
+            if not check.ok:
+                print(f"{hostname}: verification FAILED {check.error!r}")
+            elif check.result:
+                print(f"{hostname}: still missing after push: {check.result}")
+            else:
+                print(f"{hostname}: verified")
+        print(f"{hostname}: {result.timing.format()}\n\n")
+    print(sessions.metrics.format())
+    print(tracer.summary())
+    trace_file = os.environ.get('XE_VAR_TRACE')
+    if trace_file:
+        tracer.export(trace_file, os.environ.get('XE_VAR_TRACE_FORMAT', 'chrome'))
+        print(f"Trace written to {trace_file}")
+    check_cache.save()
 
 
-asyncio.run(main())
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,151 @@
+"""
+Compare rendered IOS XE config with the running config of a device.
+
+Configs are handled as an indentation tree: every line is identified by its
+parent lines (e.g. "router bgp 65533" > "address-family ipv4") plus its own
+normalised text. missing_lines() returns the rendered lines that are not
+present on the device, together with the parent lines needed to reach the
+right configuration mode, so only the delta has to be pushed.
+
+CheckCache remembers, per device, which rendered config was last verified
+as converged. With a ttl set, reruns on an unchanged fleet can skip the
+device entirely, at the cost of not seeing drift made on the box within
+the ttl; it is off (ttl=0) by default.
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+from typing import Dict, Iterator, List, Tuple
+
+RUNNING_BGP_COMMAND = "show running-config | section router bgp"
+
+CHECK_CACHE_FILE = ".bgp-check-cache.json"
+
+# Lines that only move between modes or separate blocks
+IGNORED_LINES = ("!", "exit", "exit-address-family")
+
+# Rendered form -> form shown in the running config
+ALIASES = {
+    "address-family ipv4 unicast": "address-family ipv4",
+}
+
+_SPACES_RE = re.compile(r"\s+")
+
+
+def normalize(line: str) -> str:
+    line = _SPACES_RE.sub(" ", line.strip())
+    return ALIASES.get(line, line)
+
+
+def parse_config(text: str) -> Iterator[Tuple[Tuple[str, ...], str, str]]:
+    """
+    Yield (parents, normalised line, original line) for every config line.
+
+    parents holds the normalised parent lines, outermost first.
+    """
+    stack: List[Tuple[int, str]] = []
+    for raw in text.splitlines():
+        stripped = raw.strip()
+        if not stripped or stripped in IGNORED_LINES or stripped.startswith("!"):
+            continue
+        indent = len(raw) - len(raw.lstrip())
+        while stack and stack[-1][0] >= indent:
+            stack.pop()
+        line = normalize(stripped)
+        yield tuple(p for _, p in stack), line, raw.rstrip()
+        stack.append((indent, line))
+
+
+def missing_lines(rendered: str, running: str) -> List[str]:
+    """
+    Return the rendered lines absent from running, ready for send_configs.
+
+    Parent lines are repeated as needed and "exit" is emitted when leaving
+    a sub-mode, so the list can be sent as-is.
+    """
+    present = {(parents, line) for parents, line, _ in parse_config(running)}
+
+    commands: List[str] = []
+    # Normalised parents of the mode the device is currently in
+    entered: List[str] = []
+    # Original text of every parent seen so far, keyed by its full path
+    originals: Dict[Tuple[str, ...], str] = {}
+    # Path of the last line sent, sending a parent line enters its mode
+    last: Tuple[str, ...] = ()
+
+    for parents, line, original in parse_config(rendered):
+        originals[parents + (line,)] = original
+        if (parents, line) in present:
+            continue
+
+        if last and parents[: len(last)] == last:
+            entered = list(last)
+
+        # Leave modes that are not on the path of this line
+        common = 0
+        while (
+            common < len(entered)
+            and common < len(parents)
+            and entered[common] == parents[common]
+        ):
+            common += 1
+        for _ in range(len(entered) - common):
+            commands.append("exit")
+            entered.pop()
+
+        # Enter the missing parent modes
+        for depth in range(common, len(parents)):
+            path = parents[: depth + 1]
+            commands.append(originals.get(path, parents[depth]))
+            entered.append(parents[depth])
+
+        commands.append(original)
+        last = parents + (line,)
+
+    return commands
+
+
+def config_digest(config: str) -> str:
+    return hashlib.sha256(config.encode("utf-8")).hexdigest()
+
+
+class CheckCache(object):
+    """Per-device record of the last rendered config verified on the box."""
+
+    def __init__(self, path: str = CHECK_CACHE_FILE, ttl: float = 0) -> None:
+        self.path = path
+        self.ttl = ttl
+        try:
+            with open(path) as fd:
+                self.entries: Dict[str, Dict] = json.load(fd)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def is_converged(self, hostname: str, config: str) -> bool:
+        """True if this exact config was verified within the last ttl seconds."""
+        if self.ttl <= 0:
+            return False
+        entry = self.entries.get(hostname)
+        return (
+            entry is not None
+            and entry["digest"] == config_digest(config)
+            and time.time() - entry["checked"] < self.ttl
+        )
+
+    def mark_converged(self, hostname: str, config: str) -> None:
+        self.entries[hostname] = {
+            "digest": config_digest(config),
+            "checked": time.time(),
+        }
+
+    def forget(self, hostname: str) -> None:
+        self.entries.pop(hostname, None)
+
+    def save(self) -> None:
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as fd:
+            json.dump(self.entries, fd, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
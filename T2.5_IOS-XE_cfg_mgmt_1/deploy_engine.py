@@ -0,0 +1,138 @@
+"""
+Pipelined, bounded-concurrency deployment engine.
+
+Rendering is CPU/disk work (YAML loads + Jinja), so it is pushed to a thread
+pool and started for every device straight away. Device connections are the
+scarce resource, so only max_workers deployments run at the same time. A
+device whose config is already rendered simply waits for a free slot, which
+keeps the render stage ahead of the SSH stage without blocking the loop.
+"""
+
+import asyncio
+import time
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+# Default number of devices being configured at the same time
+MAX_WORKERS = 50
+
+# Default number of threads used for rendering
+RENDER_WORKERS = 4
+
+
+@dataclass
+class DeviceTiming:
+    """Per-device timings in seconds."""
+
+    render: float = 0.0
+    render_wait: float = 0.0
+    queued: float = 0.0
+    deploy: float = 0.0
+    total: float = 0.0
+
+    def format(self) -> str:
+        return (
+            f"render {self.render:.3f}s (ready after {self.render_wait:.3f}s), "
+            f"queued {self.queued:.3f}s, deploy {self.deploy:.3f}s, "
+            f"total {self.total:.3f}s"
+        )
+
+
+@dataclass
+class DeviceResult:
+    """Outcome of deploying to one device."""
+
+    device: Dict[str, Any]
+    result: Any = None
+    error: Optional[BaseException] = None
+    timing: DeviceTiming = field(default_factory=DeviceTiming)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class DeployEngine:
+    """
+    Render configs in an executor and deploy them with at most
+    max_workers devices in flight.
+
+    render: blocking callable device -> config, run in a thread pool
+    deploy: coroutine (device, config) -> result
+    tracer: optional tracing.Tracer, records the wait for a worker slot
+    """
+
+    def __init__(
+        self,
+        render: Callable[[Dict[str, Any]], Any],
+        deploy: Callable[[Dict[str, Any], Any], Awaitable[Any]],
+        max_workers: int = MAX_WORKERS,
+        render_workers: int = RENDER_WORKERS,
+        tracer: Any = None,
+    ) -> None:
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.render = render
+        self.deploy = deploy
+        self.max_workers = max_workers
+        self.render_workers = render_workers
+        self.tracer = tracer
+
+    def _timed_render(self, device: Dict[str, Any], timing: DeviceTiming) -> Any:
+        start = time.perf_counter()
+        try:
+            return self.render(device)
+        finally:
+            timing.render = time.perf_counter() - start
+
+    async def _run_one(
+        self,
+        device: Dict[str, Any],
+        pool: ThreadPoolExecutor,
+        slots: asyncio.Semaphore,
+    ) -> DeviceResult:
+        loop = asyncio.get_running_loop()
+        outcome = DeviceResult(device=device)
+        timing = outcome.timing
+        start = time.perf_counter()
+
+        try:
+            config = await loop.run_in_executor(
+                pool, self._timed_render, device, timing
+            )
+            timing.render_wait = time.perf_counter() - start
+
+            queued = time.perf_counter()
+            waiting = (
+                self.tracer.span("queue_wait", device.get("hostname"))
+                if self.tracer
+                else nullcontext()
+            )
+            with waiting:
+                await slots.acquire()
+            try:
+                deploy_start = time.perf_counter()
+                timing.queued = deploy_start - queued
+                try:
+                    outcome.result = await self.deploy(device, config)
+                finally:
+                    timing.deploy = time.perf_counter() - deploy_start
+            finally:
+                slots.release()
+        except Exception as exc:
+            outcome.error = exc
+
+        timing.total = time.perf_counter() - start
+        return outcome
+
+    async def run(self, devices: Iterable[Dict[str, Any]]) -> List[DeviceResult]:
+        """Deploy to every device, results are returned in input order."""
+        slots = asyncio.Semaphore(self.max_workers)
+        with ThreadPoolExecutor(max_workers=self.render_workers) as pool:
+            tasks = [
+                asyncio.create_task(self._run_one(device, pool, slots))
+                for device in devices
+            ]
+            return list(await asyncio.gather(*tasks))
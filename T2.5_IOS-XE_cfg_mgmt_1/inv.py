@@ -2,9 +2,11 @@ DEVICES = [
     {
         "hostname": "rtr-edge-03",
         "host": "192.168.5.118",
+        "role": "edge",
     },
     {
         "hostname": "rtr-edge-04",
         "host": "192.168.5.119",
+        "role": "edge",
     },
 ]
\ No newline at end of file
@@ -0,0 +1,293 @@
+"""
+Inventory backend for the deploy scripts.
+
+Devices can come from a YAML file (a top level list of device mappings), a
+CSV file (one device per row) or a SQLite index database. YAML and CSV
+sources are streamed once into a SQLite index stored next to the source file
+(.<name>.idx.sqlite) and the index is reused until the source changes.
+
+Every scalar attribute and every item of the list attributes (tags, groups)
+is indexed, so filters such as role=edge or tags=dc1 are answered by an
+index lookup instead of a scan. Nothing is read until the inventory is
+first iterated, and devices are yielded one at a time from a cursor.
+
+Example:
+    inv = Inventory("devices.yaml")
+    for device in inv.select(role="edge", tags=["dc1", "dc2"]):
+        ...
+"""
+
+import os
+import csv
+import json
+import sqlite3
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+import yaml
+from yaml.composer import Composer
+from yaml.constructor import SafeConstructor
+from yaml.resolver import Resolver
+
+try:
+    from yaml.cyaml import CParser
+except ImportError:
+    CParser = None
+
+# CSV columns holding several values, separated by LIST_SEPARATOR
+LIST_FIELDS = ("tags", "groups")
+LIST_SEPARATOR = ";"
+
+INDEX_VERSION = 1
+BATCH_SIZE = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS devices (
+    id INTEGER PRIMARY KEY,
+    hostname TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS attributes (
+    device_id INTEGER NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS attributes_lookup ON attributes (key, value, device_id);
+CREATE INDEX IF NOT EXISTS devices_hostname ON devices (hostname);
+"""
+
+FilterValue = Union[str, Sequence[str]]
+
+if CParser is not None:
+
+    class _StreamLoader(CParser, Composer, SafeConstructor, Resolver):
+        """libyaml parser with the Python composer, so nodes can be built
+        one list item at a time (CSafeLoader only composes whole documents)."""
+
+        def __init__(self, stream):
+            CParser.__init__(self, stream)
+            Composer.__init__(self)
+            SafeConstructor.__init__(self)
+            Resolver.__init__(self)
+
+else:
+    _StreamLoader = yaml.SafeLoader
+
+
+# -----------------------------------------------------------------------------
+# Source readers
+# -----------------------------------------------------------------------------
+def iter_yaml(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield the items of a top level YAML list one by one."""
+    with open(path, encoding="utf-8") as fd:
+        loader = _StreamLoader(fd)
+        try:
+            loader.get_event()  # StreamStart
+            if loader.check_event(yaml.StreamEndEvent):
+                return
+            loader.get_event()  # DocumentStart
+            if not loader.check_event(yaml.SequenceStartEvent):
+                raise ValueError(f"{path}: inventory must be a list of devices")
+            loader.get_event()
+            while not loader.check_event(yaml.SequenceEndEvent):
+                node = loader.compose_node(None, None)
+                yield loader.construct_document(node)
+        finally:
+            loader.dispose()
+
+
+def iter_csv(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield one device per CSV row, list columns are split on ';'."""
+    with open(path, newline="", encoding="utf-8") as fd:
+        for row in csv.DictReader(fd):
+            device: Dict[str, Any] = {}
+            for key, value in row.items():
+                if key is None or value is None or value == "":
+                    continue
+                if key in LIST_FIELDS:
+                    device[key] = [v.strip() for v in value.split(LIST_SEPARATOR) if v]
+                else:
+                    device[key] = value
+            yield device
+
+
+def _attributes(device: Dict[str, Any]) -> Iterator[tuple]:
+    for key, value in device.items():
+        if isinstance(value, (list, tuple, set)):
+            for item in value:
+                yield key, str(item)
+        elif not isinstance(value, dict) and value is not None:
+            yield key, str(value)
+
+
+def build_index(devices: Iterable[Dict[str, Any]], conn: sqlite3.Connection) -> int:
+    """Stream devices into an index database, returns the device count."""
+    conn.executescript(SCHEMA)
+    conn.execute("DELETE FROM devices")
+    conn.execute("DELETE FROM attributes")
+
+    count = 0
+    rows: List[tuple] = []
+    attrs: List[tuple] = []
+    for count, device in enumerate(devices, start=1):
+        if "hostname" not in device:
+            raise ValueError(f"inventory entry {count} has no hostname")
+        rows.append((count, device["hostname"], json.dumps(device)))
+        attrs.extend((count, k, v) for k, v in _attributes(device))
+        if len(rows) >= BATCH_SIZE:
+            conn.executemany("INSERT INTO devices VALUES (?, ?, ?)", rows)
+            conn.executemany("INSERT INTO attributes VALUES (?, ?, ?)", attrs)
+            rows, attrs = [], []
+    conn.executemany("INSERT INTO devices VALUES (?, ?, ?)", rows)
+    conn.executemany("INSERT INTO attributes VALUES (?, ?, ?)", attrs)
+    conn.commit()
+    return count
+
+
+# -----------------------------------------------------------------------------
+# Inventory
+# -----------------------------------------------------------------------------
+class Inventory(object):
+    """Lazily indexed device inventory."""
+
+    READERS = {
+        ".yaml": iter_yaml,
+        ".yml": iter_yaml,
+        ".csv": iter_csv,
+    }
+    SQLITE_SUFFIXES = (".sqlite", ".sqlite3", ".db")
+
+    def __init__(
+        self,
+        source: Union[str, Iterable[Dict[str, Any]]],
+        index_path: Optional[str] = None,
+    ) -> None:
+        self.source = source
+        self.index_path = index_path
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def _is_file(self) -> bool:
+        return isinstance(self.source, str)
+
+    def _default_index_path(self) -> str:
+        path = os.path.abspath(self.source)
+        return os.path.join(
+            os.path.dirname(path), f".{os.path.basename(path)}.idx.sqlite"
+        )
+
+    def _source_stamp(self) -> str:
+        st = os.stat(self.source)
+        return f"{INDEX_VERSION}:{st.st_mtime_ns}:{st.st_size}"
+
+    def _open_file_index(self) -> sqlite3.Connection:
+        ext = os.path.splitext(self.source)[1].lower()
+        if ext in self.SQLITE_SUFFIXES:
+            return sqlite3.connect(self.source)
+
+        reader = self.READERS.get(ext)
+        if reader is None:
+            raise ValueError(f"Unsupported inventory format: {self.source}")
+
+        index_path = self.index_path or self._default_index_path()
+        stamp = self._source_stamp()
+
+        if os.path.exists(index_path):
+            conn = sqlite3.connect(index_path)
+            try:
+                row = conn.execute(
+                    "SELECT value FROM meta WHERE key = 'source'"
+                ).fetchone()
+            except sqlite3.DatabaseError:
+                row = None
+            if row and row[0] == stamp:
+                return conn
+            conn.close()
+
+        # Build next to the final file and swap it in when complete
+        tmp_path = f"{index_path}.tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        conn = sqlite3.connect(tmp_path)
+        build_index(reader(self.source), conn)
+        conn.execute("INSERT OR REPLACE INTO meta VALUES ('source', ?)", (stamp,))
+        conn.commit()
+        conn.close()
+        os.replace(tmp_path, index_path)
+        return sqlite3.connect(index_path)
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self._is_file:
+                self._conn = self._open_file_index()
+            else:
+                self._conn = sqlite3.connect(":memory:")
+                build_index(self.source, self._conn)
+        return self._conn
+
+    def _stream(self, sql: str, params: Sequence[Any] = ()) -> Iterator[Dict[str, Any]]:
+        cursor = self._connection().execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(BATCH_SIZE)
+            if not rows:
+                return
+            for (data,) in rows:
+                yield json.loads(data)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self._stream("SELECT data FROM devices ORDER BY id")
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM devices").fetchone()[0]
+
+    def select(self, **filters: FilterValue) -> Iterator[Dict[str, Any]]:
+        """
+        Yield devices matching every filter.
+
+        A filter value may be a list, in which case any of the values match
+        (role=["edge", "core"]).
+        """
+        if not filters:
+            return iter(self)
+
+        clauses: List[str] = []
+        params: List[str] = []
+        for key, value in filters.items():
+            values = [value] if isinstance(value, str) else list(value)
+            marks = ", ".join("?" for _ in values)
+            clauses.append(
+                "id IN (SELECT device_id FROM attributes "
+                f"WHERE key = ? AND value IN ({marks}))"
+            )
+            params.append(key)
+            params.extend(str(v) for v in values)
+
+        sql = f"SELECT data FROM devices WHERE {' AND '.join(clauses)} ORDER BY id"
+        return self._stream(sql, params)
+
+    def get(self, hostname: str) -> Optional[Dict[str, Any]]:
+        row = (
+            self._connection()
+            .execute("SELECT data FROM devices WHERE hostname = ?", (hostname,))
+            .fetchone()
+        )
+        return json.loads(row[0]) if row else None
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def parse_filter(text: Optional[str]) -> Dict[str, List[str]]:
+    """Parse 'role=edge,tags=dc1,tags=dc2' into select() keyword arguments."""
+    filters: Dict[str, List[str]] = {}
+    for part in (text or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        key, sep, value = part.partition("=")
+        if not sep:
+            raise ValueError(f"Invalid inventory filter '{part}', expected key=value")
+        filters.setdefault(key.strip(), []).append(value.strip())
+    return filters
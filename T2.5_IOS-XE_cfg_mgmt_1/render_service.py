@@ -0,0 +1,77 @@
+"""
+Shared Jinja render service for the BGP templates.
+
+One Environment is kept for the life of the process and the template is
+compiled once. Parsed host_vars files are cached and only re-read when their
+mtime changes, so repeated renders of the same inventory cost a stat() per
+device instead of a YAML parse plus a template compile.
+"""
+
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Tuple
+
+import yaml
+from jinja2 import Environment, FileSystemLoader
+
+# libyaml based loader when available, it is several times faster
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+TEMPLATE_DIR = "./templates"
+TEMPLATE_NAME = "bgp.j2"
+HOST_VARS_DIR = "host_vars"
+
+
+class RenderService(object):
+    """Render device configs from host_vars/<hostname>.yaml + one template."""
+
+    def __init__(
+        self,
+        template_dir: str = TEMPLATE_DIR,
+        template_name: str = TEMPLATE_NAME,
+        host_vars_dir: str = HOST_VARS_DIR,
+    ) -> None:
+        self.host_vars_dir = host_vars_dir
+        self.env = Environment(
+            loader=FileSystemLoader(template_dir),
+            trim_blocks=True,
+            lstrip_blocks=True,
+            auto_reload=False,
+        )
+        # Compiled once, Template.render is safe to call from many threads
+        self.template = self.env.get_template(template_name)
+        self._host_vars: Dict[str, Tuple[int, Any]] = {}
+        self._lock = threading.Lock()
+
+    def host_vars(self, hostname: str) -> Any:
+        """Return parsed host_vars for hostname, cached on file mtime."""
+        path = os.path.join(self.host_vars_dir, f"{hostname}.yaml")
+        mtime = os.stat(path).st_mtime_ns
+
+        cached = self._host_vars.get(hostname)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        with open(path, encoding="utf-8") as fd:
+            data = yaml.load(fd, Loader=YamlLoader)
+
+        with self._lock:
+            self._host_vars[hostname] = (mtime, data)
+        return data
+
+    def render(self, device: Dict[str, Any]) -> str:
+        """Render the configuration for a single device."""
+        return self.template.render(self.host_vars(device["hostname"]))
+
+    def render_many(self, devices: Iterable[Dict[str, Any]]) -> List[Tuple[str, str]]:
+        """Render a batch of devices, returns (hostname, config) pairs."""
+        render = self.template.render
+        host_vars = self.host_vars
+        return [
+            (device["hostname"], render(host_vars(device["hostname"])))
+            for device in devices
+        ]
+
+    def clear_cache(self) -> None:
+        with self._lock:
+            self._host_vars.clear()
@@ -0,0 +1,225 @@
+"""
+Async pool of authenticated device sessions, keyed by host.
+
+A session is opened the first time a host is checked out and handed back to
+the pool afterwards, so later phases (check, push, verification, rollback)
+reuse the same SSH connection instead of doing a new handshake.
+
+* One session per host, checked out exclusively (CLI sessions are serial).
+* Sessions idle for longer than idle_timeout are closed, by a background
+  reaper and on checkout.
+* Sessions idle for longer than health_check_after are probed with
+  get_prompt() before reuse and replaced if the probe fails.
+* At most max_sessions are kept open; the least recently used idle session
+  is closed to make room. Size it like the worker cap so the pool never
+  holds more SSH sessions than the deploy may use at once.
+* release() closes a host's session once the caller is done with it.
+* A session is discarded if the caller raises while holding it.
+"""
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager, nullcontext
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+IDLE_TIMEOUT = 300.0
+HEALTH_CHECK_AFTER = 30.0
+HEALTH_TIMEOUT = 10.0
+MAX_SESSIONS = 50
+
+
+@dataclass
+class PoolMetrics:
+    """Counters describing how the pool was used."""
+
+    handshakes: int = 0
+    reuses: int = 0
+    health_checks: int = 0
+    health_failures: int = 0
+    idle_closed: int = 0
+    evicted: int = 0
+    discarded: int = 0
+
+    @property
+    def handshakes_avoided(self) -> int:
+        return self.reuses
+
+    def format(self) -> str:
+        return (
+            f"sessions: {self.handshakes} handshakes, "
+            f"{self.handshakes_avoided} avoided by reuse, "
+            f"{self.health_checks} health checks ({self.health_failures} failed), "
+            f"{self.idle_closed} closed idle, {self.evicted} evicted, "
+            f"{self.discarded} discarded after errors"
+        )
+
+
+class _Slot(object):
+    __slots__ = ("conn", "last_used", "lock")
+
+    def __init__(self) -> None:
+        self.conn: Any = None
+        self.last_used = 0.0
+        self.lock = asyncio.Lock()
+
+
+class SessionPool(object):
+    """
+    Keep device sessions open across deploy phases.
+
+    factory: callable device -> unopened async driver (e.g. AsyncIOSXEDriver)
+    tracer: optional tracing.Tracer, records handshakes and health checks
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[Dict[str, Any]], Any],
+        idle_timeout: float = IDLE_TIMEOUT,
+        health_check_after: float = HEALTH_CHECK_AFTER,
+        health_timeout: float = HEALTH_TIMEOUT,
+        max_sessions: int = MAX_SESSIONS,
+        tracer: Any = None,
+    ) -> None:
+        self.factory = factory
+        self.idle_timeout = idle_timeout
+        self.health_check_after = health_check_after
+        self.health_timeout = health_timeout
+        self.max_sessions = max_sessions
+        self.tracer = tracer
+        self.metrics = PoolMetrics()
+        self._slots: Dict[str, _Slot] = {}
+        self._reaper: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _now() -> float:
+        return asyncio.get_running_loop().time()
+
+    def _span(self, name: str, device: Dict[str, Any]) -> Any:
+        if self.tracer is None:
+            return nullcontext()
+        return self.tracer.span(name, device.get("hostname", device["host"]))
+
+    @staticmethod
+    async def _close(conn: Any) -> None:
+        try:
+            await conn.close()
+        except Exception:
+            logging.debug("Error closing session", exc_info=True)
+
+    async def _healthy(self, conn: Any, device: Dict[str, Any]) -> bool:
+        self.metrics.health_checks += 1
+        try:
+            if hasattr(conn, "isalive") and not conn.isalive():
+                return False
+            with self._span("health_check", device):
+                await asyncio.wait_for(conn.get_prompt(), self.health_timeout)
+            return True
+        except Exception:
+            return False
+
+    async def _evict_lru(self) -> None:
+        open_slots = [s for s in self._slots.values() if s.conn is not None]
+        if len(open_slots) < self.max_sessions:
+            return
+        idle = [s for s in open_slots if not s.lock.locked()]
+        if not idle:
+            return
+        victim = min(idle, key=lambda s: s.last_used)
+        conn, victim.conn = victim.conn, None
+        self.metrics.evicted += 1
+        await self._close(conn)
+
+    async def _checkout(self, slot: _Slot, device: Dict[str, Any]) -> Any:
+        if slot.conn is not None:
+            idle = self._now() - slot.last_used
+            if idle > self.idle_timeout:
+                self.metrics.idle_closed += 1
+                await self._close(slot.conn)
+                slot.conn = None
+            elif idle > self.health_check_after and not await self._healthy(
+                slot.conn, device
+            ):
+                self.metrics.health_failures += 1
+                await self._close(slot.conn)
+                slot.conn = None
+
+        if slot.conn is not None:
+            self.metrics.reuses += 1
+            return slot.conn
+
+        await self._evict_lru()
+        conn = self.factory(device)
+        with self._span("ssh_handshake", device):
+            await conn.open()
+        self.metrics.handshakes += 1
+        slot.conn = conn
+        return conn
+
+    @asynccontextmanager
+    async def session(self, device: Dict[str, Any]) -> AsyncIterator[Any]:
+        """Check out the session for device["host"], opening it if needed."""
+        slot = self._slots.get(device["host"])
+        if slot is None:
+            slot = self._slots[device["host"]] = _Slot()
+        async with slot.lock:
+            conn = await self._checkout(slot, device)
+            try:
+                yield conn
+            except BaseException:
+                # State of the CLI session is unknown, do not hand it out again
+                self.metrics.discarded += 1
+                slot.conn = None
+                await self._close(conn)
+                raise
+            finally:
+                slot.last_used = self._now()
+
+    async def release(self, device: Dict[str, Any]) -> None:
+        """Close the session of device["host"], e.g. after its last phase."""
+        slot = self._slots.get(device["host"])
+        if slot is None:
+            return
+        async with slot.lock:
+            conn, slot.conn = slot.conn, None
+        if conn is not None:
+            await self._close(conn)
+
+    async def close_idle(self) -> None:
+        """Close every session idle for longer than idle_timeout."""
+        now = self._now()
+        for slot in self._slots.values():
+            if (
+                slot.conn is not None
+                and not slot.lock.locked()
+                and now - slot.last_used > self.idle_timeout
+            ):
+                conn, slot.conn = slot.conn, None
+                self.metrics.idle_closed += 1
+                await self._close(conn)
+
+    async def _reap(self) -> None:
+        while True:
+            await asyncio.sleep(max(1.0, self.idle_timeout / 2))
+            await self.close_idle()
+
+    async def close(self) -> None:
+        """Stop the reaper and close every open session."""
+        if self._reaper is not None:
+            self._reaper.cancel()
+            try:
+                await self._reaper
+            except asyncio.CancelledError:
+                pass
+            self._reaper = None
+        for slot in self._slots.values():
+            if slot.conn is not None:
+                conn, slot.conn = slot.conn, None
+                await self._close(conn)
+
+    async def __aenter__(self) -> "SessionPool":
+        self._reaper = asyncio.create_task(self._reap())
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.close()
@@ -0,0 +1,221 @@
+"""
+Lightweight per-device span tracing for the deploy scripts.
+
+    tracer = Tracer()
+    with tracer.span("render", "rtr-edge-03"):
+        ...
+    tracer.export("trace.json")            # Chrome trace (chrome://tracing)
+    tracer.export("trace.json", "otlp")    # OTLP/JSON
+    print(tracer.summary())
+
+Spans nest through a context variable, so a span opened inside another one
+in the same task records it as its parent. Recording is thread-safe, spans
+from the render thread pool and the event loop end up in the same trace.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+SERVICE_NAME = "bgpdeploy_config"
+
+
+@dataclass
+class Span:
+    """One timed phase for one device."""
+
+    name: str
+    device: Optional[str]
+    start_ns: int
+    end_ns: int = 0
+    span_id: str = ""
+    parent_id: Optional[str] = None
+    thread_id: int = 0
+    attrs: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e9
+
+
+_current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class Tracer(object):
+    """Collect spans and export them as Chrome trace or OTLP/JSON."""
+
+    def __init__(self, enabled: bool = True, service_name: str = SERVICE_NAME) -> None:
+        self.enabled = enabled
+        self.service_name = service_name
+        self.spans: List[Span] = []
+        self.trace_id = os.urandom(16).hex()
+        self._lock = threading.Lock()
+        # Wall clock anchor so monotonic span times can be exported as epoch
+        self._epoch_wall_ns = time.time_ns()
+        self._epoch_perf_ns = time.perf_counter_ns()
+
+    @contextmanager
+    def span(self, name: str, device: Optional[str] = None, **attrs: Any) -> Iterator[Span]:
+        """Time the enclosed block; attributes can be added to the yielded span."""
+        parent = _current.get()
+        span = Span(
+            name=name,
+            device=device if device is not None else (parent and parent.device),
+            start_ns=time.perf_counter_ns(),
+            span_id=os.urandom(8).hex(),
+            parent_id=parent.span_id if parent else None,
+            thread_id=threading.get_ident(),
+            attrs=attrs,
+        )
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.attrs["error"] = repr(exc)
+            raise
+        finally:
+            span.end_ns = time.perf_counter_ns()
+            _current.reset(token)
+            if self.enabled:
+                with self._lock:
+                    self.spans.append(span)
+
+    def _wall_ns(self, perf_ns: int) -> int:
+        return self._epoch_wall_ns + (perf_ns - self._epoch_perf_ns)
+
+    # -------------------------------------------------------------------------
+    # Export
+    # -------------------------------------------------------------------------
+    def chrome_trace(self) -> Dict[str, Any]:
+        """Trace Event Format, one timeline row per device."""
+        rows: Dict[str, int] = {}
+        events: List[Dict[str, Any]] = []
+        for span in sorted(self.spans, key=lambda s: s.start_ns):
+            device = span.device or "-"
+            if device not in rows:
+                rows[device] = len(rows) + 1
+                events.append(
+                    {
+                        "name": "thread_name",
+                        "ph": "M",
+                        "pid": 1,
+                        "tid": rows[device],
+                        "args": {"name": device},
+                    }
+                )
+            events.append(
+                {
+                    "name": span.name,
+                    "cat": "deploy",
+                    "ph": "X",
+                    "ts": (span.start_ns - self._epoch_perf_ns) / 1000,
+                    "dur": (span.end_ns - span.start_ns) / 1000,
+                    "pid": 1,
+                    "tid": rows[device],
+                    "args": {k: str(v) for k, v in span.attrs.items()},
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def otlp_trace(self) -> Dict[str, Any]:
+        """OTLP/JSON ExportTraceServiceRequest."""
+        spans = []
+        for span in self.spans:
+            attrs = dict(span.attrs)
+            if span.device:
+                attrs["device"] = span.device
+            otlp_span = {
+                "traceId": self.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": 1,
+                "startTimeUnixNano": str(self._wall_ns(span.start_ns)),
+                "endTimeUnixNano": str(self._wall_ns(span.end_ns)),
+                "attributes": [
+                    {"key": k, "value": {"stringValue": str(v)}}
+                    for k, v in attrs.items()
+                ],
+            }
+            if span.parent_id:
+                otlp_span["parentSpanId"] = span.parent_id
+            spans.append(otlp_span)
+
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {
+                                "key": "service.name",
+                                "value": {"stringValue": self.service_name},
+                            }
+                        ]
+                    },
+                    "scopeSpans": [{"scope": {"name": "tracing"}, "spans": spans}],
+                }
+            ]
+        }
+
+    def export(self, path: str, fmt: str = "chrome") -> None:
+        """Write the trace to path, fmt is 'chrome' or 'otlp'."""
+        if fmt == "chrome":
+            data = self.chrome_trace()
+        elif fmt == "otlp":
+            data = self.otlp_trace()
+        else:
+            raise ValueError(f"Unknown trace format '{fmt}'")
+        with open(path, "w") as fd:
+            json.dump(data, fd)
+
+    # -------------------------------------------------------------------------
+    # Summary
+    # -------------------------------------------------------------------------
+    def summary(self, top: int = 10) -> str:
+        """Table of time per phase and of the slowest devices."""
+        if not self.spans:
+            return "No spans recorded"
+
+        phases: Dict[str, List[float]] = {}
+        devices: Dict[str, List[int]] = {}
+        device_phase: Dict[str, Dict[str, float]] = {}
+        for span in self.spans:
+            phases.setdefault(span.name, []).append(span.duration)
+            if span.device:
+                bounds = devices.setdefault(span.device, [span.start_ns, span.end_ns])
+                bounds[0] = min(bounds[0], span.start_ns)
+                bounds[1] = max(bounds[1], span.end_ns)
+                if span.parent_id is None:
+                    per = device_phase.setdefault(span.device, {})
+                    per[span.name] = per.get(span.name, 0.0) + span.duration
+
+        lines = [
+            f"{'phase':<20}{'count':>7}{'total s':>10}{'mean s':>10}"
+            f"{'p95 s':>10}{'max s':>10}"
+        ]
+        for name, durations in sorted(
+            phases.items(), key=lambda kv: sum(kv[1]), reverse=True
+        ):
+            durations.sort()
+            p95 = durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+            lines.append(
+                f"{name:<20}{len(durations):>7}{sum(durations):>10.3f}"
+                f"{sum(durations) / len(durations):>10.3f}{p95:>10.3f}"
+                f"{durations[-1]:>10.3f}"
+            )
+
+        lines.append("")
+        lines.append(f"{'slowest devices':<24}{'wall s':>10}  slowest phase")
+        ranked = sorted(devices.items(), key=lambda kv: kv[1][1] - kv[1][0], reverse=True)
+        for device, (start, end) in ranked[:top]:
+            per = device_phase.get(device, {})
+            worst = max(per.items(), key=lambda kv: kv[1]) if per else ("-", 0.0)
+            lines.append(
+                f"{device:<24}{(end - start) / 1e9:>10.3f}  "
+                f"{worst[0]} ({worst[1]:.3f}s)"
+            )
+        return "\n".join(lines)
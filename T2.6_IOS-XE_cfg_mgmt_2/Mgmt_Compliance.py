@@ -1,12 +1,16 @@
 from __future__ import annotations
 
+from contextlib import contextmanager
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional
 
+import hashlib
+import logging
 import os
 
 from netmiko import ConnectHandler
-from cli_utils import parse_output
+from utils_cli import parse_output
+from compliance_rules import COMMUNITIES_RULE, USERS_RULE, RuleSet, default_rules
 
 # Default values / policy definitions
 ADMIN_USER = os.environ.get("XE_VAR_USER", "expert")
@@ -22,12 +26,77 @@ AUTHORIZED_USERS: List[str] = [
 # SNMP communities that are always allowed to exist (platform defaults, etc.)
 BUILT_IN_COMMUNITIES: List[str] = ["ILMI"]
 
+USERS_COMMAND = "show running-config aaa username"
+SNMP_COMMAND = "show snmp community"
+
+# Show commands collected by an audit, in one pass over one connection. Every
+# rule is evaluated against the running config, so adding rules does not
+# add round-trips.
+RUNNING_COMMAND = "show running-config"
+AUDIT_COMMANDS: List[str] = [RUNNING_COMMAND]
+
+# Cheap command whose output changes whenever the running config changes
+FINGERPRINT_COMMAND = "show running-config | include ^! Last configuration change"
+
+
+def fingerprint_of(output: str) -> Optional[str]:
+    """Hash of a fingerprint/section output, None if the output is empty."""
+    output = output.strip()
+    if not output:
+        return None
+    return hashlib.sha256(output.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class AuditResult:
+    """
+    Outcome of a single-session compliance audit.
+
+    violations holds the findings of every rule, keyed by rule name, and
+    raw the output of every command in AUDIT_COMMANDS.
+    """
+
+    unauthorized_users: List[str] = field(default_factory=list)
+    unauthorized_communities: List[str] = field(default_factory=list)
+    violations: Dict[str, List[str]] = field(default_factory=dict)
+    raw: Dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def from_violations(
+        cls, violations: Dict[str, List[str]], raw: Optional[Dict[str, str]] = None
+    ) -> "AuditResult":
+        return cls(
+            unauthorized_users=violations.get(USERS_RULE, []),
+            unauthorized_communities=violations.get(COMMUNITIES_RULE, []),
+            violations=violations,
+            raw=raw or {},
+        )
+
+    @property
+    def compliant(self) -> bool:
+        return not self.unauthorized_users and not self.unauthorized_communities
+
+    @property
+    def other_violations(self) -> Dict[str, List[str]]:
+        """Findings of the extra rules, which remediate() does not fix."""
+        return {
+            name: found
+            for name, found in self.violations.items()
+            if found and name not in (USERS_RULE, COMMUNITIES_RULE)
+        }
+
 
 @dataclass
 class Mgmt_Compliance:
     """
     Helper class used by manage_access_compliance.py to keep local
     user and SNMP configuration in compliance with policy.
+
+    Every public method can be called on its own (one SSH session each),
+    or inside ``with mgmt.session():`` so they all share one connection.
+
+    The policy is a compliance_rules.RuleSet: the local user and SNMP rules
+    built from authorized_users and community_string, plus extra_rules.
     """
 
     address: str
@@ -40,6 +109,13 @@ class Mgmt_Compliance:
     authorized_users: Optional[List[str]] = field(
         default_factory=lambda: AUTHORIZED_USERS.copy()
     )
+    extra_rules: Optional[RuleSet] = None
+    _net_connect: Optional[ConnectHandler] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _rules: Optional[RuleSet] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     # -------------------------------------------------------------------------
     # Device connection helper
@@ -47,13 +123,153 @@ class Mgmt_Compliance:
     def connect(self) -> ConnectHandler:
         """
         Create and return a Netmiko ConnectHandler for the device.
+        """
+        return ConnectHandler(
+            device_type="cisco_ios",
+            host=self.address,
+            port=self.port,
+            username=self.username,
+            password=self.password,
+        )
+
+    @contextmanager
+    def session(self) -> Iterator[ConnectHandler]:
+        """
+        Open one connection and reuse it for every call made inside the
+        block. Nested use reuses the already open connection.
+        """
+        if self._net_connect is not None:
+            yield self._net_connect
+            return
+
+        self._net_connect = self.connect()
+        try:
+            yield self._net_connect
+        finally:
+            net_connect, self._net_connect = self._net_connect, None
+            net_connect.disconnect()
 
-        TODO:
-        * Create and return a Netmiko ConnectHandler for interacting
-          with a Cisco IOS XE device using the attributes of this class.
+    def fingerprint(self) -> Optional[str]:
         """
-        # TODO: replace `pass` with a proper ConnectHandler instance
-        pass
+        Fingerprint of the running config, from the last configuration
+        change marker. None when the device does not report one.
+        """
+        with self.session() as net_connect:
+            return fingerprint_of(net_connect.send_command(FINGERPRINT_COMMAND))
+
+    # -------------------------------------------------------------------------
+    # Policy / parsing helpers
+    # -------------------------------------------------------------------------
+    @property
+    def rules(self) -> RuleSet:
+        """Compiled policy, built on first use."""
+        if self._rules is None:
+            rules = default_rules(
+                self.authorized_users or [],
+                self.community_string,
+                BUILT_IN_COMMUNITIES,
+            )
+            if self.extra_rules is not None:
+                rules = rules + self.extra_rules
+            self._rules = rules
+        return self._rules
+
+    def evaluate(self, running_config: str, raw: Optional[Dict[str, str]] = None) -> AuditResult:
+        """Evaluate every rule against a running config in a single pass."""
+        return AuditResult.from_violations(
+            self.rules.evaluate(running_config.splitlines()), raw
+        )
+
+    def unauthorized_users_from(self, local_users_raw: str) -> List[str]:
+        """Usernames in `show running-config aaa username` output not allowed by policy."""
+        return self.evaluate(local_users_raw).unauthorized_users
+
+    def unauthorized_communities_from(self, snmp_raw: str) -> List[str]:
+        """Communities in `show snmp community` output not allowed by policy."""
+        parsed = parse_output(
+            platform="cisco_ios",
+            command=SNMP_COMMAND,
+            data=snmp_raw,
+        )
+
+        rule = self.rules.get(COMMUNITIES_RULE)
+        unauthorized: List[str] = []
+
+        for entry in parsed:
+            # ntc_templates names the column NAME, older templates COMMUNITY
+            community = entry.get("name") or entry.get("community")
+            if community and not rule.allows(community) and community not in unauthorized:
+                unauthorized.append(community)
+
+        return unauthorized
+
+    # -------------------------------------------------------------------------
+    # Single-session audit / remediation
+    # -------------------------------------------------------------------------
+    def audit(self) -> AuditResult:
+        """
+        Run every show command in AUDIT_COMMANDS over one connection and
+        evaluate all rules against the collected running config.
+        """
+        with self.session() as net_connect:
+            raw = {cmd: net_connect.send_command(cmd) for cmd in AUDIT_COMMANDS}
+
+        return self.evaluate(raw[RUNNING_COMMAND], raw)
+
+    def user_commands(
+        self, unauthorized_users: List[str], admin_password: Optional[str] = None
+    ) -> List[str]:
+        """Config lines removing unauthorized users and setting the admin secret."""
+        config_cmds = [f"no username {user}" for user in unauthorized_users]
+        if self.local_admin_user:
+            config_cmds.append(
+                f"username {self.local_admin_user} privilege 15 secret "
+                f"{admin_password or self.password}"
+            )
+        return config_cmds
+
+    def snmp_commands(self, unauthorized_communities: List[str]) -> List[str]:
+        """Config lines removing stray communities and setting the compliant one."""
+        config_cmds = [
+            f"no snmp-server community {community}"
+            for community in unauthorized_communities
+        ]
+        config_cmds.append(
+            f"snmp-server community {self.community_string} RO {self.mgmt_list_name}"
+        )
+        return config_cmds
+
+    def _push(self, config_cmds: List[str]) -> bool:
+        """Push and save config_cmds; False if the config could not be saved."""
+        with self.session() as net_connect:
+            net_connect.send_config_set(config_cmds)
+            try:
+                net_connect.save_config()
+            except Exception:
+                # The change is in the running config only and is lost on
+                # reload, so it does not count as remediated
+                logging.exception(f"{self.address}: config pushed but not saved")
+                return False
+        return True
+
+    def remediate(
+        self,
+        result: Optional[AuditResult] = None,
+        admin_password: Optional[str] = None,
+    ) -> bool:
+        """
+        Push every user and SNMP fix in one send_config_set and save once.
+
+        result is the audit to remediate; a fresh audit is run (on the same
+        connection) when it is not supplied.
+        """
+        with self.session():
+            if result is None:
+                result = self.audit()
+            config_cmds = self.user_commands(
+                result.unauthorized_users, admin_password
+            ) + self.snmp_commands(result.unauthorized_communities)
+            return self._push(config_cmds)
 
     # -------------------------------------------------------------------------
     # Local user helpers
@@ -66,31 +282,9 @@ class Mgmt_Compliance:
         A user is considered unauthorized if their username is not present
         in self.authorized_users.
         """
-        # Connect to the device
-        net_connect = self.connect()
-
-        # TODO: Use the Netmiko ConnectHandler to get the current list of
-        #       local users on the device.
-        #       Use the command
-        #           show running-config aaa username
-        #       to pull the current user list.
-        #
-        # Example:
-        #   local_users_raw = net_connect.send_command("show running-config aaa username")
-        local_users_raw = ""
-
-        # Disconnect from the device
-        net_connect.disconnect()
-
-        # TODO: Iterate through the list of local users and extract all
-        #       usernames that are *not* in self.authorized_users.
-        #
-        # The function must return a list of unauthorized usernames.
-        unauthorized: List[str] = []
-
-        # TODO: populate the `unauthorized` list based on `local_users_raw`
-
-        return unauthorized
+        with self.session() as net_connect:
+            local_users_raw = net_connect.send_command(USERS_COMMAND)
+        return self.unauthorized_users_from(local_users_raw)
 
     # -------------------------------------------------------------------------
     # SNMP helpers
@@ -104,32 +298,9 @@ class Mgmt_Compliance:
         - the desired management community (self.community_string), or
         - included in BUILT_IN_COMMUNITIES.
         """
-        # TODO: connect to the device
-        net_connect = self.connect()
-
-        # TODO: Pull the current SNMP community configuration from the device.
-        #       Use a command that is supported by NTC templates, for example:
-        #           show snmp community
-        snmp_raw = ""
-
-        # TODO: disconnect from the device
-        net_connect.disconnect()
-
-        # TODO: Parse the output using TextFSM / NTC templates via cli_utils.parse_output.
-        # Example:
-        #   parsed = parse_output(
-        #       platform="cisco_ios",
-        #       command="show snmp community",
-        #       data=snmp_raw,
-        #   )
-        parsed: List[dict] = []
-
-        # TODO: Build and return a list of SNMP community strings that are
-        #       not compliant (i.e., not self.community_string and not in
-        #       BUILT_IN_COMMUNITIES).
-        unauthorized: List[str] = []
-
-        return unauthorized
+        with self.session() as net_connect:
+            snmp_raw = net_connect.send_command(SNMP_COMMAND)
+        return self.unauthorized_communities_from(snmp_raw)
 
     # -------------------------------------------------------------------------
     # Configuration update helpers
@@ -139,13 +310,10 @@ class Mgmt_Compliance:
         Ensure the local admin user exists with the configured password and
         remove any unauthorized local users.
 
-        TODO:
-        * Use a ConnectHandler instance to remove unauthorized users
-          and (re)configure the local admin user with the supplied password.
-        * Return True once the configuration has been pushed.
+        Returns True once the configuration has been pushed and saved.
         """
-        # TODO: Implement configuration logic
-        return False
+        with self.session():
+            return self._push(self.user_commands(self.current_unauthorized_users()))
 
     def update_snmp_community(self) -> bool:
         """
@@ -153,13 +321,10 @@ class Mgmt_Compliance:
         self.community_string exists and that it is tied to the correct
         ACL (self.mgmt_list_name).
 
-        Any other SNMP communities (except the built-ins) should be removed.
-
-        TODO:
-        * Use a ConnectHandler instance and the results of
-          current_unauthorized_communities() to remove non-compliant
-          communities and configure the desired one.
-        * Return True once the configuration has been pushed.
+        Any other SNMP communities (except the built-ins) are removed.
+        Returns True once the configuration has been pushed and saved.
         """
-        # TODO: Implement configuration logic
-        return False
+        with self.session():
+            return self._push(
+                self.snmp_commands(self.current_unauthorized_communities())
+            )
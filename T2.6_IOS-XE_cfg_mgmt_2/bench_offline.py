@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+
+"""
+Benchmark offline compliance evaluation of saved running configs.
+
+Writes synthetic running configs (a few hundred lines each, some with
+unauthorized users and communities) and evaluates them with
+OfflineAuditor in a single process and on a process pool.
+
+Example:
+    ./bench_offline.py --files 20000 --lines 400
+"""
+
+import os
+import time
+import shutil
+import argparse
+import tempfile
+
+from compliance_offline import OfflineAuditor
+from compliance_rules import RuleSet
+
+COMMUNITY = "pmm_noc#"
+
+EXTRA_RULES = RuleSet.from_specs(
+    [
+        {"name": "ntp-servers", "type": "required", "prefix": "ntp server 10.0.0.1"},
+        {"name": "no-http-server", "type": "forbidden", "prefix": "ip http server"},
+        {"name": "vty-acl", "type": "required", "regex": r"^ access-class MGMT_ACCESS in"},
+        {"name": "aaa", "type": "required", "prefix": "aaa new-model"},
+    ]
+)
+
+
+def running_config(idx, lines):
+    """Synthetic IOS XE running config for one device."""
+    out = [
+        "!",
+        f"! Last configuration change at 10:{idx % 60:02d}:00 UTC by expert",
+        "!",
+        "version 17.9",
+        f"hostname rtr-bench-{idx:05d}",
+        "aaa new-model",
+        "username expert privilege 15 secret 9 $9$abcdefghijkl",
+    ]
+    if idx % 10 == 0:
+        out.append(f"username intruder{idx} privilege 15 secret 9 $9$xyz")
+    out.append(f"snmp-server community {COMMUNITY} RO MGMT_ACCESS")
+    if idx % 7 == 0:
+        out.append("snmp-server community public RO")
+    if idx % 13 == 0:
+        out.append("ip http server")
+    out.append("ntp server 10.0.0.1")
+    n = 0
+    while len(out) < lines - 4:
+        out.extend(
+            [
+                f"interface GigabitEthernet1/0/{n}",
+                f" description access port {n}",
+                " switchport mode access",
+                f" switchport access vlan {100 + n % 50}",
+                "!",
+            ]
+        )
+        n += 1
+    out.extend(["line vty 0 4", " access-class MGMT_ACCESS in", " transport input ssh", "end"])
+    return "\n".join(out) + "\n"
+
+
+def write_configs(directory, count, lines):
+    size = 0
+    for idx in range(count):
+        sub = os.path.join(directory, f"site{idx % 16:02d}")
+        os.makedirs(sub, exist_ok=True)
+        text = running_config(idx, lines)
+        with open(os.path.join(sub, f"rtr-bench-{idx:05d}.cfg"), "w") as fd:
+            fd.write(text)
+        size += len(text)
+    return size
+
+
+def timed(label, count, size, func):
+    start = time.perf_counter()
+    report = func()
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:<28}{elapsed:>10.3f}{count / elapsed:>12.0f}"
+        f"{size / elapsed / 1e6:>10.1f}"
+    )
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--files", type=int, default=20000)
+    parser.add_argument("--lines", type=int, default=400)
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="offline-bench-")
+    try:
+        size = write_configs(workdir, args.files, args.lines)
+        defaults = dict(community_string=COMMUNITY, extra_rules=EXTRA_RULES)
+
+        print(f"{args.files} configs, {size / 1e6:.1f} MB")
+        print(f"{'mode':<28}{'seconds':>10}{'files/s':>12}{'MB/s':>10}")
+
+        single = timed(
+            "1 process",
+            args.files,
+            size,
+            lambda: OfflineAuditor(defaults, processes=1).run(workdir),
+        )
+        pooled_auditor = OfflineAuditor(defaults, processes=args.processes)
+        pooled = timed(
+            f"{pooled_auditor.processes} processes",
+            args.files,
+            size,
+            lambda: pooled_auditor.run(workdir),
+        )
+
+        if [d.as_dict()["status"] for d in single.devices] != [
+            d.as_dict()["status"] for d in pooled.devices
+        ]:
+            raise SystemExit("Results differ between modes")
+        print(single.summary())
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+
+"""
+Benchmark TextFSM parsing of compliance show commands.
+
+Compares the original wrapper (ntc_templates.parse.parse_output, index
+lookup and template compile on every call) with the cached parse_output
+and with the process-pool parse_many bulk mode.
+
+Example:
+    ./bench_parse.py --outputs 20000
+"""
+
+import time
+import argparse
+
+from utils_cli import parse_many, parse_output, parse_output_uncached
+
+PLATFORM = "cisco_ios"
+COMMAND = "show snmp community"
+
+
+def snmp_output(idx, communities=4):
+    """Synthetic `show snmp community` output for one device."""
+    blocks = []
+    for n in range(communities):
+        name = "ILMI" if n == 0 else f"comm-{idx}-{n}"
+        blocks.append(
+            f"Community name: {name}\n"
+            f"Community Index: cisco{n}\n"
+            f"Community SecurityName: {name}\n"
+            "storage-type: read-only\t active\n"
+        )
+    return "\n\n".join(blocks) + "\n"
+
+
+def timed(label, count, func):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28}{elapsed:>10.3f}{count / elapsed:>14.0f}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--outputs", type=int, default=20000)
+    parser.add_argument(
+        "--legacy-sample",
+        type=int,
+        default=500,
+        help="outputs parsed with the original wrapper (it is slow)",
+    )
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args()
+
+    outputs = [snmp_output(idx) for idx in range(args.outputs)]
+    sample = outputs[: args.legacy_sample]
+    jobs = [(PLATFORM, COMMAND, data) for data in outputs]
+
+    print(f"{args.outputs} '{COMMAND}' outputs")
+    print(f"{'mode':<28}{'seconds':>10}{'parses/s':>14}")
+
+    legacy = timed(
+        f"ntc parse_output x{len(sample)}",
+        len(sample),
+        lambda: [parse_output_uncached(PLATFORM, COMMAND, d) for d in sample],
+    )
+    cached = timed(
+        "cached parse_output",
+        len(outputs),
+        lambda: [parse_output(PLATFORM, COMMAND, d) for d in outputs],
+    )
+    bulk = timed(
+        "parse_many (processes)",
+        len(outputs),
+        lambda: parse_many(jobs, processes=args.processes),
+    )
+
+    if legacy != cached[: len(legacy)] or cached != bulk:
+        raise SystemExit("Parsed results differ between modes")
+
+
+if __name__ == "__main__":
+    main()
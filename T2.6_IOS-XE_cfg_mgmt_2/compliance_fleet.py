@@ -0,0 +1,272 @@
+"""
+Fleet-wide management compliance scanning.
+
+Every device in an inventory is audited with Mgmt_Compliance (one SSH
+session per device) from a bounded thread pool, and the results are
+aggregated into a JSON or CSV compliance report. Optionally the
+non-compliant devices are remediated in the same session, without any
+prompt.
+
+Inventory files are a YAML list of mappings or a CSV file with a header
+row. Only "host" is required; "hostname", "port", "username", "password"
+and "community_string" override the fleet defaults per device.
+
+    - hostname: rtr-edge-01
+      host: 10.0.0.1
+    - hostname: rtr-edge-02
+      host: 10.0.0.2
+      port: 2222
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+import yaml
+
+from Mgmt_Compliance import AuditResult, Mgmt_Compliance
+from compliance_state import FingerprintStore
+
+# Default number of devices audited at the same time
+MAX_WORKERS = 32
+
+# Columns of the CSV report, list values are joined with LIST_SEPARATOR
+REPORT_FIELDS = [
+    "hostname",
+    "host",
+    "status",
+    "unauthorized_users",
+    "unauthorized_communities",
+    "violations",
+    "remediated",
+    "cached",
+    "error",
+    "duration",
+]
+LIST_SEPARATOR = ";"
+
+
+# -----------------------------------------------------------------------------
+# Inventory
+# -----------------------------------------------------------------------------
+def load_inventory(path: str) -> List[Dict[str, Any]]:
+    """Read devices from a YAML list or a CSV file."""
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, newline="", encoding="utf-8") as fd:
+        if ext == ".csv":
+            devices = [
+                {k: v for k, v in row.items() if k and v not in (None, "")}
+                for row in csv.DictReader(fd)
+            ]
+        elif ext in (".yaml", ".yml"):
+            devices = yaml.safe_load(fd) or []
+        else:
+            raise ValueError(f"Unsupported inventory format: {path}")
+
+    for count, device in enumerate(devices, start=1):
+        if "host" not in device:
+            raise ValueError(f"{path}: inventory entry {count} has no host")
+        device.setdefault("hostname", device["host"])
+    return devices
+
+
+# -----------------------------------------------------------------------------
+# Results
+# -----------------------------------------------------------------------------
+@dataclass
+class DeviceCompliance:
+    """Audit (and remediation) outcome for one device."""
+
+    hostname: str
+    host: str
+    unauthorized_users: List[str] = field(default_factory=list)
+    unauthorized_communities: List[str] = field(default_factory=list)
+    # Findings of the extra rules, keyed by rule name
+    violations: Dict[str, List[str]] = field(default_factory=dict)
+    remediated: bool = False
+    # Findings reused from the last full audit, the config was unchanged
+    cached: bool = False
+    error: Optional[str] = None
+    duration: float = 0.0
+
+    @property
+    def status(self) -> str:
+        if self.error:
+            return "error"
+        if self.violations:
+            return "non-compliant"
+        if self.remediated:
+            return "remediated"
+        if self.unauthorized_users or self.unauthorized_communities:
+            return "non-compliant"
+        return "compliant"
+
+    def update(self, audit: AuditResult) -> None:
+        self.unauthorized_users = audit.unauthorized_users
+        self.unauthorized_communities = audit.unauthorized_communities
+        self.violations = audit.other_violations
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["status"] = self.status
+        data["duration"] = round(self.duration, 3)
+        return data
+
+
+@dataclass
+class FleetReport:
+    """Aggregated compliance results, in inventory order."""
+
+    devices: List[DeviceCompliance] = field(default_factory=list)
+    started: float = field(default_factory=time.time)
+    duration: float = 0.0
+
+    def counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for device in self.devices:
+            counts[device.status] = counts.get(device.status, 0) + 1
+        return counts
+
+    def summary(self) -> str:
+        counts = ", ".join(f"{v} {k}" for k, v in sorted(self.counts().items()))
+        text = f"{len(self.devices)} devices in {self.duration:.1f}s: {counts or 'none'}"
+        cached = sum(1 for device in self.devices if device.cached)
+        if cached:
+            text += f" ({cached} unchanged since the last full audit)"
+        return text
+
+    def write_json(self, path: str) -> None:
+        data = {
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(self.started)),
+            "duration": round(self.duration, 3),
+            "summary": self.counts(),
+            "devices": [device.as_dict() for device in self.devices],
+        }
+        with open(path, "w") as fd:
+            json.dump(data, fd, indent=2)
+
+    def write_csv(self, path: str) -> None:
+        with open(path, "w", newline="") as fd:
+            writer = csv.DictWriter(fd, fieldnames=REPORT_FIELDS)
+            writer.writeheader()
+            for device in self.devices:
+                row = device.as_dict()
+                for key in ("unauthorized_users", "unauthorized_communities"):
+                    row[key] = LIST_SEPARATOR.join(row[key])
+                row["violations"] = LIST_SEPARATOR.join(
+                    f"{rule}:{found}"
+                    for rule, items in row["violations"].items()
+                    for found in items
+                )
+                writer.writerow({k: row[k] for k in REPORT_FIELDS})
+
+    def write(self, path: str) -> None:
+        """Write the report, the format is picked from the extension."""
+        if path.lower().endswith(".csv"):
+            self.write_csv(path)
+        else:
+            self.write_json(path)
+
+
+# -----------------------------------------------------------------------------
+# Scanner
+# -----------------------------------------------------------------------------
+class FleetAuditor(object):
+    """
+    Audit many devices concurrently, with at most max_workers SSH sessions
+    open at a time.
+
+    defaults: Mgmt_Compliance arguments used when a device does not set them
+    remediate: fix non-compliant devices in the audit session
+    admin_password: secret pushed for the local admin user on remediation
+    store: optional FingerprintStore, devices whose config fingerprint is
+        unchanged are not audited again
+    """
+
+    def __init__(
+        self,
+        defaults: Dict[str, Any],
+        max_workers: int = MAX_WORKERS,
+        remediate: bool = False,
+        admin_password: Optional[str] = None,
+        factory: Callable[..., Mgmt_Compliance] = Mgmt_Compliance,
+        store: Optional[FingerprintStore] = None,
+    ) -> None:
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.defaults = defaults
+        self.max_workers = max_workers
+        self.remediate = remediate
+        self.admin_password = admin_password
+        self.factory = factory
+        self.store = store
+
+    def build(self, device: Dict[str, Any]) -> Mgmt_Compliance:
+        params = dict(self.defaults)
+        for key in ("port", "username", "password", "community_string"):
+            if key in device:
+                params[key] = device[key]
+        params["address"] = device["host"]
+        params["port"] = int(params.get("port", 22))
+        return self.factory(**params)
+
+    def _audit(self, mgmt: Mgmt_Compliance, result: DeviceCompliance) -> None:
+        fingerprint = mgmt.fingerprint() if self.store else None
+        policy = mgmt.rules.digest
+        entry = self.store.lookup(result.hostname, fingerprint, policy) if self.store else None
+        if entry is not None:
+            cached = AuditResult.from_violations(entry["violations"])
+            result.cached = True
+            result.update(cached)
+            if not self.remediate or cached.compliant:
+                return
+
+        # Changed, unknown, or non-compliant and due for remediation
+        result.cached = False
+        audit = mgmt.audit()
+        result.update(audit)
+        if self.remediate and not audit.compliant:
+            result.remediated = mgmt.remediate(audit, admin_password=self.admin_password)
+            if not result.remediated:
+                result.error = "remediation pushed but the config could not be saved"
+
+        if self.store is None:
+            return
+        if result.remediated or result.error:
+            # The config changed, the next run audits the device again
+            self.store.forget(result.hostname)
+        else:
+            self.store.record(result.hostname, fingerprint, audit.violations, policy)
+
+    def audit_device(self, device: Dict[str, Any]) -> DeviceCompliance:
+        result = DeviceCompliance(hostname=device["hostname"], host=device["host"])
+        start = time.perf_counter()
+        try:
+            mgmt = self.build(device)
+            with mgmt.session():
+                self._audit(mgmt, result)
+        except Exception as exc:
+            logging.debug(f"{device['hostname']}: audit failed", exc_info=True)
+            result.error = f"{type(exc).__name__}: {exc}"
+        result.duration = time.perf_counter() - start
+        logging.info(f"{result.hostname}: {result.status}")
+        return result
+
+    def iter_results(self, devices: Iterable[Dict[str, Any]]) -> Iterator[DeviceCompliance]:
+        """Yield results in inventory order as the pool works through devices."""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            yield from pool.map(self.audit_device, devices)
+
+    def run(self, devices: Iterable[Dict[str, Any]]) -> FleetReport:
+        report = FleetReport()
+        start = time.perf_counter()
+        report.devices.extend(self.iter_results(devices))
+        report.duration = time.perf_counter() - start
+        return report
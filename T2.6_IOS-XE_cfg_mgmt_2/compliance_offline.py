@@ -0,0 +1,149 @@
+"""
+Offline compliance evaluation of saved running configs.
+
+The same rules as a live audit (Mgmt_Compliance.rules) are evaluated
+against config backups, without any SSH session, and the results are
+collected into the same FleetReport as fleet scans. The hostname is the
+file name without its extension.
+
+Files are discovered lazily and streamed line by line through the rule
+engine. Batches of files are spread over a process pool, with a bounded
+number of batches in flight, so memory use does not grow with the number
+of files.
+
+    auditor = OfflineAuditor(dict(community_string="pmm_noc#"))
+    report = auditor.run("backups/")
+    report.write("compliance-report.json")
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional
+
+from Mgmt_Compliance import AuditResult, Mgmt_Compliance
+from compliance_fleet import DeviceCompliance, FleetReport
+
+# Files evaluated per worker task
+BATCH_SIZE = 64
+
+# Batches queued per worker process
+BATCHES_IN_FLIGHT = 4
+
+CONFIG_PATTERNS = ("*.cfg", "*.conf", "*.txt")
+
+
+def iter_config_files(directory: str, patterns: Iterable[str] = CONFIG_PATTERNS) -> Iterator[str]:
+    """Yield config file paths below directory, sorted per directory."""
+    patterns = tuple(patterns)
+    stack = [directory]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            entries = sorted(entries, key=lambda e: e.name)
+        subdirs = []
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif any(fnmatch.fnmatch(entry.name, p) for p in patterns):
+                yield entry.path
+        stack.extend(reversed(subdirs))
+
+
+def hostname_of(path: str) -> str:
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+# -----------------------------------------------------------------------------
+# Worker side
+# -----------------------------------------------------------------------------
+_evaluator: Optional[Mgmt_Compliance] = None
+
+
+def _init_worker(params: Dict[str, Any]) -> None:
+    global _evaluator
+    _evaluator = Mgmt_Compliance(**params)
+
+
+def evaluate_file(mgmt: Mgmt_Compliance, path: str) -> DeviceCompliance:
+    """Evaluate one running config file against mgmt's rules."""
+    result = DeviceCompliance(hostname=hostname_of(path), host=path)
+    start = time.perf_counter()
+    try:
+        with open(path, encoding="utf-8", errors="replace") as fd:
+            result.update(AuditResult.from_violations(mgmt.rules.evaluate(fd)))
+    except OSError as exc:
+        result.error = f"{type(exc).__name__}: {exc}"
+    result.duration = time.perf_counter() - start
+    return result
+
+
+def _evaluate_batch(paths: List[str]) -> List[DeviceCompliance]:
+    return [evaluate_file(_evaluator, path) for path in paths]
+
+
+# -----------------------------------------------------------------------------
+# Driver
+# -----------------------------------------------------------------------------
+class OfflineAuditor(object):
+    """
+    Evaluate saved running configs in parallel.
+
+    defaults: Mgmt_Compliance arguments, community_string is required
+    processes: worker processes, 1 evaluates in the calling process
+    """
+
+    def __init__(
+        self,
+        defaults: Dict[str, Any],
+        processes: Optional[int] = None,
+        batch_size: int = BATCH_SIZE,
+    ) -> None:
+        self.params = dict(address="", port=0, username="", password="")
+        self.params.update(defaults)
+        self.processes = processes or os.cpu_count() or 1
+        self.batch_size = batch_size
+
+    def _batches(self, paths: Iterable[str]) -> Iterator[List[str]]:
+        paths = iter(paths)
+        while True:
+            batch = list(islice(paths, self.batch_size))
+            if not batch:
+                return
+            yield batch
+
+    def _pooled(self, pool: Executor, paths: Iterable[str]) -> Iterator[DeviceCompliance]:
+        window = self.processes * BATCHES_IN_FLIGHT
+        pending: Deque[Future] = deque()
+        for batch in self._batches(paths):
+            pending.append(pool.submit(_evaluate_batch, batch))
+            if len(pending) >= window:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+    def iter_results(self, paths: Iterable[str]) -> Iterator[DeviceCompliance]:
+        """Yield one result per path, in input order."""
+        if self.processes == 1:
+            mgmt = Mgmt_Compliance(**self.params)
+            for path in paths:
+                yield evaluate_file(mgmt, path)
+            return
+
+        with ProcessPoolExecutor(
+            max_workers=self.processes,
+            initializer=_init_worker,
+            initargs=(self.params,),
+        ) as pool:
+            yield from self._pooled(pool, paths)
+
+    def run(self, directory: str, patterns: Iterable[str] = CONFIG_PATTERNS) -> FleetReport:
+        report = FleetReport()
+        start = time.perf_counter()
+        report.devices.extend(self.iter_results(iter_config_files(directory, patterns)))
+        report.duration = time.perf_counter() - start
+        return report
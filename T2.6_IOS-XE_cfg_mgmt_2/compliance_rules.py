@@ -0,0 +1,223 @@
+"""
+Declarative compliance rules evaluated against a running config.
+
+Rules are plain mappings (usually loaded from YAML):
+
+    - name: authorized-users
+      type: allowed                 # every matching line must use an allowed value
+      prefix: username
+      allowed: [expert, admin_auto]
+      allowed_regex: ["^svc_"]
+    - name: ntp-servers
+      type: required                # at least one line must match
+      prefix: ntp server 10.0.0.1
+    - name: no-http-server
+      type: forbidden               # no line may match
+      prefix: ip http server
+    - name: vty-acl
+      type: required
+      regex: "^ access-class MGMT_ACCESS in"
+
+A RuleSet walks the config once. Prefix rules are found with a dict lookup
+on the leading words of each line, and values are checked against a set
+(plus one combined regex for allowed_regex). Regex rules share one combined
+pre-filter, so a line that matches none of them is rejected with a single
+search.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import yaml
+
+RULE_TYPES = ("allowed", "required", "forbidden")
+
+# Names of the rules built by default_rules()
+USERS_RULE = "authorized-users"
+COMMUNITIES_RULE = "snmp-communities"
+
+
+def _combine(patterns: Sequence[str]) -> Optional["re.Pattern[str]"]:
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{p})" for p in patterns))
+
+
+class Rule(object):
+    """One compiled rule, see the module docstring for the fields."""
+
+    __slots__ = ("name", "type", "prefix", "regex", "allowed", "allowed_regex")
+
+    def __init__(
+        self,
+        name: str,
+        type: str,
+        prefix: Optional[str] = None,
+        regex: Optional[str] = None,
+        allowed: Iterable[str] = (),
+        allowed_regex: Sequence[str] = (),
+    ) -> None:
+        if type not in RULE_TYPES:
+            raise ValueError(f"Rule '{name}': unknown type '{type}'")
+        if bool(prefix) == bool(regex):
+            raise ValueError(f"Rule '{name}': set exactly one of prefix or regex")
+        if type == "allowed" and not prefix:
+            raise ValueError(f"Rule '{name}': allowed rules need a prefix")
+
+        self.name = name
+        self.type = type
+        self.prefix: Tuple[str, ...] = tuple(prefix.split()) if prefix else ()
+        self.regex = re.compile(regex) if regex else None
+        self.allowed = frozenset(allowed)
+        self.allowed_regex = _combine(list(allowed_regex))
+
+    @classmethod
+    def from_spec(cls, spec: Dict[str, Any]) -> "Rule":
+        unknown = set(spec) - {"name", "type", "prefix", "regex", "allowed", "allowed_regex"}
+        if unknown:
+            raise ValueError(f"Rule '{spec.get('name')}': unknown keys {sorted(unknown)}")
+        return cls(**spec)
+
+    def allows(self, value: str) -> bool:
+        return value in self.allowed or bool(
+            self.allowed_regex and self.allowed_regex.match(value)
+        )
+
+    def describe(self) -> str:
+        return " ".join(self.prefix) if self.prefix else self.regex.pattern
+
+    def spec(self) -> Dict[str, Any]:
+        spec: Dict[str, Any] = {"name": self.name, "type": self.type}
+        if self.prefix:
+            spec["prefix"] = " ".join(self.prefix)
+        if self.regex is not None:
+            spec["regex"] = self.regex.pattern
+        if self.allowed:
+            spec["allowed"] = sorted(self.allowed)
+        if self.allowed_regex is not None:
+            spec["allowed_regex"] = [self.allowed_regex.pattern]
+        return spec
+
+
+class RuleSet(object):
+    """Rules indexed for a single pass over the config lines."""
+
+    def __init__(self, rules: Iterable[Rule]) -> None:
+        self.rules: List[Rule] = list(rules)
+        names = [rule.name for rule in self.rules]
+        if len(set(names)) != len(names):
+            raise ValueError("Rule names must be unique")
+
+        self._by_prefix: Dict[Tuple[str, ...], List[Rule]] = {}
+        for rule in self.rules:
+            if rule.prefix:
+                self._by_prefix.setdefault(rule.prefix, []).append(rule)
+        self._prefix_lengths = sorted({len(prefix) for prefix in self._by_prefix})
+        self._first_words = frozenset(prefix[0] for prefix in self._by_prefix)
+        # Words needed to read the longest prefix and the value after it,
+        # the rest of the line is left unsplit
+        self._max_split = max(self._prefix_lengths, default=0) + 1
+
+        self._regex_rules = [rule for rule in self.rules if rule.regex is not None]
+        self._prefilter = _combine([rule.regex.pattern for rule in self._regex_rules])
+
+    @classmethod
+    def from_specs(cls, specs: Iterable[Dict[str, Any]]) -> "RuleSet":
+        return cls(Rule.from_spec(spec) for spec in specs)
+
+    def __add__(self, other: "RuleSet") -> "RuleSet":
+        return RuleSet(self.rules + other.rules)
+
+    @property
+    def digest(self) -> str:
+        """Identifies the policy, stored findings are only valid for it."""
+        specs = json.dumps([rule.spec() for rule in self.rules], sort_keys=True)
+        return hashlib.sha256(specs.encode("utf-8")).hexdigest()
+
+    def get(self, name: str) -> Optional[Rule]:
+        for rule in self.rules:
+            if rule.name == name:
+                return rule
+        return None
+
+    def evaluate(self, lines: Iterable[str]) -> Dict[str, List[str]]:
+        """
+        Return the violations of every rule, keyed by rule name.
+
+        allowed: the values that are not allowed
+        forbidden: the offending lines
+        required: one "missing: ..." entry when no line matched
+        """
+        violations: Dict[str, List[str]] = {rule.name: [] for rule in self.rules}
+        reported: Dict[str, set] = {rule.name: set() for rule in self.rules}
+        matched = set()
+        by_prefix = self._by_prefix
+        lengths = self._prefix_lengths
+        first_words = self._first_words
+        max_split = self._max_split
+        prefilter = self._prefilter
+
+        def hit(rule: Rule, line: str, value: Optional[str]) -> None:
+            if rule.type == "required":
+                matched.add(rule.name)
+                return
+            found = line.strip() if rule.type == "forbidden" else value
+            if found is None or (rule.type == "allowed" and rule.allows(found)):
+                return
+            if found not in reported[rule.name]:
+                reported[rule.name].add(found)
+                violations[rule.name].append(found)
+
+        for line in lines:
+            words = line.split(None, max_split)
+            if not words or words[0].startswith("!"):
+                continue
+
+            if words[0] in first_words:
+                for length in lengths:
+                    if length > len(words):
+                        break
+                    for rule in by_prefix.get(tuple(words[:length]), ()):
+                        hit(rule, line, words[length] if length < len(words) else None)
+
+            if prefilter is not None and prefilter.search(line):
+                for rule in self._regex_rules:
+                    if rule.regex.search(line):
+                        hit(rule, line, None)
+
+        for rule in self.rules:
+            if rule.type == "required" and rule.name not in matched:
+                violations[rule.name].append(f"missing: {rule.describe()}")
+        return violations
+
+
+def default_rules(
+    authorized_users: Iterable[str],
+    community_string: str,
+    built_in_communities: Iterable[str] = (),
+) -> RuleSet:
+    """The local user and SNMP community policy of Mgmt_Compliance."""
+    return RuleSet(
+        [
+            Rule(USERS_RULE, "allowed", prefix="username", allowed=authorized_users),
+            Rule(
+                COMMUNITIES_RULE,
+                "allowed",
+                prefix="snmp-server community",
+                allowed=[community_string, *built_in_communities],
+            ),
+        ]
+    )
+
+
+def load_rules(path: str) -> RuleSet:
+    """Load rule specs from a YAML file holding a list of rules."""
+    with open(path) as fd:
+        specs = yaml.safe_load(fd) or []
+    if not isinstance(specs, list):
+        raise ValueError(f"{path}: expected a list of rules")
+    return RuleSet.from_specs(specs)
@@ -0,0 +1,82 @@
+"""
+Per-device compliance state for incremental fleet scans.
+
+After a full audit the device's config fingerprint (see
+Mgmt_Compliance.fingerprint) is stored with the audit findings and the
+digest of the rules that produced them. On the next run the fingerprint is
+fetched with one cheap command; if it and the rules are unchanged and the
+entry is younger than ttl, the stored findings are reused and the full
+audit is skipped.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+STATE_FILE = ".compliance-state.json"
+
+# Full audit at least once a day even if the fingerprint does not change
+STATE_TTL = 86400
+
+
+class FingerprintStore(object):
+    """Fingerprint and findings of the last full audit, per hostname."""
+
+    def __init__(self, path: str = STATE_FILE, ttl: float = STATE_TTL) -> None:
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        try:
+            with open(path) as fd:
+                self.entries: Dict[str, Dict[str, Any]] = json.load(fd)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def lookup(
+        self, hostname: str, fingerprint: Optional[str], policy: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Stored entry if fingerprint and policy match within ttl, else None."""
+        if self.ttl <= 0 or fingerprint is None:
+            return None
+        entry = self.entries.get(hostname)
+        if (
+            entry is None
+            or entry["fingerprint"] != fingerprint
+            or entry.get("policy") != policy
+            or time.time() - entry["audited"] >= self.ttl
+        ):
+            return None
+        return entry
+
+    def record(
+        self,
+        hostname: str,
+        fingerprint: Optional[str],
+        violations: Dict[str, List[str]],
+        policy: Optional[str] = None,
+    ) -> None:
+        if fingerprint is None:
+            self.forget(hostname)
+            return
+        with self._lock:
+            self.entries[hostname] = {
+                "fingerprint": fingerprint,
+                "policy": policy,
+                "audited": time.time(),
+                "violations": violations,
+            }
+
+    def forget(self, hostname: str) -> None:
+        with self._lock:
+            self.entries.pop(hostname, None)
+
+    def save(self) -> None:
+        tmp = f"{self.path}.tmp"
+        with self._lock:
+            with open(tmp, "w") as fd:
+                json.dump(self.entries, fd, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
@@ -7,6 +7,20 @@ Driver script that uses the Mgmt_Compliance class to:
 * Update the local admin password.
 * Enforce a single SNMP community protected by the management ACL.
 
+Set COMPLIANCE_INVENTORY to a YAML/CSV inventory to audit a whole fleet
+instead of ROUTER_ADDRESS (see compliance_fleet.py). Fleet mode never
+prompts: it writes COMPLIANCE_REPORT (JSON, or CSV by extension) and only
+remediates when COMPLIANCE_REMEDIATE=1. Devices whose config fingerprint
+is unchanged since the last full audit (COMPLIANCE_STATE) are skipped;
+COMPLIANCE_STATE_TTL=0 forces a full audit of every device.
+
+Set COMPLIANCE_CONFIG_DIR to a directory of saved running configs to
+evaluate them offline, without SSH (see compliance_offline.py); the report
+has the same format as a fleet scan.
+
+COMPLIANCE_RULES may point to a YAML file of extra rules (NTP, AAA, ACLs,
+see compliance_rules.py); they are reported but not remediated.
+
 This file is intended to be "pre-configured" for the lab – you should
 NOT need to modify it when completing the task. All logic that students
 are expected to change lives in Mgmt_Compliance.py.
@@ -16,6 +30,10 @@ import os
 import sys
 
 from Mgmt_Compliance import Mgmt_Compliance
+from compliance_fleet import MAX_WORKERS, FleetAuditor, load_inventory
+from compliance_state import STATE_FILE, STATE_TTL, FingerprintStore
+from compliance_rules import load_rules
+from compliance_offline import OfflineAuditor
 
 # ---------------------------------------------------------------------------
 # Environment / defaults
@@ -27,6 +45,21 @@ ROUTER_PORT = int(os.environ.get("ROUTER_PORT", "22"))
 USERNAME = os.environ.get("XE_VAR_USER")
 PASSWORD = os.environ.get("XE_VAR_PASS")
 
+# Fleet mode
+INVENTORY = os.environ.get("COMPLIANCE_INVENTORY")
+REPORT = os.environ.get("COMPLIANCE_REPORT", "compliance-report.json")
+WORKERS = int(os.environ.get("COMPLIANCE_WORKERS", MAX_WORKERS))
+REMEDIATE = os.environ.get("COMPLIANCE_REMEDIATE", "0").lower() in ("1", "true", "yes")
+STATE = os.environ.get("COMPLIANCE_STATE", STATE_FILE)
+STATE_MAX_AGE = float(os.environ.get("COMPLIANCE_STATE_TTL", STATE_TTL))
+
+# Offline mode
+CONFIG_DIR = os.environ.get("COMPLIANCE_CONFIG_DIR")
+PROCESSES = int(os.environ.get("COMPLIANCE_PROCESSES", "0")) or None
+
+# Extra policy rules
+RULES = os.environ.get("COMPLIANCE_RULES")
+
 # From the lab instructions
 COMPLIANT_SNMP_COMMUNITY = "pmm_noc#"
 COMPLIANT_ADMIN_PASSWORD = "AlwaysNMotion"
@@ -59,38 +92,122 @@ def build_mgmt_compliance() -> Mgmt_Compliance:
         username=USERNAME,
         password=PASSWORD,
         community_string=COMPLIANT_SNMP_COMMUNITY,
+        extra_rules=load_rules(RULES) if RULES else None,
+    )
+
+
+def print_report(report) -> None:
+    """
+    Print one line per device that is not compliant.
+    """
+    for device in report.devices:
+        if device.status != "compliant":
+            detail = device.error or ", ".join(
+                device.unauthorized_users
+                + device.unauthorized_communities
+                + [f"{rule}: {found}" for rule, items in device.violations.items() for found in items]
+            )
+            print(f"  {device.hostname:<24} {device.status:<14} {detail}")
+
+
+def fleet_main() -> None:
+    """
+    Audit every device of INVENTORY and write the compliance report.
+    """
+    devices = load_inventory(INVENTORY)
+    store = FingerprintStore(STATE, ttl=STATE_MAX_AGE)
+    auditor = FleetAuditor(
+        defaults=dict(
+            port=ROUTER_PORT,
+            username=USERNAME,
+            password=PASSWORD,
+            community_string=COMPLIANT_SNMP_COMMUNITY,
+            extra_rules=load_rules(RULES) if RULES else None,
+        ),
+        max_workers=WORKERS,
+        remediate=REMEDIATE,
+        admin_password=COMPLIANT_ADMIN_PASSWORD,
+        store=store,
+    )
+
+    mode = "audit + remediation" if REMEDIATE else "audit only"
+    print(f"Checking {len(devices)} devices from {INVENTORY} ({mode}, {WORKERS} workers)")
+    print("-" * 72)
+
+    report = auditor.run(devices)
+    print_report(report)
+
+    report.write(REPORT)
+    store.save()
+    print("-" * 72)
+    print(report.summary())
+    print(f"Report written to {REPORT}")
+
+
+def offline_main() -> None:
+    """
+    Evaluate every saved config below CONFIG_DIR and write the report.
+    """
+    auditor = OfflineAuditor(
+        dict(
+            community_string=COMPLIANT_SNMP_COMMUNITY,
+            extra_rules=load_rules(RULES) if RULES else None,
+        ),
+        processes=PROCESSES,
     )
 
+    print(f"Evaluating saved configs in {CONFIG_DIR} ({auditor.processes} processes)")
+    print("-" * 72)
+
+    report = auditor.run(CONFIG_DIR)
+    print_report(report)
+    report.write(REPORT)
+    print("-" * 72)
+    print(report.summary())
+    print(f"Report written to {REPORT}")
+
 
 def main() -> None:
+    if CONFIG_DIR:
+        offline_main()
+        return
+
     if not validate_env():
         sys.exit(1)
 
+    if INVENTORY:
+        fleet_main()
+        return
+
     mgmt = build_mgmt_compliance()
 
     print(f"Checking management configuration on device {ROUTER_ADDRESS}:{ROUTER_PORT}")
     print("-" * 72)
 
-    # -----------------------------------------------------------------------
-    # Gather current state
-    # -----------------------------------------------------------------------
-    unauthorized_users = mgmt.current_unauthorized_users()
-    unauthorized_communities = mgmt.current_unauthorized_communities()
+    # The audit and the remediation each use one SSH session; none is held
+    # open while waiting for the operator, so the device exec-timeout does
+    # not close it under us
+    audit = mgmt.audit()
 
     print("Current unauthorized local users:")
-    if unauthorized_users:
-        for user in unauthorized_users:
+    if audit.unauthorized_users:
+        for user in audit.unauthorized_users:
             print(f"  - {user}")
     else:
         print("  (none)")
 
     print("\nCurrent unauthorized SNMP communities:")
-    if unauthorized_communities:
-        for community in unauthorized_communities:
+    if audit.unauthorized_communities:
+        for community in audit.unauthorized_communities:
             print(f"  - {community}")
     else:
         print("  (none)")
 
+    for rule, found in audit.other_violations.items():
+        print(f"\nRule {rule} (not remediated):")
+        for item in found:
+            print(f"  - {item}")
+
     print("\n" + "-" * 72)
     answer = input(
         "Apply compliance changes (update admin password / SNMP)? [y/N]: "
@@ -99,21 +216,14 @@ def main() -> None:
         print("No changes applied.")
         return
 
-    # -----------------------------------------------------------------------
+    # -------------------------------------------------------------------
     # Enforce compliance
-    # -----------------------------------------------------------------------
-    print("\nUpdating local admin user password...")
-    mgmt.password = COMPLIANT_ADMIN_PASSWORD
-    if mgmt.update_local_password():
-        print("  ✔ Local user configuration updated.")
-    else:
-        print("  ✖ Failed to update local user configuration.")
-
-    print("\nUpdating SNMP community configuration...")
-    if mgmt.update_snmp_community():
-        print("  ✔ SNMP configuration updated.")
+    # -------------------------------------------------------------------
+    print("\nUpdating local users and SNMP community configuration...")
+    if mgmt.remediate(audit, admin_password=COMPLIANT_ADMIN_PASSWORD):
+        print("  ✔ Local user and SNMP configuration updated and saved.")
     else:
-        print("  ✖ Failed to update SNMP configuration.")
+        print("  ✖ Failed to update and save local user and SNMP configuration.")
 
     print("\nDone.")
 
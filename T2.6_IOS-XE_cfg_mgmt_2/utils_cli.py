@@ -1,8 +1,113 @@
-from typing import List, Dict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from concurrent.futures import ProcessPoolExecutor
 import os
+import threading
 
+import textfsm
+from textfsm import clitable
+import ntc_templates
 from ntc_templates.parse import parse_output as ntc_parse_output
 
+# (platform, command, raw output) as handled by parse_many
+ParseJob = Tuple[str, str, str]
+
+# Below this many outputs parse_many does not start a process pool
+BULK_THRESHOLD = 200
+
+
+def template_dir() -> str:
+    """Template directory used by ntc_templates (NTC_TEMPLATES_DIR or bundled)."""
+    return os.environ.get("NTC_TEMPLATES_DIR") or os.path.join(
+        os.path.dirname(ntc_templates.__file__), "templates"
+    )
+
+
+class _CompiledTemplate(object):
+    __slots__ = ("fsm", "header", "lock")
+
+    def __init__(self, path: str) -> None:
+        with open(path) as fd:
+            self.fsm = textfsm.TextFSM(fd)
+        self.header = [name.lower() for name in self.fsm.header]
+        # TextFSM keeps parse state on the instance
+        self.lock = threading.Lock()
+
+    def parse(self, data: str) -> List[Dict]:
+        with self.lock:
+            self.fsm.Reset()
+            records = self.fsm.ParseText(data)
+        header = self.header
+        return [dict(zip(header, record)) for record in records]
+
+
+class ParserCache(object):
+    """
+    Compiled TextFSM templates keyed by (platform, command).
+
+    The ntc_templates index is read once, and each template is looked up,
+    read and compiled the first time its (platform, command) is parsed.
+    Index rows that merge several templates are parsed through
+    clitable.CliTable as ntc_templates does.
+    """
+
+    def __init__(self, templates: Optional[str] = None) -> None:
+        self.template_dir = templates or template_dir()
+        self._cli_table = clitable.CliTable("index", self.template_dir)
+        self._compiled: Dict[Tuple[str, str], Any] = {}
+        self._lock = threading.Lock()
+
+    def _compile(self, platform: str, command: str) -> Any:
+        attrs = {"Command": command, "Platform": platform}
+        row_idx = self._cli_table.index.GetRowMatch(attrs)
+        if not row_idx:
+            raise clitable.CliTableError(f'No template found for attributes: "{attrs}"')
+        templates = self._cli_table.index.index[row_idx]["Template"].split(":")
+        if len(templates) > 1:
+            # Merged tables, cached as the attributes for the CliTable path
+            return attrs
+        return _CompiledTemplate(os.path.join(self.template_dir, templates[0].strip()))
+
+    def template(self, platform: str, command: str) -> Any:
+        key = (platform, command)
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            with self._lock:
+                compiled = self._compiled.get(key)
+                if compiled is None:
+                    compiled = self._compiled[key] = self._compile(platform, command)
+        return compiled
+
+    def parse(self, platform: str, command: str, data: str) -> List[Dict]:
+        """Parse data, raises like ntc_templates.parse.parse_output."""
+        compiled = self.template(platform, command)
+        if isinstance(compiled, _CompiledTemplate):
+            return compiled.parse(data)
+
+        with self._lock:
+            self._cli_table.ParseCmd(data, compiled)
+            return [
+                {self._cli_table.header[i].lower(): v for i, v in enumerate(row)}
+                for row in self._cli_table
+            ]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._compiled.clear()
+
+
+_cache: Optional[ParserCache] = None
+_cache_lock = threading.Lock()
+
+
+def parser_cache() -> ParserCache:
+    """Process-wide ParserCache, created on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ParserCache()
+    return _cache
+
 
 def parse_output(
     platform: str,
@@ -10,7 +115,9 @@ def parse_output(
     data: str,
 ) -> List[Dict]:
     """
-    Wrapper around ntc_templates.parse.parse_output
+    Parse CLI output with the ntc_templates TextFSM templates.
+
+    Templates are compiled once per (platform, command) and reused.
 
     Args:
         platform (str): Device platform (e.g. "cisco_ios")
@@ -21,12 +128,50 @@ def parse_output(
         List[Dict]: Parsed structured data
     """
     try:
-        parsed = ntc_parse_output(
+        return parser_cache().parse(platform, command, data)
+    except Exception as exc:
+        print(f"ERROR: Failed to parse output for '{command}': {exc}")
+        return []
+
+
+def parse_output_uncached(
+    platform: str,
+    command: str,
+    data: str,
+) -> List[Dict]:
+    """
+    Wrapper around ntc_templates.parse.parse_output, which resolves the
+    index and compiles the template on every call.
+    """
+    try:
+        return ntc_parse_output(
             platform=platform,
             command=command,
             data=data,
         )
-        return parsed
     except Exception as exc:
         print(f"ERROR: Failed to parse output for '{command}': {exc}")
         return []
+
+
+def _parse_job(job: ParseJob) -> List[Dict]:
+    return parse_output(*job)
+
+
+def parse_many(
+    jobs: Iterable[ParseJob],
+    processes: Optional[int] = None,
+    chunksize: int = 64,
+) -> List[List[Dict]]:
+    """
+    Parse many (platform, command, data) outputs, results in input order.
+
+    Large batches are spread over a process pool; every worker process
+    keeps its own ParserCache, so each template is compiled once per worker.
+    """
+    jobs: Sequence[ParseJob] = list(jobs)
+    if processes == 1 or len(jobs) < BULK_THRESHOLD:
+        return [_parse_job(job) for job in jobs]
+
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        return list(pool.map(_parse_job, jobs, chunksize=chunksize))
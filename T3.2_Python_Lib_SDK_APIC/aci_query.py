@@ -0,0 +1,348 @@
+"""
+Query DSL for ACIModule, compiled to APIC filter syntax.
+
+Filters are written against Q.<class>.<attribute> and combined with
+& (and), | (or) and ~ (not):
+
+    Q.fvSubnet.ip == "10.0.1.1/24"            eq(fvSubnet.ip,"10.0.1.1/24")
+    Q.fvBD.name.wcard("^web") & ~(Q.fvBD.unicastRoute == "no")
+    Q.fvBD.name.in_(["BD1", "BD2"])           or(eq(...),eq(...))
+
+A Query names the class to return, an optional filter, an optional DN to
+search below and an optional child constraint:
+
+    Query("fvBD", Q.fvBD.name == "BD1")
+    Query("fvSubnet", under="uni/tn-T1")
+    Query("fvBD").having("fvSubnet", Q.fvSubnet.ip == "10.0.1.1/24")
+
+plan() turns queries into as few APIC requests as possible:
+
+    dn == X only            mo/X.json                  (MO query, without under=)
+    under=DN                mo/DN.json?query-target=subtree&target-subtree-class=...
+    having(...)             class query with rsp-subtree-include=required
+    otherwise               class/<cls>.json?query-target-filter=...
+
+Queries sharing class and scope (and without child constraints) become
+one request whose filter is the or() of theirs, FILTER_CHUNK queries at a
+time so the URL stays short. The rows are then given back to each query
+by evaluating its filter locally, so every query still gets only its own
+objects. DN lookups of one class are merged the same way, DN_FILTER_CHUNK
+at a time.
+
+    bds, subnets = aci.select_many([
+        Query("fvBD", Q.fvBD.name == "BD1"),
+        Query("fvBD", Q.fvBD.name == "BD2"),        # same request as BD1
+        Query("fvSubnet", under="uni/tn-T1"),
+    ])
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import quote
+
+# DNs per merged DN lookup, keeps the URL short
+DN_FILTER_CHUNK = 50
+
+# Queries per merged class/scope request, keeps the URL short
+FILTER_CHUNK = 50
+
+# Characters left as they are in filter querystrings
+_SAFE = "(),.\"/-_[]:|^$*"
+
+Value = Union[str, int, float]
+
+
+# -----------------------------------------------------------------------------
+# Filters
+# -----------------------------------------------------------------------------
+class Filter(object):
+    """An APIC filter expression, str() gives the querystring form."""
+
+    __slots__ = ("op", "args")
+
+    def __init__(self, op: str, *args: Any) -> None:
+        self.op = op
+        self.args = args
+
+    def __and__(self, other: "Filter") -> "Filter":
+        return Filter("and", *self._flatten("and"), *other._flatten("and"))
+
+    def __or__(self, other: "Filter") -> "Filter":
+        return Filter("or", *self._flatten("or"), *other._flatten("or"))
+
+    def __invert__(self) -> "Filter":
+        return Filter("not", self)
+
+    def _flatten(self, op: str) -> Tuple[Any, ...]:
+        return self.args if self.op == op else (self,)
+
+    def __str__(self) -> str:
+        return f"{self.op}({','.join(_render(arg) for arg in self.args)})"
+
+    def __repr__(self) -> str:
+        return f"Filter({self})"
+
+    def classes(self) -> set:
+        """Classes the filter refers to."""
+        found = set()
+        for arg in self.args:
+            if isinstance(arg, Attr):
+                found.add(arg.cls)
+            elif isinstance(arg, Filter):
+                found |= arg.classes()
+        return found
+
+    def dn_value(self) -> Optional[str]:
+        """X if the filter is exactly eq(<cls>.dn,X)."""
+        if self.op == "eq" and isinstance(self.args[0], Attr) and self.args[0].name == "dn":
+            return str(self.args[1])
+        return None
+
+    def matches(self, attrs: Dict[str, str]) -> bool:
+        """Evaluate the filter locally, as the APIC would."""
+        op = self.op
+        if op == "and":
+            return all(arg.matches(attrs) for arg in self.args)
+        if op == "or":
+            return any(arg.matches(attrs) for arg in self.args)
+        if op == "not":
+            return not self.args[0].matches(attrs)
+        attr, value = self.args
+        actual = attrs.get(attr.name)
+        if actual is None:
+            return op == "ne"
+        if op == "wcard":
+            return re.search(str(value), actual) is not None
+        # eq/ne compare the text as the APIC does: "01" is not "1"
+        if op == "eq":
+            return actual == str(value)
+        if op == "ne":
+            return actual != str(value)
+        left, right = _comparable(actual, value)
+        if op == "lt":
+            return left < right
+        if op == "gt":
+            return left > right
+        if op == "le":
+            return left <= right
+        if op == "ge":
+            return left >= right
+        raise ValueError(f"Unknown filter operator '{op}'")
+
+
+def _comparable(actual: str, value: Value) -> Tuple[Any, Any]:
+    """For lt/gt/le/ge: numbers compare as numbers, anything else as strings."""
+    try:
+        return float(actual), float(value)
+    except (TypeError, ValueError):
+        return actual, str(value)
+
+
+def _render(arg: Any) -> str:
+    if isinstance(arg, (Filter, Attr)):
+        return str(arg)
+    text = str(arg)
+    if '"' in text:
+        raise ValueError(f"APIC filter values cannot contain '\"': {text}")
+    return f'"{text}"'
+
+
+class Attr(object):
+    """<class>.<attribute> of a filter, compared to build a Filter."""
+
+    __slots__ = ("cls", "name")
+
+    def __init__(self, cls: str, name: str) -> None:
+        self.cls = cls
+        self.name = name
+
+    def __str__(self) -> str:
+        return f"{self.cls}.{self.name}"
+
+    def __repr__(self) -> str:
+        return f"Attr({self})"
+
+    def __eq__(self, value: Value) -> Filter:  # type: ignore[override]
+        return Filter("eq", self, value)
+
+    def __ne__(self, value: Value) -> Filter:  # type: ignore[override]
+        return Filter("ne", self, value)
+
+    def __lt__(self, value: Value) -> Filter:
+        return Filter("lt", self, value)
+
+    def __gt__(self, value: Value) -> Filter:
+        return Filter("gt", self, value)
+
+    def __le__(self, value: Value) -> Filter:
+        return Filter("le", self, value)
+
+    def __ge__(self, value: Value) -> Filter:
+        return Filter("ge", self, value)
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def wcard(self, pattern: str) -> Filter:
+        """Regex match, as APIC wcard()."""
+        return Filter("wcard", self, pattern)
+
+    def in_(self, values: Iterable[Value]) -> Filter:
+        terms = [Filter("eq", self, value) for value in values]
+        if not terms:
+            raise ValueError(f"{self}.in_() needs at least one value")
+        return terms[0] if len(terms) == 1 else Filter("or", *terms)
+
+
+class _ClassRef(object):
+    __slots__ = ("_cls",)
+
+    def __init__(self, cls: str) -> None:
+        self._cls = cls
+
+    def __getattr__(self, name: str) -> Attr:
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return Attr(self._cls, name)
+
+
+class _Namespace(object):
+    def __getattr__(self, cls: str) -> _ClassRef:
+        if cls.startswith("__"):
+            raise AttributeError(cls)
+        return _ClassRef(cls)
+
+
+Q = _Namespace()
+
+
+# -----------------------------------------------------------------------------
+# Queries
+# -----------------------------------------------------------------------------
+@dataclass
+class Query:
+    """MOs of cls matching where, optionally below a DN and with children."""
+
+    cls: str
+    where: Optional[Filter] = None
+    under: Optional[str] = None
+    # (child class, child filter): keep MOs with at least one matching child
+    child: Optional[Tuple[str, Optional[Filter]]] = None
+
+    def __post_init__(self) -> None:
+        if self.where is not None and self.where.classes() - {self.cls}:
+            raise ValueError(f"Query({self.cls}): filter refers to other classes")
+
+    def having(self, cls: str, where: Optional[Filter] = None) -> "Query":
+        """Only MOs with a child of cls matching where (one request)."""
+        if self.child is not None:
+            raise ValueError(f"Query({self.cls}): only one having() per query")
+        if where is not None and where.classes() - {cls}:
+            raise ValueError(f"having({cls}): filter refers to other classes")
+        self.child = (cls, where)
+        return self
+
+    def matches(self, attrs: Dict[str, str]) -> bool:
+        if self.under is not None and not attrs.get("dn", "").startswith(self.under + "/"):
+            return False
+        return self.where is None or self.where.matches(attrs)
+
+
+@dataclass
+class Request:
+    """One APIC GET answering the queries at the given positions."""
+
+    url: str
+    members: List[Tuple[int, Query]]
+    # Only MOs of this class are results (MO and subtree queries)
+    cls: Optional[str] = None
+
+    @property
+    def shared(self) -> bool:
+        return len(self.members) > 1
+
+
+def _filter_param(where: Filter) -> str:
+    return quote(str(where), safe=_SAFE)
+
+
+def _or(filters: List[Filter]) -> Filter:
+    return filters[0] if len(filters) == 1 else Filter("or", *filters)
+
+
+def _url(
+    cls: str,
+    where: Optional[Filter],
+    under: Optional[str],
+    child: Optional[Tuple[str, Optional[Filter]]] = None,
+) -> Tuple[str, Optional[str]]:
+    """URL of one request, and the class to keep if the URL is not a class query."""
+    params = []
+    if under is not None:
+        base = f"mo/{under}.json"
+        params += ["query-target=subtree", f"target-subtree-class={cls}"]
+    else:
+        base = f"class/{cls}.json"
+    if where is not None:
+        params.append(f"query-target-filter={_filter_param(where)}")
+    if child is not None:
+        child_cls, child_where = child
+        params += ["rsp-subtree=children", f"rsp-subtree-class={child_cls}"]
+        if child_where is not None:
+            params.append(f"rsp-subtree-filter={_filter_param(child_where)}")
+        params.append("rsp-subtree-include=required")
+    url = base + ("?" + "&".join(params) if params else "")
+    return url, (cls if under is not None else None)
+
+
+def plan(queries: List[Query]) -> List[Request]:
+    """Group queries into the fewest APIC requests, see the module docstring."""
+    requests: List[Request] = []
+    dn_lookups: Dict[str, List[Tuple[int, Query, str]]] = {}
+    groups: Dict[Tuple[str, Optional[str]], List[Tuple[int, Query]]] = {}
+
+    for index, query in enumerate(queries):
+        dn = query.where.dn_value() if query.where is not None else None
+        if query.child is not None:
+            url, cls = _url(query.cls, query.where, query.under, query.child)
+            requests.append(Request(url, [(index, query)], cls))
+        elif dn is not None and query.under is None:
+            dn_lookups.setdefault(query.cls, []).append((index, query, dn))
+        else:
+            groups.setdefault((query.cls, query.under), []).append((index, query))
+
+    for (cls, under), members in groups.items():
+        if any(query.where is None for _, query in members):
+            # One query wants the whole class, it covers the others
+            url, keep = _url(cls, None, under)
+            requests.append(Request(url, members, keep))
+            continue
+        for start in range(0, len(members), FILTER_CHUNK):
+            chunk = members[start : start + FILTER_CHUNK]
+            url, keep = _url(cls, _or([query.where for _, query in chunk]), under)
+            requests.append(Request(url, chunk, keep))
+
+    for cls, lookups in dn_lookups.items():
+        if len(lookups) == 1:
+            index, query, dn = lookups[0]
+            requests.append(Request(f"mo/{dn}.json", [(index, query)], cls))
+            continue
+        for start in range(0, len(lookups), DN_FILTER_CHUNK):
+            chunk = lookups[start : start + DN_FILTER_CHUNK]
+            dns = list(dict.fromkeys(dn for _, _, dn in chunk))
+            url, _ = _url(cls, Attr(cls, "dn").in_(dns), None)
+            requests.append(Request(url, [(index, query) for index, query, _ in chunk]))
+    return requests
+
+
+def split(request: Request, rows: List[Tuple[str, Dict[str, str]]]) -> Dict[int, List[Dict[str, str]]]:
+    """Give the (class, attributes) rows of a request back to its queries."""
+    if request.cls is not None:
+        rows = [row for row in rows if row[0] == request.cls]
+    if not request.shared:
+        ((index, _),) = request.members
+        return {index: [attrs for _, attrs in rows]}
+    return {
+        index: [attrs for _, attrs in rows if query.matches(attrs)]
+        for index, query in request.members
+    }
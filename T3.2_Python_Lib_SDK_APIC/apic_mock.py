@@ -0,0 +1,983 @@
+#!/usr/bin/env python
+
+"""
+Local APIC REST stand-in for exercising ACIModule without a fabric.
+
+Serves plain HTTP on host:port with an in-memory object tree:
+
+* POST /api/aaaLogin.json                   - sets the APIC-cookie token
+* POST /api/mo/<dn>.json, /api/node/mo/...  - config payloads, one transaction
+* GET  /api/aaaRefresh.json                 - extends the session, new token
+* GET  /socket<token>                       - WebSocket carrying subscription events
+* GET  /api/subscriptionRefresh.json?id=... - keeps a subscription alive
+* GET  /api/class/<class>.json              - class queries
+* GET  /api/node/mo/<dn>.json, /api/mo/...  - MO queries
+
+Query options: query-target (self, children, subtree), target-subtree-class,
+query-target-filter, rsp-subtree (children, full), rsp-subtree-class,
+rsp-subtree-filter, rsp-subtree-include=required, order-by,
+page/page-size (totalCount is the unpaged count) and subscription=yes.
+Filters support eq, ne, wcard, gt, lt, and, or and not.
+
+Config payloads ({cls: {"attributes": ..., "children": [...]}}) name each
+MO by a dn or rn attribute and honour status="deleted". A payload is
+validated as a whole before anything is applied, so a rejected POST leaves
+the tree untouched.
+
+Changes made by config POSTs and through create_mo(), modify_mo() and
+delete_mo() are pushed
+to the WebSocket of every session with a matching subscription, in the
+APIC event format.
+
+The tree is synthetic_tree() (sized by --tenants/--bds/--subnets/--epgs)
+or loaded with --tree from a JSON/YAML export: a saved APIC response such
+as mo/uni.json?rsp-subtree=full, or the output of --dump-tree.
+
+Example:
+    ./apic_mock.py --port 8443 --tenants 20 --bds 50
+    ACI_VAR_SCHEME=http ACI_VAR_HOST=127.0.0.1:8443 ./getBDs.py 10.0.1.1/24
+"""
+
+import re
+import json
+import time
+import random
+import base64
+import struct
+import hashlib
+import logging
+import argparse
+import threading
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+COOKIE_NAME = "APIC-cookie"
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+# Seconds a subscription lives without subscriptionRefresh
+SUBSCRIPTION_TIMEOUT = 90.0
+
+
+# -----------------------------------------------------------------------------
+# Object tree
+# -----------------------------------------------------------------------------
+def split_dn(dn: str) -> Tuple[str, str]:
+    """(parent dn, rn), '/' inside [...] is part of the rn."""
+    depth = 0
+    for idx in range(len(dn) - 1, -1, -1):
+        if dn[idx] == "]":
+            depth += 1
+        elif dn[idx] == "[":
+            depth -= 1
+        elif dn[idx] == "/" and depth == 0:
+            return dn[:idx], dn[idx + 1 :]
+    return "", dn
+
+
+class MO(object):
+    """One managed object of the mock tree."""
+
+    __slots__ = ("cls", "dn", "attrs", "parent", "children")
+
+    def __init__(self, cls: str, dn: str, attrs: Dict[str, str], parent: Optional["MO"]) -> None:
+        self.cls = cls
+        self.dn = dn
+        self.attrs = attrs
+        self.parent = parent
+        self.children: List["MO"] = []
+
+    def subtree(self) -> Iterator["MO"]:
+        """Every descendant, depth first, excluding self."""
+        for child in self.children:
+            yield child
+            yield from child.subtree()
+
+
+class MOTree(object):
+    """MOs indexed by DN and by class."""
+
+    def __init__(self) -> None:
+        self.root = MO("polUni", "uni", {"dn": "uni"}, None)
+        self.by_dn: Dict[str, MO] = {"uni": self.root}
+        self.by_class: Dict[str, List[MO]] = {"polUni": [self.root]}
+        self.lock = threading.RLock()
+
+    def add(self, parent: MO, cls: str, rn: str, **attrs: str) -> MO:
+        dn = f"{parent.dn}/{rn}"
+        with self.lock:
+            mo = self.by_dn.get(dn)
+            if mo is not None:
+                mo.attrs.update(attrs)
+                return mo
+            mo = MO(cls, dn, dict(attrs, dn=dn, rn=rn), parent)
+            parent.children.append(mo)
+            self.by_dn[dn] = mo
+            self.by_class.setdefault(cls, []).append(mo)
+        return mo
+
+    def remove(self, dn: str) -> List[MO]:
+        """Detach dn and its subtree, returns the removed MOs (parent first)."""
+        with self.lock:
+            mo = self.by_dn.get(dn)
+            if mo is None or mo.parent is None:
+                return []
+            mo.parent.children.remove(mo)
+            removed = [mo, *mo.subtree()]
+            for item in removed:
+                del self.by_dn[item.dn]
+                self.by_class[item.cls].remove(item)
+        return removed
+
+    def __len__(self) -> int:
+        return len(self.by_dn)
+
+    def dump(self) -> Dict[str, Any]:
+        """The whole tree as a mo/uni.json?rsp-subtree=full response."""
+
+        def full(mo: MO) -> Dict[str, Any]:
+            return render(mo, [full(child) for child in mo.children])
+
+        with self.lock:
+            return {"totalCount": "1", "imdata": [full(self.root)]}
+
+
+# (status, class, dn, attributes) of one MO of a config payload
+Change = Tuple[str, str, str, Dict[str, str]]
+
+
+def iter_payload(
+    node: Dict[str, Any], parent: Optional[str] = None, expected: Optional[str] = None
+) -> Iterator[Change]:
+    """
+    Walk an APIC JSON MO ({cls: {"attributes": ..., "children": [...]}}),
+    parents first. Each MO is named by its dn or rn attribute; the status
+    is "created" or "deleted" (the subtree of a deleted MO is not walked).
+    """
+    if not isinstance(node, dict) or len(node) != 1:
+        raise ValueError("each MO must have exactly one class key")
+    ((cls, body),) = node.items()
+    attrs = {k: str(v) for k, v in body.get("attributes", {}).items()}
+    status = attrs.pop("status", "")
+    dn = attrs.pop("dn", None)
+    rn = attrs.pop("rn", None)
+    if dn is None:
+        if rn is None or parent is None:
+            raise ValueError(f"{cls}: dn or rn is required")
+        dn = f"{parent}/{rn}" if parent else rn
+    if expected is not None and dn != expected:
+        raise ValueError(f"{cls}: dn {dn} does not match the URL")
+
+    if "deleted" in status:
+        yield ("deleted", cls, dn, attrs)
+        return
+    yield ("created", cls, dn, attrs)
+    for child in body.get("children", []):
+        yield from iter_payload(child, dn)
+
+
+def load_tree(path: str) -> MOTree:
+    """
+    Tree from a JSON or YAML file holding an APIC response ({"imdata":
+    [...]}, e.g. a saved mo/uni.json?rsp-subtree=full or
+    class/fvTenant.json?rsp-subtree=full), a list of MOs or a single MO.
+    Missing containers of the top-level MOs are created as "unknown".
+    """
+    with open(path, encoding="utf-8") as fd:
+        if path.endswith((".yaml", ".yml")):
+            import yaml
+
+            data = yaml.safe_load(fd)
+        else:
+            data = json.load(fd)
+    if isinstance(data, dict) and "imdata" in data:
+        data = data["imdata"]
+    if isinstance(data, dict):
+        data = [data]
+
+    tree = MOTree()
+    for node in data:
+        for _, cls, dn, attrs in iter_payload(node):
+            if dn == "uni":
+                tree.root.attrs.update(attrs)
+                continue
+            parent_dn, rn = split_dn(dn)
+            tree.add(_container(tree, parent_dn), cls, rn, **attrs)
+    return tree
+
+
+def _container(tree: MOTree, dn: str) -> MO:
+    mo = tree.by_dn.get(dn)
+    if mo is None:
+        parent_dn, rn = split_dn(dn)
+        if not parent_dn:
+            raise ValueError(f"{dn} is not below uni")
+        mo = tree.add(_container(tree, parent_dn), "unknown", rn)
+    return mo
+
+
+def synthetic_tree(
+    tenants: int = 10,
+    bds: int = 20,
+    subnets: int = 2,
+    epgs: int = 2,
+) -> MOTree:
+    """
+    Tenants tn-T<n>, each with VRF, BDs BD-<n> holding subnets
+    10.<tenant>.<bd*subnets+k>.1/24 and an application profile with EPGs.
+    """
+    tree = MOTree()
+    for t in range(tenants):
+        tenant = tree.add(tree.root, "fvTenant", f"tn-T{t}", name=f"T{t}")
+        tree.add(tenant, "fvCtx", "ctx-VRF1", name="VRF1")
+        app = tree.add(tenant, "fvAp", "ap-APP", name="APP")
+        for b in range(bds):
+            bd = tree.add(
+                tenant, "fvBD", f"BD-BD{b}", name=f"BD{b}", unicastRoute="yes"
+            )
+            tree.add(bd, "fvRsCtx", "rsctx", tnFvCtxName="VRF1")
+            for s in range(subnets):
+                ip = f"10.{t % 256}.{(b * subnets + s) % 256}.1/24"
+                tree.add(bd, "fvSubnet", f"subnet-[{ip}]", ip=ip, scope="private")
+            for e in range(epgs):
+                epg = tree.add(app, "fvAEPg", f"epg-BD{b}-EPG{e}", name=f"BD{b}-EPG{e}")
+                tree.add(epg, "fvRsBd", "rsbd", tnFvBDName=f"BD{b}")
+    return tree
+
+
+# -----------------------------------------------------------------------------
+# Filters
+# -----------------------------------------------------------------------------
+Predicate = Callable[[MO], bool]
+
+_TOKEN_RE = re.compile(r'\s*(?:(?P<name>[A-Za-z]+)\(|(?P<close>\))|(?P<comma>,)|"(?P<str>[^"]*)"|(?P<ref>[A-Za-z0-9_.]+))')
+
+
+def _tokens(text: str) -> List[Tuple[str, str]]:
+    tokens = []
+    pos = 0
+    while pos < len(text):
+        match = _TOKEN_RE.match(text, pos)
+        if not match or match.end() == pos:
+            raise ValueError(f"Invalid filter near '{text[pos:]}'")
+        pos = match.end()
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind)))
+    return tokens
+
+
+def parse_filter(text: str) -> Predicate:
+    """Compile an APIC filter expression into a predicate on MOs."""
+    tokens = _tokens(text)
+    pos = 0
+
+    def expr() -> Predicate:
+        nonlocal pos
+        kind, name = tokens[pos]
+        if kind != "name":
+            raise ValueError(f"Expected an operator in '{text}'")
+        pos += 1
+        args: List[Any] = []
+        while tokens[pos][0] != "close":
+            if tokens[pos][0] == "comma":
+                pos += 1
+                continue
+            if tokens[pos][0] == "name":
+                args.append(expr())
+            else:
+                args.append(tokens[pos][1])
+                pos += 1
+        pos += 1
+        return _operator(name, args)
+
+    predicate = expr()
+    if pos != len(tokens):
+        raise ValueError(f"Trailing input in filter '{text}'")
+    return predicate
+
+
+def _operator(name: str, args: List[Any]) -> Predicate:
+    if name == "and":
+        return lambda mo: all(p(mo) for p in args)
+    if name == "or":
+        return lambda mo: any(p(mo) for p in args)
+    if name == "not":
+        return lambda mo: not args[0](mo)
+
+    ref, value = args
+    cls, _, attr = ref.rpartition(".")
+
+    def get(mo: MO) -> Optional[str]:
+        if cls and mo.cls != cls:
+            return None
+        return mo.attrs.get(attr)
+
+    if name == "eq":
+        return lambda mo: get(mo) == value
+    if name == "ne":
+        return lambda mo: get(mo) is not None and get(mo) != value
+    if name == "wcard":
+        pattern = re.compile(value)
+        return lambda mo: get(mo) is not None and bool(pattern.search(get(mo)))
+    if name in ("gt", "lt", "ge", "le"):
+        def compare(mo: MO) -> bool:
+            current = get(mo)
+            if current is None:
+                return False
+            try:
+                left, right = float(current), float(value)
+            except ValueError:
+                left, right = current, value
+            return {
+                "gt": left > right,
+                "lt": left < right,
+                "ge": left >= right,
+                "le": left <= right,
+            }[name]
+        return compare
+    raise ValueError(f"Unsupported filter operator '{name}'")
+
+
+# -----------------------------------------------------------------------------
+# Queries
+# -----------------------------------------------------------------------------
+def _classes(value: Optional[str]) -> Optional[set]:
+    if not value:
+        return None
+    return {c.strip() for c in value.split(",") if c.strip()}
+
+
+def render(mo: MO, children: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    body: Dict[str, Any] = {"attributes": dict(mo.attrs)}
+    if children:
+        body["children"] = children
+    return {mo.cls: body}
+
+
+def _page(targets: List[Any], params: Dict[str, str], key: Callable[[Any], MO]) -> List[Any]:
+    """Apply order-by and page/page-size."""
+    order = params.get("order-by")
+    if order:
+        ref, _, direction = order.partition("|")
+        attr = ref.rpartition(".")[2]
+        targets = sorted(
+            targets,
+            key=lambda item: key(item).attrs.get(attr, ""),
+            reverse=direction == "desc",
+        )
+    if "page-size" in params:
+        size = int(params["page-size"])
+        start = int(params.get("page", 0)) * size
+        targets = targets[start : start + size]
+    return targets
+
+
+def run_query(base: List[MO], params: Dict[str, str]) -> Tuple[int, List[Dict[str, Any]]]:
+    """
+    Apply the query options of an APIC GET to the base MOs.
+
+    Returns the total number of matching objects and the requested page.
+    """
+    target = params.get("query-target", "self")
+    subtree_classes = _classes(params.get("target-subtree-class"))
+
+    targets: List[MO] = []
+    for mo in base:
+        if target in ("self", "subtree"):
+            targets.append(mo)
+        if target == "children":
+            targets.extend(mo.children)
+        elif target == "subtree":
+            targets.extend(mo.subtree())
+    if subtree_classes is not None and target != "self":
+        targets = [mo for mo in targets if mo.cls in subtree_classes]
+
+    if "query-target-filter" in params:
+        predicate = parse_filter(params["query-target-filter"])
+        targets = [mo for mo in targets if predicate(mo)]
+
+    rsp = params.get("rsp-subtree", "no")
+    if rsp == "no":
+        return len(targets), [render(mo) for mo in _page(targets, params, lambda mo: mo)]
+
+    rsp_classes = _classes(params.get("rsp-subtree-class"))
+    rsp_filter = (
+        parse_filter(params["rsp-subtree-filter"])
+        if "rsp-subtree-filter" in params
+        else None
+    )
+    required = "required" in params.get("rsp-subtree-include", "")
+
+    def decorate(mo: MO) -> Tuple[Dict[str, Any], bool]:
+        children: List[Dict[str, Any]] = []
+        matched = False
+        for child in mo.children:
+            nested: List[Dict[str, Any]] = []
+            child_matched = False
+            if rsp == "full" and child.children:
+                rendered, child_matched = decorate(child)
+                nested = list(rendered.values())[0].get("children", [])
+            wanted = (rsp_classes is None or child.cls in rsp_classes) and (
+                rsp_filter is None or rsp_filter(child)
+            )
+            if wanted or child_matched:
+                children.append(render(child, nested))
+                matched = True
+        return render(mo, children), matched
+
+    result = []
+    for mo in targets:
+        rendered, matched = decorate(mo)
+        if required and not matched:
+            continue
+        result.append((mo, rendered))
+    return len(result), [rendered for _, rendered in _page(result, params, lambda item: item[0])]
+
+
+# -----------------------------------------------------------------------------
+# Subscriptions
+# -----------------------------------------------------------------------------
+class Subscription(object):
+    """A query registered with subscription=yes by one session."""
+
+    def __init__(self, sub_id: str, token: str, cls: Optional[str], dn: Optional[str], params: Dict[str, str]) -> None:
+        self.id = sub_id
+        self.token = token
+        self.cls = cls
+        self.dn = dn
+        self.target = params.get("query-target", "self")
+        self.classes = _classes(params.get("target-subtree-class"))
+        self.predicate = (
+            parse_filter(params["query-target-filter"])
+            if "query-target-filter" in params
+            else None
+        )
+        self.expires = time.monotonic() + SUBSCRIPTION_TIMEOUT
+
+    def _is_base(self, mo: MO) -> bool:
+        return mo.cls == self.cls if self.cls else mo.dn == self.dn
+
+    def matches(self, mo: MO) -> bool:
+        """True if mo is in the result set of the subscribed query."""
+        if self.target == "self":
+            in_scope = self._is_base(mo)
+        elif self.target == "children":
+            in_scope = mo.parent is not None and self._is_base(mo.parent)
+        else:
+            in_scope = False
+            node: Optional[MO] = mo
+            while node is not None and not in_scope:
+                in_scope = self._is_base(node)
+                node = node.parent
+        if not in_scope:
+            return False
+        if self.classes is not None and self.target != "self" and mo.cls not in self.classes:
+            return False
+        return self.predicate is None or self.predicate(mo)
+
+
+class WebSocket(object):
+    """Server side of one WebSocket connection (text frames only)."""
+
+    def __init__(self, rfile: Any, wfile: Any) -> None:
+        self.rfile = rfile
+        self.wfile = wfile
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def accept_key(key: str) -> str:
+        digest = hashlib.sha1((key + WEBSOCKET_GUID).encode("ascii")).digest()
+        return base64.b64encode(digest).decode("ascii")
+
+    def send(self, opcode: int, payload: bytes) -> None:
+        length = len(payload)
+        if length < 126:
+            header = struct.pack("!BB", 0x80 | opcode, length)
+        elif length < 65536:
+            header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+        else:
+            header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+        with self.lock:
+            self.wfile.write(header + payload)
+            self.wfile.flush()
+
+    def send_json(self, data: Any) -> None:
+        self.send(0x1, json.dumps(data).encode("utf-8"))
+
+    def receive(self) -> Optional[Tuple[int, bytes]]:
+        """Next (opcode, payload) from the client, None once closed."""
+        head = self.rfile.read(2)
+        if len(head) < 2:
+            return None
+        opcode, length = head[0] & 0x0F, head[1] & 0x7F
+        if length == 126:
+            (length,) = struct.unpack("!H", self.rfile.read(2))
+        elif length == 127:
+            (length,) = struct.unpack("!Q", self.rfile.read(8))
+        mask = self.rfile.read(4) if head[1] & 0x80 else b""
+        payload = self.rfile.read(length)
+        if mask:
+            payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        return opcode, payload
+
+
+# -----------------------------------------------------------------------------
+# Server
+# -----------------------------------------------------------------------------
+@dataclass
+class MockBehaviour:
+    """How the mock APIC answers requests."""
+
+    latency: float = 0.0
+    username: Optional[str] = None
+    password: Optional[str] = None
+    # Seconds a token stays valid unless refreshed (refreshTimeoutSeconds)
+    token_timeout: float = 600.0
+    # Config POSTs with more MOs are rejected with 400, 0 for no limit
+    max_post_mos: int = 0
+    # Fraction of config POSTs failing with 503 before being applied
+    post_failure_rate: float = 0.0
+
+
+@dataclass
+class MockStats:
+    """Counters collected by the mock APIC."""
+
+    requests: Dict[str, int] = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, kind: str) -> None:
+        with self.lock:
+            self.requests[kind] = self.requests.get(kind, 0) + 1
+
+    @property
+    def total(self) -> int:
+        return sum(self.requests.values())
+
+    def reset(self) -> None:
+        with self.lock:
+            self.requests.clear()
+
+
+class APICHandler(BaseHTTPRequestHandler):
+    """Request handler, tree, behaviour and stats live on the server object."""
+
+    server: "MockAPICServer"
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes, avoid the delayed-ACK stall
+    disable_nagle_algorithm = True
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logging.debug("%s %s", self.address_string(), format % args)
+
+    def _reply(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status: int, text: str) -> None:
+        self._reply(
+            status,
+            {
+                "totalCount": "1",
+                "imdata": [{"error": {"attributes": {"code": str(status), "text": text}}}],
+            },
+        )
+
+    def _token(self) -> Optional[str]:
+        for part in self.headers.get("Cookie", "").split(";"):
+            name, _, value = part.strip().partition("=")
+            if name == COOKIE_NAME:
+                return value
+        return None
+
+    def _authorized(self) -> bool:
+        return self.server.token_valid(self._token())
+
+    def _body(self) -> Any:
+        length = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(length) if length else b""
+        return json.loads(raw) if raw else {}
+
+    def _issue_token(self, user: str, token: Optional[str] = None) -> None:
+        token = self.server.new_token(token)
+        timeout = self.server.behaviour.token_timeout
+        self._reply(
+            200,
+            {
+                "totalCount": "1",
+                "imdata": [
+                    {
+                        "aaaLogin": {
+                            "attributes": {
+                                "token": token,
+                                "refreshTimeoutSeconds": f"{timeout:g}",
+                                "userName": user,
+                            }
+                        }
+                    }
+                ],
+            },
+            {"Set-Cookie": f"{COOKIE_NAME}={token}; path=/"},
+        )
+
+    def _login(self) -> None:
+        behaviour = self.server.behaviour
+        try:
+            attrs = self._body()["aaaUser"]["attributes"]
+        except (ValueError, KeyError, TypeError):
+            return self._error(400, "Malformed aaaLogin request")
+        if behaviour.username is not None and (
+            attrs.get("name") != behaviour.username
+            or attrs.get("pwd") != behaviour.password
+        ):
+            return self._error(401, "Username or password is incorrect")
+        self._issue_token(attrs.get("name", ""))
+
+    def _post_config(self, dn: str) -> None:
+        behaviour = self.server.behaviour
+        try:
+            changes = self.server.plan_config(dn, self._body())
+        except (ValueError, KeyError, TypeError, AttributeError) as exc:
+            return self._error(400, f"Malformed config payload: {exc}")
+        if behaviour.max_post_mos and len(changes) > behaviour.max_post_mos:
+            return self._error(
+                400, f"Transaction has {len(changes)} objects, limit is {behaviour.max_post_mos}"
+            )
+        if behaviour.post_failure_rate and random.random() < behaviour.post_failure_rate:
+            return self._error(503, "Service unavailable")
+        self.server.apply_config(changes)
+        self._reply(200, {"totalCount": "0", "imdata": []})
+
+    def do_POST(self) -> None:
+        if self.server.behaviour.latency:
+            time.sleep(self.server.behaviour.latency)
+        path = unquote(urlsplit(self.path).path)
+        if path == "/api/aaaLogin.json":
+            self.server.stats.record("aaaLogin")
+            return self._login()
+
+        match = re.match(r"^/api/(?:node/)?mo/(.+)\.json$", path)
+        if not match:
+            self.server.stats.record("other")
+            return self._error(400, f"Unsupported POST {path}")
+        self.server.stats.record("post")
+        if not self._authorized():
+            self.server.stats.record("denied")
+            return self._error(403, "Token was invalid (Error: Token timeout)")
+        self._post_config(match.group(1))
+
+    def _websocket(self, token: str) -> None:
+        key = self.headers.get("Sec-WebSocket-Key")
+        if not key or not self.server.token_valid(token):
+            return self._error(403, "Invalid WebSocket request")
+
+        self.send_response(101, "Switching Protocols")
+        self.send_header("Upgrade", "websocket")
+        self.send_header("Connection", "Upgrade")
+        self.send_header("Sec-WebSocket-Accept", WebSocket.accept_key(key))
+        self.end_headers()
+        self.wfile.flush()
+
+        ws = WebSocket(self.rfile, self.wfile)
+        self.server.sockets[token] = ws
+        self.server.stats.record("websocket")
+        try:
+            while True:
+                frame = ws.receive()
+                if frame is None or frame[0] == 0x8:
+                    break
+                if frame[0] == 0x9:
+                    ws.send(0xA, frame[1])
+        except OSError:
+            pass
+        finally:
+            if self.server.sockets.get(token) is ws:
+                del self.server.sockets[token]
+            self.close_connection = True
+
+    def do_GET(self) -> None:
+        if self.server.behaviour.latency:
+            time.sleep(self.server.behaviour.latency)
+        url = urlsplit(self.path)
+        path = unquote(url.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        if path.startswith("/socket"):
+            return self._websocket(path[len("/socket") :])
+
+        if not self._authorized():
+            self.server.stats.record("denied")
+            return self._error(403, "Token was invalid (Error: Token timeout)")
+
+        if path == "/api/aaaRefresh.json":
+            self.server.stats.record("aaaRefresh")
+            return self._issue_token(self.server.behaviour.username or "", self._token())
+
+        if path == "/api/subscriptionRefresh.json":
+            self.server.stats.record("subscriptionRefresh")
+            if not self.server.refresh_subscription(params.get("id", "")):
+                return self._error(400, "Unknown subscription")
+            return self._reply(200, {"totalCount": "0", "imdata": []})
+
+        tree = self.server.tree
+        cls: Optional[str] = None
+        dn: Optional[str] = None
+        if path.startswith("/api/class/") and path.endswith(".json"):
+            self.server.stats.record("class")
+            cls = path[len("/api/class/") : -len(".json")]
+            with tree.lock:
+                base = list(tree.by_class.get(cls, []))
+        else:
+            match = re.match(r"^/api/(?:node/)?mo/(.+)\.json$", path)
+            if not match:
+                self.server.stats.record("other")
+                return self._error(400, f"Unsupported GET {path}")
+            self.server.stats.record("mo")
+            dn = match.group(1)
+            mo = tree.by_dn.get(dn)
+            if mo is None:
+                return self._reply(200, {"totalCount": "0", "imdata": []})
+            base = [mo]
+
+        try:
+            with tree.lock:
+                total, imdata = run_query(base, params)
+            payload: Dict[str, Any] = {"totalCount": str(total), "imdata": imdata}
+            if params.get("subscription") == "yes":
+                payload["subscriptionId"] = self.server.subscribe(
+                    self._token() or "", cls, dn, params
+                )
+        except ValueError as exc:
+            return self._error(400, str(exc))
+        self._reply(200, payload)
+
+
+class MockAPICServer(ThreadingHTTPServer):
+    """A mock APIC listening on host:port."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        tree: Optional[MOTree] = None,
+        behaviour: Optional[MockBehaviour] = None,
+    ) -> None:
+        super().__init__((host, port), APICHandler)
+        self.tree = tree if tree is not None else synthetic_tree()
+        self.behaviour = behaviour or MockBehaviour()
+        self.stats = MockStats()
+        # token -> expiry time
+        self.tokens: Dict[str, float] = {}
+        self.subscriptions: Dict[str, Subscription] = {}
+        # token -> open WebSocket of that session
+        self.sockets: Dict[str, WebSocket] = {}
+        self._counter = 0
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> str:
+        """host:port, as passed to ACIModule."""
+        host, port = self.server_address[:2]
+        return f"{host}:{port}"
+
+    def new_token(self, token: Optional[str] = None) -> str:
+        """Issue a session token, or extend token as aaaRefresh does."""
+        with self._lock:
+            if token is None:
+                self._counter += 1
+                token = f"mock-token-{self._counter}"
+            self.tokens[token] = time.monotonic() + self.behaviour.token_timeout
+        return token
+
+    def token_valid(self, token: Optional[str]) -> bool:
+        expiry = self.tokens.get(token) if token else None
+        return expiry is not None and time.monotonic() < expiry
+
+    def expire_tokens(self) -> None:
+        """Invalidate every session, as an APIC token timeout would."""
+        with self._lock:
+            self.tokens.clear()
+            self.subscriptions.clear()
+
+    # -------------------------------------------------------------------------
+    # Subscriptions
+    # -------------------------------------------------------------------------
+    def subscribe(self, token: str, cls: Optional[str], dn: Optional[str], params: Dict[str, str]) -> str:
+        with self._lock:
+            self._counter += 1
+            sub_id = str(72057594037927936 + self._counter)
+            self.subscriptions[sub_id] = Subscription(sub_id, token, cls, dn, params)
+        return sub_id
+
+    def refresh_subscription(self, sub_id: str) -> bool:
+        sub = self.subscriptions.get(sub_id)
+        if sub is None:
+            return False
+        sub.expires = time.monotonic() + SUBSCRIPTION_TIMEOUT
+        return True
+
+    def notify(self, mos: List[MO], status: str, changed: Optional[Dict[str, str]] = None) -> int:
+        """
+        Push an event for every MO to the sessions subscribed to it.
+
+        For modified MOs only dn and the changed attributes are sent, as
+        the APIC does. Returns the number of messages sent.
+        """
+        now = time.monotonic()
+        events: Dict[str, Tuple[List[str], List[Dict[str, Any]]]] = {}
+        with self._lock:
+            subscriptions = [s for s in self.subscriptions.values() if s.expires > now]
+        for mo in mos:
+            attrs = dict(changed, dn=mo.dn) if changed is not None else dict(mo.attrs)
+            attrs["status"] = status
+            event = {mo.cls: {"attributes": attrs}}
+            for sub in subscriptions:
+                if sub.matches(mo):
+                    ids, imdata = events.setdefault(sub.token, ([], []))
+                    if sub.id not in ids:
+                        ids.append(sub.id)
+                    imdata.append(event)
+
+        sent = 0
+        for token, (ids, imdata) in events.items():
+            ws = self.sockets.get(token)
+            if ws is None:
+                continue
+            try:
+                ws.send_json({"subscriptionId": ids, "imdata": imdata})
+                sent += 1
+            except OSError:
+                self.sockets.pop(token, None)
+        return sent
+
+    def create_mo(self, parent_dn: str, cls: str, rn: str, **attrs: str) -> MO:
+        with self.tree.lock:
+            existed = f"{parent_dn}/{rn}" in self.tree.by_dn
+            mo = self.tree.add(self.tree.by_dn[parent_dn], cls, rn, **attrs)
+        if existed:
+            self.notify([mo], "modified", attrs)
+        else:
+            self.notify([mo], "created")
+        return mo
+
+    def modify_mo(self, dn: str, **attrs: str) -> MO:
+        with self.tree.lock:
+            mo = self.tree.by_dn[dn]
+            mo.attrs.update(attrs)
+        self.notify([mo], "modified", attrs)
+        return mo
+
+    def delete_mo(self, dn: str) -> List[MO]:
+        removed = self.tree.remove(dn)
+        self.notify(removed, "deleted", {})
+        return removed
+
+    # -------------------------------------------------------------------------
+    # Config POSTs
+    # -------------------------------------------------------------------------
+    def plan_config(self, dn: str, payload: Dict[str, Any]) -> List[Change]:
+        """
+        Validate a payload posted to dn, return its changes in order as
+        (status, cls, dn, attributes). Raises ValueError if it cannot apply.
+        """
+        changes: List[Change] = []
+        created = set()
+        with self.tree.lock:
+            for change in iter_payload(payload, expected=dn):
+                status, cls, mo_dn, _ = change
+                if status != "deleted" and mo_dn != "uni":
+                    container = split_dn(mo_dn)[0]
+                    if container not in created and container not in self.tree.by_dn:
+                        raise ValueError(f"{cls}: parent {container} does not exist")
+                    created.add(mo_dn)
+                changes.append(change)
+        return changes
+
+    def apply_config(self, changes: List[Change]) -> None:
+        with self.tree.lock:
+            for status, cls, dn, attrs in changes:
+                if status == "deleted":
+                    self.delete_mo(dn)
+                elif dn == "uni":
+                    self.tree.root.attrs.update(attrs)
+                else:
+                    parent, rn = split_dn(dn)
+                    self.create_mo(parent, cls, rn, **attrs)
+
+    def start(self) -> "MockAPICServer":
+        """Serve in a background daemon thread."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+        if self._thread:
+            self._thread.join()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8443)
+    parser.add_argument("--tenants", type=int, default=10)
+    parser.add_argument("--bds", type=int, default=20, help="BDs per tenant")
+    parser.add_argument("--subnets", type=int, default=2, help="subnets per BD")
+    parser.add_argument("--epgs", type=int, default=2, help="EPGs per BD")
+    parser.add_argument("--tree", help="load the tree from a JSON/YAML APIC export")
+    parser.add_argument("--dump-tree", help="write the tree as JSON and exit")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--token-timeout", type=float, default=600.0)
+    parser.add_argument("--max-post-mos", type=int, default=0)
+    parser.add_argument("--post-failure-rate", type=float, default=0.0)
+    parser.add_argument("--username")
+    parser.add_argument("--password")
+    args = parser.parse_args()
+
+    if args.tree:
+        tree = load_tree(args.tree)
+    else:
+        tree = synthetic_tree(args.tenants, args.bds, args.subnets, args.epgs)
+    if args.dump_tree:
+        with open(args.dump_tree, "w") as fd:
+            json.dump(tree.dump(), fd, indent=1)
+        logging.info(f"Wrote {len(tree)} MOs to {args.dump_tree}")
+        return
+
+    behaviour = MockBehaviour(
+        latency=args.latency,
+        username=args.username,
+        password=args.password,
+        token_timeout=args.token_timeout,
+        max_post_mos=args.max_post_mos,
+        post_failure_rate=args.post_failure_rate,
+    )
+    server = MockAPICServer(args.host, args.port, tree, behaviour)
+    logging.info(f"Mock APIC with {len(tree)} MOs listening on {server.address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+        handlers=[logging.StreamHandler()],
+    )
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+
+"""
+Benchmark bulk_config.push() against one POST per MO on the mock APIC.
+
+Builds tenants with a VRF, BDs (one subnet each) and one EPG per BD, then
+pushes them MO by MO (one tenant at a time, then --workers tenants at a
+time) and in batched transactions (--workers tenants at a time), reporting
+the requests and wall time of each. Every run starts from an empty fabric.
+
+Example:
+    ./bench_bulk_push.py --tenants 4 --bds 100 --latency 0.005
+"""
+
+import time
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Tuple
+
+from apic_mock import MockAPICServer, MockBehaviour, MOTree
+from bulk_config import ConfigBuilder, MONode, push
+from getBDs import ACIModule
+
+
+def build(tenants: int, bds: int) -> ConfigBuilder:
+    builder = ConfigBuilder()
+    for t in range(tenants):
+        tenant = builder.tenant(f"BULK{t}")
+        builder.vrf(tenant, "VRF1")
+        app = builder.app(tenant, "APP")
+        for b in range(bds):
+            bd = builder.bd(tenant, f"BD{b}", vrf="VRF1")
+            builder.subnet(bd, f"10.{t % 256}.{b % 256}.1/24")
+            builder.epg(app, f"EPG{b}", bd=f"BD{b}")
+    return builder
+
+
+def walk(node: MONode, dn: str) -> Iterator[Tuple[str, MONode]]:
+    """Every MO below node with its dn, parents first."""
+    for child in node.children:
+        child_dn = f"{dn}/{child.rn}"
+        yield child_dn, child
+        yield from walk(child, child_dn)
+
+
+def push_per_mo(aci: ACIModule, builder: ConfigBuilder, workers: int = 1) -> None:
+    """One POST per MO, parents first within a tenant, workers tenants at a time."""
+
+    def push_tenant(tenant: MONode) -> None:
+        dn = f"uni/{tenant.rn}"
+        aci.handle_req("post", f"mo/{dn}.json", tenant.payload(dn, []))
+        for child_dn, node in walk(tenant, dn):
+            aci.handle_req("post", f"mo/{child_dn}.json", node.payload(child_dn, []))
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        list(pool.map(push_tenant, builder.root.children))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tenants", type=int, default=4)
+    parser.add_argument("--bds", type=int, default=100, help="BDs per tenant")
+    parser.add_argument("--latency", type=float, default=0.002)
+    parser.add_argument("--max-mos", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    builder = build(args.tenants, args.bds)
+    print(
+        f"{builder.size()} MOs in {args.tenants} tenants, "
+        f"latency {args.latency * 1000:.1f} ms"
+    )
+    print(f"{'method':<16}{'requests':>10}{'seconds':>10}{'MOs':>8}")
+
+    runs = {
+        "per_mo x1": lambda aci: push_per_mo(aci, builder),
+        f"per_mo x{args.workers}": lambda aci: push_per_mo(aci, builder, args.workers),
+        f"bulk x{args.workers}": lambda aci: push(aci, builder, args.max_mos, args.workers),
+    }
+    for name, run in runs.items():
+        server = MockAPICServer(
+            tree=MOTree(), behaviour=MockBehaviour(latency=args.latency)
+        ).start()
+        try:
+            with ACIModule(server.address, "admin", "admin", scheme="http") as aci:
+                server.stats.reset()
+                start = time.perf_counter()
+                run(aci)
+                elapsed = time.perf_counter() - start
+            mos = len(server.tree) - 1
+            print(f"{name:<16}{server.stats.total:>10}{elapsed:>10.3f}{mos:>8}")
+            if mos != builder.size():
+                raise SystemExit(f"{name}: expected {builder.size()} MOs, got {mos}")
+        finally:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
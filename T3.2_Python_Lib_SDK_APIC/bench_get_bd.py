@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+
+"""
+Benchmark ACIModule.get_BD(subnet_address=...) against the mock APIC.
+
+Runs every BD_SUBNET_METHODS lookup on a synthetic fabric and reports the
+number of APIC requests and the wall time of each, with optional per
+request latency to model a remote controller.
+
+Example:
+    ./bench_get_bd.py --tenants 20 --bds 100 --latency 0.005
+"""
+
+import time
+import logging
+import argparse
+
+from apic_mock import MockAPICServer, MockBehaviour, synthetic_tree
+from getBDs import ACIModule
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tenants", type=int, default=10)
+    parser.add_argument("--bds", type=int, default=100, help="BDs per tenant")
+    parser.add_argument("--subnets", type=int, default=2, help="subnets per BD")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--subnet", default="10.3.7.1/24")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    tree = synthetic_tree(args.tenants, args.bds, args.subnets)
+    server = MockAPICServer(
+        tree=tree, behaviour=MockBehaviour(latency=args.latency)
+    ).start()
+    try:
+        aci = ACIModule(server.address, "admin", "admin", scheme="http")
+        print(
+            f"{args.tenants * args.bds} BDs, {len(tree)} MOs, "
+            f"latency {args.latency * 1000:.1f} ms, subnet {args.subnet}"
+        )
+        print(f"{'method':<12}{'requests':>10}{'seconds':>10}{'BDs':>6}")
+
+        results = {}
+        for method in ACIModule.BD_SUBNET_METHODS:
+            server.stats.reset()
+            start = time.perf_counter()
+            bds = aci.get_BD(subnet_address=args.subnet, method=method)
+            elapsed = time.perf_counter() - start
+            results[method] = sorted(bd["dn"] for bd in bds)
+            print(
+                f"{method:<12}{server.stats.total:>10}{elapsed:>10.3f}{len(bds):>6}"
+            )
+
+        if len({tuple(dns) for dns in results.values()}) != 1:
+            raise SystemExit(f"Methods returned different BDs: {results}")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
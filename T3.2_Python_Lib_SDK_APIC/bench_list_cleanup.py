@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+
+"""
+Benchmark aci_list_cleanup over resp.json() against mo_stream views.
+
+Writes a synthetic fvBD class query response with --objects entries, then
+parses it in a fresh process per method and reports the wall time and the
+peak memory above the process baseline:
+
+    json     - bytes, text and decoded tree in memory, aci_list_cleanup list
+    stream   - iter_mo_views over 64 KiB chunks, each view dropped after use
+    stream+  - iter_mo_views, every view kept in a list
+
+Example:
+    ./bench_list_cleanup.py --objects 500000
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import subprocess
+
+from mo_stream import CHUNK_SIZE, iter_mo_views
+
+METHODS = ("json", "stream", "stream+")
+
+
+def write_payload(path: str, objects: int) -> None:
+    with open(path, "w") as fd:
+        fd.write(f'{{"totalCount":"{objects}","imdata":[')
+        for n in range(objects):
+            attrs = {
+                "dn": f"uni/tn-T{n // 1000}/BD-BD{n}",
+                "name": f"BD{n}",
+                "arpFlood": "no",
+                "descr": "",
+                "ipLearning": "yes",
+                "limitIpLearnToSubnets": "yes",
+                "mac": "00:22:BD:F8:19:FF",
+                "modTs": "2024-05-01T10:00:00.000+00:00",
+                "unicastRoute": "yes",
+                "uid": str(15374 + n % 100),
+            }
+            if n:
+                fd.write(",")
+            fd.write(json.dumps({"fvBD": {"attributes": attrs}}, separators=(",", ":")))
+        fd.write("]}")
+
+
+def rss_kib() -> int:
+    with open("/proc/self/status") as fd:
+        for line in fd:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def chunks(path: str):
+    with open(path, "rb") as fd:
+        while True:
+            chunk = fd.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+def run(method: str, path: str) -> None:
+    """Parse path with method, print 'count seconds peak_kib' (child side)."""
+    from getBDs import ACIModule
+
+    baseline = rss_kib()
+    start = time.perf_counter()
+    if method == "json":
+        with open(path, "rb") as fd:
+            content = fd.read()
+        mos = ACIModule.aci_list_cleanup(None, json.loads(content.decode("utf-8"))["imdata"])
+        count = sum(1 for mo in mos if mo["dn"])
+    elif method == "stream":
+        count = sum(1 for mo in iter_mo_views(chunks(path)) if mo["dn"])
+    else:
+        mos = list(iter_mo_views(chunks(path)))
+        count = sum(1 for mo in mos if mo["dn"])
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline
+    print(count, f"{elapsed:.3f}", peak)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--objects", type=int, default=500000)
+    parser.add_argument("--run", choices=METHODS, help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        return run(args.run, args.path)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "fvBD.json")
+        write_payload(path, args.objects)
+        print(f"{args.objects} objects, {os.path.getsize(path) / 2**20:.1f} MiB payload")
+        print(f"{'method':<10}{'seconds':>10}{'peak MiB':>10}")
+        for method in METHODS:
+            out = subprocess.run(
+                [sys.executable, __file__, "--run", method, "--path", path],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout.split()
+            count, seconds, peak = int(out[0]), float(out[1]), int(out[2])
+            if count != args.objects:
+                raise SystemExit(f"{method}: parsed {count} of {args.objects} objects")
+            print(f"{method:<10}{seconds:>10.3f}{peak / 1024:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
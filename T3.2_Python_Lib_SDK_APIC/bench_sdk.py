@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+
+"""
+Benchmark suite for the ACIModule SDK calls against the mock APIC.
+
+Starts mock APICs on a synthetic fabric (or --tree) with optional per
+request latency, then times login, get_BD (every method, and from the MO
+cache), paginated and streamed class queries, a bulk config push and a
+multi-fabric fan-out. Each line reports the APIC requests, wall time and
+objects returned.
+
+Example:
+    ./bench_sdk.py --tenants 20 --bds 100 --latency 0.005
+"""
+
+import time
+import logging
+import argparse
+
+from apic_mock import MockAPICServer, MockBehaviour, load_tree, synthetic_tree
+from bulk_config import ConfigBuilder, push
+from getBDs import ACIModule
+from multi_fabric import Fabric, MultiFabricClient
+
+try:
+    from mo_cache import MOCache, websocket
+except ImportError:
+    websocket = None
+
+
+def timed(label, servers, func):
+    for server in servers:
+        server.stats.reset()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    requests = sum(server.stats.total for server in servers)
+    count = len(result) if isinstance(result, list) else result
+    print(f"{label:<32}{requests:>10}{elapsed:>10.3f}{count:>10}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tenants", type=int, default=10)
+    parser.add_argument("--bds", type=int, default=100, help="BDs per tenant")
+    parser.add_argument("--subnets", type=int, default=2, help="subnets per BD")
+    parser.add_argument("--tree", help="JSON/YAML tree for the mock, see apic_mock")
+    parser.add_argument("--latency", type=float, default=0.002)
+    parser.add_argument("--subnet", default="10.3.7.1/24")
+    parser.add_argument("--pagesize", type=int, default=500)
+    parser.add_argument("--fabrics", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=20, help="cached get_BD calls")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    def make_tree():
+        if args.tree:
+            return load_tree(args.tree)
+        return synthetic_tree(args.tenants, args.bds, args.subnets)
+
+    behaviour = MockBehaviour(latency=args.latency)
+    servers = [
+        MockAPICServer(tree=make_tree(), behaviour=behaviour).start()
+        for _ in range(max(1, args.fabrics))
+    ]
+    server = servers[0]
+    try:
+        print(
+            f"{len(server.tree)} MOs per fabric, latency {args.latency * 1000:.1f} ms, "
+            f"subnet {args.subnet}"
+        )
+        print(f"{'call':<32}{'requests':>10}{'seconds':>10}{'objects':>10}")
+
+        def login():
+            ACIModule(server.address, "admin", "admin", scheme="http").close()
+            return 1
+
+        timed("login", [server], login)
+        aci = ACIModule(server.address, "admin", "admin", scheme="http")
+
+        timed("get_BD all", [server], lambda: aci.get_BD())
+        for method in ACIModule.BD_SUBNET_METHODS:
+            timed(
+                f"get_BD subnet {method}",
+                [server],
+                lambda: aci.get_BD(subnet_address=args.subnet, method=method),
+            )
+
+        timed("fvSubnet class", [server], lambda: aci.handle_req("get", "class/fvSubnet.json"))
+        timed(
+            f"fvSubnet class page-size {args.pagesize}",
+            [server],
+            lambda: aci.handle_req("get", "class/fvSubnet.json", pagesize=args.pagesize),
+        )
+        timed("fvSubnet stream_mo", [server], lambda: sum(1 for _ in aci.stream_mo("class/fvSubnet.json")))
+
+        if websocket is not None:
+            aci.cache = MOCache(aci).start()
+            timed("get_BD cached, first", [server], lambda: aci.get_BD(subnet_address=args.subnet))
+            timed(
+                f"get_BD cached, next {args.repeat}",
+                [server],
+                lambda: sum(
+                    len(aci.get_BD(subnet_address=args.subnet)) for _ in range(args.repeat)
+                ),
+            )
+            aci.cache.close()
+            aci.cache = None
+        else:
+            print("get_BD cached                   skipped, websocket-client missing")
+
+        builder = ConfigBuilder()
+        tenant = builder.tenant("BENCH")
+        builder.vrf(tenant, "VRF1")
+        for b in range(args.bds):
+            bd = builder.bd(tenant, f"BD{b}", vrf="VRF1")
+            builder.subnet(bd, f"172.16.{b % 256}.1/24")
+        timed("bulk push", [server], lambda: sum(c.mos for c in push(aci, builder).chunks))
+        aci.close()
+
+        fabrics = [
+            Fabric(f"dc{n}", s.address, "admin", "admin", scheme="http")
+            for n, s in enumerate(servers)
+        ]
+        with MultiFabricClient(fabrics) as client:
+            timed(
+                f"multi-fabric get_BD x{len(servers)}",
+                servers,
+                lambda: client.get_BD(subnet_address=args.subnet).items,
+            )
+    finally:
+        for s in servers:
+            s.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+Bulk configuration push for ACIModule.
+
+A ConfigBuilder assembles an MO tree (polUni -> fvTenant -> children) and
+push() posts it as a few large transactions instead of one POST per MO.
+Every subtree of polUni (usually a tenant) is split into chunks of at most
+max_mos MOs, parents before children, and posted to its own DN. Chunks of
+one tenant are sent in order, tenants are pushed in parallel. A chunk that
+fails with a transient error (5xx, connection error) is retried on its
+own; a tenant stops at its first chunk that still fails, its remaining
+chunks are reported as skipped.
+
+    builder = ConfigBuilder()
+    tenant = builder.tenant("T1")
+    builder.vrf(tenant, "VRF1")
+    bd = builder.bd(tenant, "BD1", vrf="VRF1")
+    builder.subnet(bd, "10.1.1.1/24")
+    result = push(aci, builder, max_mos=500, workers=4)
+    print(result.summary())
+"""
+
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+import requests
+
+# MOs per POST, well below the APIC transaction limits
+MAX_MOS = 500
+
+# Tenants pushed in parallel
+PUSH_WORKERS = 4
+
+# Attempts per chunk, and the first backoff delay in seconds (doubled)
+RETRIES = 3
+RETRY_DELAY = 0.5
+
+
+class MONode(object):
+    """One MO of the tree to push, named by its rn under the parent."""
+
+    __slots__ = ("cls", "rn", "attrs", "children", "_index")
+
+    def __init__(self, cls: str, rn: str, **attrs: str) -> None:
+        self.cls = cls
+        self.rn = rn
+        self.attrs = attrs
+        self.children: List["MONode"] = []
+        self._index: Dict[str, "MONode"] = {}
+
+    def child(self, cls: str, rn: str, **attrs: str) -> "MONode":
+        """Get or create child rn, merging attrs."""
+        node = self._index.get(rn)
+        if node is None:
+            node = MONode(cls, rn, **attrs)
+            self._index[rn] = node
+            self.children.append(node)
+        else:
+            node.attrs.update(attrs)
+        return node
+
+    def size(self) -> int:
+        """MOs in this subtree, self included."""
+        return 1 + sum(child.size() for child in self.children)
+
+    def payload(self, dn: Optional[str] = None, children: Optional[List["MONode"]] = None) -> Dict[str, Any]:
+        """APIC JSON of this node, with dn (chunk roots) or rn, and children."""
+        attrs = dict(self.attrs)
+        if dn is not None:
+            attrs["dn"] = dn
+        else:
+            attrs["rn"] = self.rn
+        body: Dict[str, Any] = {"attributes": attrs}
+        children = self.children if children is None else children
+        if children:
+            body["children"] = [child.payload() for child in children]
+        return {self.cls: body}
+
+
+class ConfigBuilder(object):
+    """An MO tree rooted at polUni, with helpers for common tenant objects."""
+
+    def __init__(self) -> None:
+        self.root = MONode("polUni", "uni")
+
+    def tenant(self, name: str, **attrs: str) -> MONode:
+        return self.root.child("fvTenant", f"tn-{name}", name=name, **attrs)
+
+    def vrf(self, tenant: MONode, name: str, **attrs: str) -> MONode:
+        return tenant.child("fvCtx", f"ctx-{name}", name=name, **attrs)
+
+    def bd(self, tenant: MONode, name: str, vrf: Optional[str] = None, **attrs: str) -> MONode:
+        bd = tenant.child("fvBD", f"BD-{name}", name=name, **attrs)
+        if vrf:
+            bd.child("fvRsCtx", "rsctx", tnFvCtxName=vrf)
+        return bd
+
+    def subnet(self, bd: MONode, ip: str, **attrs: str) -> MONode:
+        return bd.child("fvSubnet", f"subnet-[{ip}]", ip=ip, **attrs)
+
+    def app(self, tenant: MONode, name: str, **attrs: str) -> MONode:
+        return tenant.child("fvAp", f"ap-{name}", name=name, **attrs)
+
+    def epg(self, app: MONode, name: str, bd: Optional[str] = None, **attrs: str) -> MONode:
+        epg = app.child("fvAEPg", f"epg-{name}", name=name, **attrs)
+        if bd:
+            epg.child("fvRsBd", "rsbd", tnFvBDName=bd)
+        return epg
+
+    def size(self) -> int:
+        return self.root.size() - 1
+
+
+# -----------------------------------------------------------------------------
+# Chunking
+# -----------------------------------------------------------------------------
+@dataclass
+class Chunk:
+    """One POST: the node at dn with a subset of its children subtrees."""
+
+    dn: str
+    node: MONode
+    children: List[MONode]
+    # MOs the chunk creates; later chunks of a dn re-post its root but do
+    # not count it again
+    mos: int
+
+    @property
+    def url(self) -> str:
+        return f"mo/{self.dn}.json"
+
+    def payload(self) -> Dict[str, Any]:
+        return self.node.payload(self.dn, self.children)
+
+
+def chunks(node: MONode, dn: str, max_mos: int = MAX_MOS) -> Iterator[Chunk]:
+    """
+    Split the subtree at dn into chunks of at most max_mos MOs.
+
+    Children subtrees are packed whole into chunks rooted at node; a child
+    too large for any chunk is posted after them, split the same way.
+    Every chunk comes after the chunk creating its root's parent.
+    """
+    if max_mos < 2:
+        raise ValueError("max_mos must be at least 2")
+    batch: List[MONode] = []
+    size = 1
+    emitted = False
+    oversized: List[MONode] = []
+    for child in node.children:
+        child_size = child.size()
+        if child_size + 1 > max_mos:
+            oversized.append(child)
+            continue
+        if size + child_size > max_mos:
+            yield Chunk(dn, node, batch, size - emitted)
+            emitted = True
+            batch, size = [], 1
+        batch.append(child)
+        size += child_size
+    if batch or not emitted:
+        yield Chunk(dn, node, batch, size - emitted)
+    for child in oversized:
+        yield from chunks(child, f"{dn}/{child.rn}", max_mos)
+
+
+# -----------------------------------------------------------------------------
+# Push
+# -----------------------------------------------------------------------------
+@dataclass
+class ChunkResult:
+    tenant: str
+    dn: str
+    mos: int
+    attempts: int = 0
+    # ok, failed or skipped
+    status: str = "skipped"
+    error: Optional[str] = None
+    duration: float = 0.0
+
+
+@dataclass
+class PushResult:
+    chunks: List[ChunkResult] = field(default_factory=list)
+    duration: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return all(chunk.status == "ok" for chunk in self.chunks)
+
+    @property
+    def failed(self) -> List[ChunkResult]:
+        return [chunk for chunk in self.chunks if chunk.status != "ok"]
+
+    def summary(self) -> str:
+        posted = [chunk for chunk in self.chunks if chunk.status == "ok"]
+        retried = sum(chunk.attempts - 1 for chunk in self.chunks if chunk.attempts > 1)
+        return (
+            f"{sum(c.mos for c in posted)} MOs in {len(posted)}/{len(self.chunks)} chunks, "
+            f"{retried} retries, {len(self.failed)} failed or skipped "
+            f"in {self.duration:.2f}s"
+        )
+
+
+def _transient(status_code: int) -> bool:
+    return status_code >= 500 or status_code == 429
+
+
+def _error_text(resp: requests.Response) -> str:
+    try:
+        for entry in resp.json().get("imdata", []):
+            return str(entry["error"]["attributes"]["text"])
+    except (ValueError, KeyError, TypeError, AttributeError):
+        pass
+    return resp.text[:200]
+
+
+def post_chunk(
+    aci: Any, chunk: Chunk, tenant: str = "", retries: int = RETRIES, delay: float = RETRY_DELAY
+) -> ChunkResult:
+    """POST one chunk, retrying it alone on transient errors."""
+    result = ChunkResult(tenant=tenant, dn=chunk.dn, mos=chunk.mos)
+    payload = chunk.payload()
+    start = time.perf_counter()
+    while True:
+        result.attempts += 1
+        retry = True
+        try:
+            resp = aci.post_json(chunk.url, payload)
+            if resp.status_code == 200:
+                result.status, result.error = "ok", None
+                break
+            result.error = f"{resp.status_code}: {_error_text(resp)}"
+            retry = _transient(resp.status_code)
+        except requests.RequestException as exc:
+            result.error = f"{type(exc).__name__}: {exc}"
+        if not retry or result.attempts >= retries:
+            result.status = "failed"
+            break
+        logging.warning(
+            f"{chunk.dn}: chunk of {chunk.mos} MOs failed ({result.error}), retrying"
+        )
+        time.sleep(delay * 2 ** (result.attempts - 1))
+    result.duration = time.perf_counter() - start
+    return result
+
+
+def push_subtree(
+    aci: Any, node: MONode, dn: str, max_mos: int = MAX_MOS, retries: int = RETRIES
+) -> List[ChunkResult]:
+    """Post one subtree of polUni chunk by chunk, stopping at a failed chunk."""
+    tenant = node.attrs.get("name", node.rn)
+    results: List[ChunkResult] = []
+    failed = False
+    for chunk in chunks(node, dn, max_mos):
+        if failed:
+            results.append(ChunkResult(tenant=tenant, dn=chunk.dn, mos=chunk.mos))
+            continue
+        result = post_chunk(aci, chunk, tenant, retries)
+        if result.status != "ok":
+            logging.error(f"{chunk.dn}: {result.error}, skipping the rest of {tenant}")
+            failed = True
+        results.append(result)
+    return results
+
+
+def push(
+    aci: Any,
+    builder: ConfigBuilder,
+    max_mos: int = MAX_MOS,
+    workers: int = PUSH_WORKERS,
+    retries: int = RETRIES,
+) -> PushResult:
+    """Push every subtree of the builder's polUni, workers tenants at a time."""
+    result = PushResult()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for chunk_results in pool.map(
+            lambda node: push_subtree(aci, node, f"uni/{node.rn}", max_mos, retries),
+            builder.root.children,
+        ):
+            result.chunks.extend(chunk_results)
+    result.duration = time.perf_counter() - start
+    return result
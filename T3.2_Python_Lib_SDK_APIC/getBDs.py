@@ -4,23 +4,93 @@ import json
 import urllib3
 import logging
 import os
-from typing import Any, cast, Optional
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Iterator, cast, Optional
+
+from aci_query import Q, Query, plan, split
+from mo_stream import CHUNK_SIZE, MOView, iter_mo_views
 
 urllib3.disable_warnings()  # type: ignore
 
+# Pages fetched in parallel by paginated GETs
+PAGE_WORKERS = 4
+
+# Refresh the session once this fraction of refreshTimeoutSeconds has passed
+REFRESH_AT = 0.5
+
+# Used when the APIC does not report refreshTimeoutSeconds
+DEFAULT_REFRESH_TIMEOUT = 600
+
+
+def parent_dn(dn: str) -> str:
+    """Parent DN, '/' inside [...] (e.g. subnet-[10.0.0.1/24]) is not a separator."""
+    depth = 0
+    for idx in range(len(dn) - 1, -1, -1):
+        char = dn[idx]
+        if char == "]":
+            depth += 1
+        elif char == "[":
+            depth -= 1
+        elif char == "/" and depth == 0:
+            return dn[:idx]
+    return ""
+
+
+def rn_of(dn: str) -> str:
+    """Relative name, the last element of dn."""
+    parent = parent_dn(dn)
+    return dn[len(parent) + 1 :] if parent else dn
+
 
 class ACIModule(object):
     """ACIModule class."""
 
-    def __init__(self, hostname: str, username: str, password: str) -> None:
-        """Init ACIModule class."""
+    # How get_BD resolves BDs by subnet, and its requests per call:
+    #   subtree - 1, fvBD class query keeping BDs with a matching fvSubnet child
+    #   class   - 2, fvSubnet class query, then the parent BDs by DN
+    #   per_bd  - 1 + number of BDs, one children query per BD
+    BD_SUBNET_METHODS = ("subtree", "class", "per_bd")
+
+    def __init__(
+        self,
+        hostname: str,
+        username: str,
+        password: str,
+        scheme: str = "https",
+        pagesize: int = 0,
+        page_workers: int = PAGE_WORKERS,
+        keepalive: bool = True,
+    ) -> None:
+        """Init ACIModule class.
+
+        pagesize: default page size of GETs, 0 fetches everything at once
+        page_workers: pages of one query fetched in parallel
+        keepalive: refresh the APIC session in a background thread
+        """
         self.username = username
         self.hostname = hostname
         self.password = password
         self.timeout = 30
         self.authenticated = False
+        self.pagesize = pagesize
+        self.page_workers = page_workers
+        self.keepalive = keepalive
 
-        self.base_url = "https://" + str(hostname) + "/api/"
+        # One session (and cookie jar) shared by every thread using this object
+        self.s = requests.session()
+        self.token: Optional[str] = None
+        self.refresh_timeout: float = DEFAULT_REFRESH_TIMEOUT
+        # Bumped on every login, so concurrent 403s trigger a single re-login
+        self._auth_generation = 0
+        self._auth_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._keepalive_thread: Optional[threading.Thread] = None
+        # Optional mo_cache.MOCache serving class reads locally
+        self.cache: Optional[Any] = None
+
+        self.base_url = scheme + "://" + str(hostname) + "/api/"
 
         if not self.authenticated:
             if not self.login():
@@ -28,53 +98,124 @@ class ACIModule(object):
 
     def login(self) -> bool:
         """Login to ACI APIC Controller."""
-        base_url = "https://" + str(self.hostname) + "/api/"
         auth_bit = "aaaLogin.json"
-        auth_url = base_url + auth_bit
+        auth_url = self.base_url + auth_bit
 
         auth_data = {
             "aaaUser": {"attributes": {"name": self.username, "pwd": self.password}}
         }
 
-        self.s = requests.session()
-        resp = self.s.post(auth_url, verify=False, data=json.dumps(auth_data))
+        resp = self.s.post(
+            auth_url, verify=False, data=json.dumps(auth_data), timeout=self.timeout
+        )
 
         # Optional: basic sanity check (APIC usually returns 200 on success)
         if resp.status_code != 200:
             logging.error("Login failed: %s %s", resp.status_code, resp.text)
             return False
 
+        self._update_token(resp.json())
+        self._auth_generation += 1
         self.authenticated = True
+        if self.keepalive and self._keepalive_thread is None:
+            self._keepalive_thread = threading.Thread(
+                target=self._keepalive, name="aci-keepalive", daemon=True
+            )
+            self._keepalive_thread.start()
         return True
 
+    # ==========================
+    # Session keepalive
+    def _update_token(self, result: dict[str, Any]) -> None:
+        """Record token and refreshTimeoutSeconds of aaaLogin/aaaRefresh."""
+        for entry in result.get("imdata", []):
+            attrs = entry.get("aaaLogin", {}).get("attributes", {})
+            if attrs:
+                self.token = attrs.get("token", self.token)
+                self.refresh_timeout = float(
+                    attrs.get("refreshTimeoutSeconds") or DEFAULT_REFRESH_TIMEOUT
+                )
+
+    def _relogin(self, generation: int) -> bool:
+        """Log in again unless another thread already did since generation."""
+        with self._auth_lock:
+            if self._auth_generation != generation:
+                return True
+            logging.info("APIC session expired, logging in again")
+            return self.login()
+
+    def refresh(self) -> bool:
+        """Extend the session with aaaRefresh, log in again if that fails."""
+        generation = self._auth_generation
+        try:
+            resp = self.s.get(
+                self.base_url + "aaaRefresh.json", verify=False, timeout=self.timeout
+            )
+            if resp.status_code == 200:
+                self._update_token(resp.json())
+                logging.debug("APIC session refreshed")
+                return True
+            logging.warning("aaaRefresh failed: %s", resp.status_code)
+        except requests.RequestException as exc:
+            logging.warning("aaaRefresh failed: %s", exc)
+        return self._relogin(generation)
+
+    def _keepalive(self) -> None:
+        while not self._stop.wait(max(1.0, self.refresh_timeout * REFRESH_AT)):
+            try:
+                self.refresh()
+            except Exception:
+                logging.exception("APIC keepalive error")
+
+    def _request(self, method: str, req_url: str, **kwargs: Any) -> requests.Response:
+        """Send a request, logging in again and retrying once on 403."""
+        # Without a timeout a black-holed APIC blocks the caller forever
+        kwargs.setdefault("timeout", self.timeout)
+        generation = self._auth_generation
+        resp = self.s.request(method, req_url, verify=False, **kwargs)
+        if resp.status_code == 403 and self._relogin(generation):
+            resp.close()
+            resp = self.s.request(method, req_url, verify=False, **kwargs)
+        return resp
+
+    def close(self) -> None:
+        """Stop the keepalive thread and close the HTTP session."""
+        if self.cache is not None:
+            self.cache.close()
+            self.cache = None
+        self._stop.set()
+        if self._keepalive_thread is not None:
+            self._keepalive_thread.join()
+            self._keepalive_thread = None
+        self.s.close()
+
+    def __enter__(self) -> "ACIModule":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
     def handle_req(
         self,
         reqType: str,
         url: str,
         data: Optional[dict[Any, Any]] = None,
-        pagesize: int = 100,
+        pagesize: Optional[int] = None,
     ) -> list[dict[str, Any]]:
-        """Perform request towards APIC controller."""
+        """Perform request towards APIC controller.
+
+        GETs are paginated when pagesize (default self.pagesize) is > 0.
+        """
         logging.debug("handle_req init")
-        req_url = self.base_url + url
 
         if data is None:
             data = {}
 
         if reqType == "get":
-            logging.debug("handle_req get %s", req_url)
-            session_response = self.s.get(req_url, verify=False)
-            if session_response.status_code == 200:
-                result = session_response.json()
-                result_typed = cast(list[dict[str, Any]], result.get("imdata", []))
-                return result_typed
-            raise Exception(f"Unhandled status_code: {session_response.status_code}")
+            return list(self.iter_imdata(url, pagesize))
 
         if reqType == "post":
-            logging.debug("handle_req post %s", req_url)
-            session_response = self.s.post(
-                req_url, verify=False, data=json.dumps(data)
-            )
+            session_response = self.post_json(url, data)
             if session_response.status_code == 200:
                 result = session_response.json()
                 result_typed = cast(list[dict[str, Any]], result.get("imdata", []))
@@ -90,47 +231,171 @@ class ACIModule(object):
 
         raise Exception("Unhandled handle_req scenario")
 
+    def post_json(self, url: str, data: dict[str, Any]) -> requests.Response:
+        """POST data to url, returning the response whatever its status."""
+        logging.debug("handle_req post %s", self.base_url + url)
+        return self._request("post", self.base_url + url, data=json.dumps(data))
+
+    # ==========================
+    # Paginated GETs
+    def _get_json(self, url: str) -> dict[str, Any]:
+        req_url = self.base_url + url
+        logging.debug("handle_req get %s", req_url)
+        session_response = self._request("get", req_url)
+        if session_response.status_code == 200:
+            return cast(dict[str, Any], session_response.json())
+        raise Exception(f"Unhandled status_code: {session_response.status_code}")
+
+    @staticmethod
+    def _paged_url(url: str, page: int, pagesize: int) -> str:
+        """Add page/page-size, and a stable order for class queries."""
+        extra = f"page={page}&page-size={pagesize}"
+        path = url.split("?", 1)[0]
+        if "order-by=" not in url and path.startswith("class/"):
+            cls = path[len("class/") :].rsplit(".", 1)[0]
+            extra += f"&order-by={cls}.dn"
+        return f"{url}{'&' if '?' in url else '?'}{extra}"
+
+    def iter_pages(
+        self, url: str, pagesize: Optional[int] = None
+    ) -> Iterator[list[dict[str, Any]]]:
+        """
+        Yield the imdata of every page of a GET, in order.
+
+        The first page gives totalCount; the remaining pages are fetched
+        by page_workers threads on the shared session, at most two pages
+        per worker ahead of the consumer.
+        """
+        pagesize = self.pagesize if pagesize is None else pagesize
+        if pagesize <= 0:
+            yield self._get_json(url).get("imdata", [])
+            return
+
+        first = self._get_json(self._paged_url(url, 0, pagesize))
+        yield first.get("imdata", [])
+        pages = -(-int(first.get("totalCount", 0)) // pagesize)
+        if pages <= 1:
+            return
+
+        pool = ThreadPoolExecutor(max_workers=self.page_workers)
+        pending: deque[Future[dict[str, Any]]] = deque()
+        next_page = 1
+        try:
+            while next_page < pages or pending:
+                while next_page < pages and len(pending) < self.page_workers * 2:
+                    pending.append(
+                        pool.submit(
+                            self._get_json, self._paged_url(url, next_page, pagesize)
+                        )
+                    )
+                    next_page += 1
+                yield pending.popleft().result().get("imdata", [])
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def iter_imdata(
+        self, url: str, pagesize: Optional[int] = None
+    ) -> Iterator[dict[str, Any]]:
+        """Yield raw imdata entries as pages arrive."""
+        for page in self.iter_pages(url, pagesize):
+            yield from page
+
+    def iter_mo(
+        self, url: str, pagesize: Optional[int] = None
+    ) -> Iterator[dict[str, str]]:
+        """Yield MOs in aci_list_cleanup format as pages arrive."""
+        for page in self.iter_pages(url, pagesize):
+            yield from self.aci_list_cleanup(page)
+
+    def stream_mo(self, url: str) -> Iterator[MOView]:
+        """Yield read-only MO views of a GET, decoded while it downloads.
+
+        Unlike handle_req/iter_mo the response is never held in memory as
+        a whole, see mo_stream. No pagination is added to url.
+        """
+        resp = self._request("get", self.base_url + url, stream=True)
+        with resp:
+            if resp.status_code != 200:
+                raise Exception(f"Unhandled status_code: {resp.status_code}")
+            yield from iter_mo_views(resp.iter_content(CHUNK_SIZE))
+
+    # ==========================
+    # Query DSL
+    def select(self, query: Query) -> list[dict[str, str]]:
+        """MOs matching an aci_query.Query, filtered on the APIC."""
+        return self.select_many([query])[0]
+
+    def select_many(self, queries: list[Query]) -> list[list[dict[str, str]]]:
+        """Results of several queries, merged into as few requests as possible.
+
+        The planned requests run in parallel on page_workers threads.
+        """
+        requests_ = plan(queries)
+
+        def fetch(request: Any) -> dict[int, list[dict[str, str]]]:
+            rows = [
+                (cls, body.get("attributes", {}))
+                for entry in self.handle_req("get", request.url)
+                for cls, body in entry.items()
+            ]
+            return split(request, rows)
+
+        results: list[list[dict[str, str]]] = [[] for _ in queries]
+        if len(requests_) == 1:
+            answers = [fetch(requests_[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=self.page_workers) as pool:
+                answers = list(pool.map(fetch, requests_))
+        for answer in answers:
+            for index, items in answer.items():
+                results[index] = items
+        return results
+
     # ==========================
-    # TODO VERSION (practice)
-    def get_BD(self, subnet_address: Optional[str] = None) -> list[dict[str, str]]:
+    # Subscriptions
+    def subscribe(self, url: str) -> tuple[Optional[str], list[dict[str, Any]]]:
+        """GET url with subscription=yes, return (subscriptionId, imdata).
+
+        Events are pushed to the WebSocket of the current token, which must
+        be open before subscribing (see mo_cache.MOCache).
+        """
+        result = self._get_json(f"{url}{'&' if '?' in url else '?'}subscription=yes")
+        return result.get("subscriptionId"), result.get("imdata", [])
+
+    def refresh_subscription(self, subscription_id: str) -> bool:
+        """Keep a subscription alive, the APIC drops it after 90s otherwise."""
+        resp = self._request(
+            "get", self.base_url + f"subscriptionRefresh.json?id={subscription_id}"
+        )
+        return resp.status_code == 200
+
+    # ==========================
+    # Bridge domains
+    def get_BD(
+        self, subnet_address: Optional[str] = None, method: str = "subtree"
+    ) -> list[dict[str, str]]:
         """
         Get all BDs or filter BDs by subnet (fvSubnet).
 
-        TODO requirements:
-        If subnet_address is provided:
-        - Return ONLY the BDs (fvBD) that have a child fvSubnet with ip == subnet_address
-        - Use ACI filtering methods (query-target + target-subtree-class + query-target-filter)
-        - Return output in aci_list_cleanup format (already implemented)
-        If subnet_address is NOT provided:
-        - Return all BDs (same behavior as before)
+        If subnet_address is provided, return ONLY the BDs (fvBD) that have a
+        child fvSubnet with ip == subnet_address, resolved with method (see
+        BD_SUBNET_METHODS). Otherwise return all BDs. Output is in
+        aci_list_cleanup format.
         """
         logging.debug("get_BD init")
 
+        if self.cache is not None:
+            return self._get_BD_cached(subnet_address)
+
         if subnet_address:
-            logging.debug("get_BD init Subnet case")
-
-            # 1) Get all Bridge Domains (BDs)
-            bds = self.handle_req("get", "class/fvBD.json")
-            bds = self.aci_list_cleanup(bds)
-
-            bds_return: list[dict[str, str]] = []
-
-            for bd in bds:
-                # TODO 1: get the BD DN (bd["dn"])
-                # TODO 2: build bd_obj_address = f"node/mo/{dn}.json"
-                # TODO 3: build subnet_querystring that:
-                #   - query-target=children
-                #   - target-subtree-class=fvSubnet
-                #   - query-target-filter=eq(fvSubnet.ip,"<subnet address>")
-                # TODO 4: call handle_req("get", f"{bd_obj_address}?{subnet_querystring}")
-                # TODO 5: cleanup with aci_list_cleanup
-                # TODO 6: if any returned fvSubnet has ip == subnet_address:
-                #   - append the BD once to bds_return
-                #   - break (do not duplicate BD)
-                pass  # remove after implementing TODOs
-
-            # TODO 7: return bds_return after checking all BDs
-            return bds_return
+            logging.debug("get_BD init Subnet case (%s)", method)
+            if method == "subtree":
+                return self._get_BD_subtree(subnet_address)
+            if method == "class":
+                return self._get_BD_by_subnet_class(subnet_address)
+            if method == "per_bd":
+                return self._get_BD_per_bd(subnet_address)
+            raise ValueError(f"Unknown get_BD method '{method}'")
 
         # Non-subnet case: return all BDs
         logging.debug("get_BD init Non subnet case")
@@ -138,19 +403,71 @@ class ACIModule(object):
         bd_cleaned = self.aci_list_cleanup(BD)
         return bd_cleaned
 
+    def _get_BD_cached(self, subnet_address: Optional[str]) -> list[dict[str, str]]:
+        """Served from the MO cache, only cache misses reach the APIC."""
+        if not subnet_address:
+            return self.cache.get_class("fvBD")
+        subnets = self.cache.get_class(
+            "fvSubnet", lambda subnet: subnet.get("ip") == subnet_address
+        )
+        bd_dns = dict.fromkeys(parent_dn(subnet["dn"]) for subnet in subnets)
+        return self.cache.get_dns("fvBD", bd_dns)
+
+    def _get_BD_subtree(self, subnet_address: str) -> list[dict[str, str]]:
+        """One request: BDs whose fvSubnet children match, filtered on the APIC."""
+        return self.select(
+            Query("fvBD").having("fvSubnet", Q.fvSubnet.ip == subnet_address)
+        )
+
+    def _get_BD_by_subnet_class(self, subnet_address: str) -> list[dict[str, str]]:
+        """Two requests: matching fvSubnets, then their parent BDs by DN."""
+        subnets = self.select(Query("fvSubnet", Q.fvSubnet.ip == subnet_address))
+
+        # fvSubnet also lives under EPGs, keep the ones held by a BD
+        bd_dns: list[str] = []
+        for subnet in subnets:
+            dn = parent_dn(subnet["dn"])
+            if rn_of(dn).startswith("BD-") and dn not in bd_dns:
+                bd_dns.append(dn)
+
+        # DN lookups are merged, aci_query.DN_FILTER_CHUNK BDs per request
+        found = self.select_many([Query("fvBD", Q.fvBD.dn == dn) for dn in bd_dns])
+        return [bd for bds in found for bd in bds]
+
+    def _get_BD_per_bd(self, subnet_address: str) -> list[dict[str, str]]:
+        """All BDs, then one children query per BD (1 + number of BDs requests)."""
+        bds = self.handle_req("get", "class/fvBD.json")
+        bds = self.aci_list_cleanup(bds)
+
+        bds_return: list[dict[str, str]] = []
+
+        for bd in bds:
+            bd_obj_address = f"node/mo/{bd['dn']}.json"
+            subnet_querystring = (
+                "query-target=children"
+                "&target-subtree-class=fvSubnet"
+                f'&query-target-filter=eq(fvSubnet.ip,"{subnet_address}")'
+            )
+            subnets = self.handle_req("get", f"{bd_obj_address}?{subnet_querystring}")
+            for subnet in self.aci_list_cleanup(subnets):
+                if subnet.get("ip") == subnet_address:
+                    bds_return.append(bd)
+                    break
+
+        return bds_return
+
     def aci_list_cleanup(self, data: list[dict[str, Any]]) -> list[dict[str, str]]:
         """Reformat returned data from APIC controller."""
         # ACI outputs in a format [mo]['attributes'][data]
         # sanitizing this output data to simple list
 
-        return_data: list[dict[str, str]] = []
-        for entry in data:
-            for key in entry:
-                attrs = entry[key].get("attributes", {})
-                if isinstance(attrs, dict):
-                    # Cast values to str-ish dict for your original return typing
-                    return_data.append(cast(dict[str, str], attrs))
-        return return_data
+        # The attributes dicts are returned as they are, not copied
+        return [
+            attrs
+            for entry in data
+            for body in entry.values()
+            if isinstance(attrs := body.get("attributes", {}), dict)
+        ]
 
 
 if __name__ == "__main__":
@@ -169,7 +486,8 @@ if __name__ == "__main__":
 
     logging.info("getBDs.py initialized")
 
-    hostname = "192.168.181.22"
+    hostname = os.environ.get("ACI_VAR_HOST", "192.168.181.22")
+    scheme = os.environ.get("ACI_VAR_SCHEME", "https")
     username = os.environ["ACI_VAR_USER"]
     password = os.environ["ACI_VAR_PASS"]
 
@@ -180,10 +498,24 @@ if __name__ == "__main__":
     if len(os.sys.argv) > 1:
         subnet_address = os.sys.argv[1]
 
-    ACI = ACIModule(hostname, username, password)
+    ACI = ACIModule(
+        hostname,
+        username,
+        password,
+        scheme=scheme,
+        pagesize=int(os.environ.get("ACI_VAR_PSIZE", "0")),
+    )
+    if os.environ.get("ACI_VAR_CACHE") == "1":
+        from mo_cache import MOCache
+
+        ACI.cache = MOCache(ACI).start()
 
-    bds = ACI.get_BD(subnet_address=subnet_address)
+    bds = ACI.get_BD(
+        subnet_address=subnet_address,
+        method=os.environ.get("ACI_VAR_BD_METHOD", "subtree"),
+    )
 
     print("Total Count: " + str(len(bds)) + " objects.")
     # Optional: print results
     # print(json.dumps(bds, indent=2))
+    ACI.close()
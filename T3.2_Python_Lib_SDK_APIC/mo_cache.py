@@ -0,0 +1,292 @@
+"""
+In-process MO cache for ACIModule, kept fresh by APIC subscriptions.
+
+The first read of a class loads it with a subscription=yes class query;
+later reads are served locally. The APIC pushes created/modified/deleted
+events for subscribed classes over the session WebSocket
+(wss://<apic>/socket<token>), and they are applied to the cached tables,
+so only changes cross the wire.
+
+Nothing is served from the cache unless the WebSocket is up: when it drops,
+or the session is re-established with a new token, every table is dropped
+and reads go to the APIC until the classes are loaded again.
+
+Requires websocket-client (pip install websocket-client).
+
+    aci = ACIModule(hostname, username, password)
+    aci.cache = MOCache(aci).start()
+    aci.get_BD(subnet_address="10.0.1.1/24")   # loads fvBD and fvSubnet
+    aci.get_BD(subnet_address="10.0.2.1/24")   # no APIC request
+"""
+
+import ssl
+import json
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+try:
+    import websocket
+except ImportError:  # pragma: no cover
+    websocket = None
+
+# Subscriptions expire after 90s on the APIC unless refreshed
+SUBSCRIPTION_REFRESH = 30.0
+
+# Seconds between WebSocket reconnect attempts, doubled up to the maximum
+RECONNECT_MIN = 1.0
+RECONNECT_MAX = 30.0
+
+
+class MOCache(object):
+    """
+    Class tables (dn -> attributes) of an ACIModule session.
+
+    aci: a logged-in ACIModule
+    refresh_interval: seconds between subscriptionRefresh calls
+    """
+
+    def __init__(self, aci: Any, refresh_interval: float = SUBSCRIPTION_REFRESH) -> None:
+        if websocket is None:
+            raise RuntimeError("MOCache requires websocket-client")
+        self.aci = aci
+        self.refresh_interval = refresh_interval
+        self.hits = 0
+        self.misses = 0
+
+        # class -> dn -> attributes
+        self._tables: Dict[str, Dict[str, Dict[str, str]]] = {}
+        # subscriptionId -> class
+        self._subscriptions: Dict[str, str] = {}
+        # class -> events received while its snapshot is being loaded
+        self._pending: Dict[str, List[Dict[str, str]]] = {}
+        self._lock = threading.RLock()
+        self._load_lock = threading.Lock()
+
+        self._ws: Optional[Any] = None
+        self._generation = -1
+        self._connected = threading.Event()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    # -------------------------------------------------------------------------
+    # Lifecycle
+    # -------------------------------------------------------------------------
+    def start(self, timeout: float = 10.0) -> "MOCache":
+        """Open the WebSocket and start the refresh thread."""
+        for target, name in ((self._run, "aci-cache-ws"), (self._refresh, "aci-cache-refresh")):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        if not self._connected.wait(timeout):
+            logging.warning("APIC WebSocket not connected, reads bypass the cache")
+        return self
+
+    def close(self) -> None:
+        self._stop.set()
+        self._close_socket()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        """Drop every table, the next reads reload from the APIC."""
+        with self._lock:
+            self._tables.clear()
+            self._subscriptions.clear()
+            self._pending.clear()
+
+    @property
+    def connected(self) -> bool:
+        return self._connected.is_set()
+
+    # -------------------------------------------------------------------------
+    # Reads
+    # -------------------------------------------------------------------------
+    def get_class(
+        self, cls: str, where: Optional[Callable[[Dict[str, str]], bool]] = None
+    ) -> List[Dict[str, str]]:
+        """
+        MOs of cls in aci_list_cleanup format, only those where(attrs) is
+        true if given. The filter runs before anything is copied.
+        """
+        with self._lock:
+            table = self._tables.get(cls)
+            if table is not None:
+                self.hits += 1
+                return [dict(attrs) for attrs in table.values() if where is None or where(attrs)]
+        self.misses += 1
+        if not self.connected:
+            mos = self.aci.aci_list_cleanup(self.aci.handle_req("get", f"class/{cls}.json"))
+        else:
+            mos = self._load(cls)
+        return mos if where is None else [attrs for attrs in mos if where(attrs)]
+
+    def get_dns(self, cls: str, dns: Iterable[str]) -> List[Dict[str, str]]:
+        """MOs of cls with the given DNs, in dns order, looked up by dn."""
+        dns = list(dns)
+        with self._lock:
+            table = self._tables.get(cls)
+            if table is not None:
+                self.hits += 1
+                return [dict(table[dn]) for dn in dns if dn in table]
+        wanted = set(dns)
+        found = self.get_class(cls, lambda attrs: attrs["dn"] in wanted)
+        by_dn = {attrs["dn"]: attrs for attrs in found}
+        return [by_dn[dn] for dn in dns if dn in by_dn]
+
+    def get(self, dn: str) -> Optional[Dict[str, str]]:
+        """MO dn from the loaded tables, None if no loaded class holds it."""
+        with self._lock:
+            for table in self._tables.values():
+                attrs = table.get(dn)
+                if attrs is not None:
+                    return dict(attrs)
+        return None
+
+    def _load(self, cls: str) -> List[Dict[str, str]]:
+        with self._load_lock:
+            with self._lock:
+                table = self._tables.get(cls)
+                if table is not None:
+                    return [dict(attrs) for attrs in table.values()]
+                self._pending[cls] = []
+                generation = self._generation
+
+            try:
+                sub_id, imdata = self.aci.subscribe(f"class/{cls}.json")
+            except Exception:
+                with self._lock:
+                    self._pending.pop(cls, None)
+                raise
+            mos = self.aci.aci_list_cleanup(imdata)
+
+            with self._lock:
+                pending = self._pending.pop(cls, None)
+                if (
+                    sub_id is None
+                    or pending is None
+                    or generation != self._generation
+                    or generation != self.aci._auth_generation
+                ):
+                    # The socket dropped or the session changed while loading,
+                    # events for this subscription may have been lost
+                    logging.debug("Not caching %s, subscription not usable", cls)
+                    return mos
+                table = {attrs["dn"]: dict(attrs) for attrs in mos}
+                if not all(self._apply(cls, table, event) for event in pending):
+                    # An event the snapshot cannot explain, load it again
+                    # on the next read
+                    return mos
+                self._tables[cls] = table
+                self._subscriptions[sub_id] = cls
+            logging.debug("Cached %d %s MOs (subscription %s)", len(mos), cls, sub_id)
+            return mos
+
+    # -------------------------------------------------------------------------
+    # Events
+    # -------------------------------------------------------------------------
+    def _apply(self, cls: str, table: Dict[str, Dict[str, str]], attrs: Dict[str, str]) -> bool:
+        """Apply one event to table, False if the table is no longer consistent."""
+        dn = attrs.get("dn")
+        if not dn:
+            return True
+        status = attrs.get("status")
+        changed = {key: value for key, value in attrs.items() if key != "status"}
+        if status == "deleted":
+            table.pop(dn, None)
+        elif status == "created":
+            table[dn] = changed
+        elif dn in table:
+            table[dn].update(changed)
+        else:
+            # A partial update of an MO we never saw, reload the class
+            logging.debug("Unknown %s %s modified, dropping the table", cls, dn)
+            return False
+        return True
+
+    def on_message(self, message: str) -> None:
+        """Apply one APIC event message ({"subscriptionId": [...], "imdata": [...]})."""
+        data = json.loads(message)
+        with self._lock:
+            for entry in data.get("imdata", []):
+                for cls, body in entry.items():
+                    attrs = body.get("attributes", {})
+                    if cls in self._pending:
+                        self._pending[cls].append(attrs)
+                    table = self._tables.get(cls)
+                    if table is not None and not self._apply(cls, table, attrs):
+                        self._tables.pop(cls, None)
+
+    # -------------------------------------------------------------------------
+    # Threads
+    # -------------------------------------------------------------------------
+    def _socket_url(self) -> str:
+        scheme = "wss" if self.aci.base_url.startswith("https") else "ws"
+        return f"{scheme}://{self.aci.hostname}/socket{self.aci.token}"
+
+    def _close_socket(self) -> None:
+        ws = self._ws
+        if ws is not None:
+            try:
+                ws.close()
+            except Exception:
+                pass
+
+    def _run(self) -> None:
+        delay = RECONNECT_MIN
+        while not self._stop.is_set():
+            try:
+                generation = self.aci._auth_generation
+                ws = websocket.create_connection(
+                    self._socket_url(),
+                    timeout=self.aci.timeout,
+                    sslopt={"cert_reqs": ssl.CERT_NONE},
+                )
+                ws.settimeout(None)
+                with self._lock:
+                    self._ws = ws
+                    self._generation = generation
+                self._connected.set()
+                logging.info("APIC WebSocket connected")
+                delay = RECONNECT_MIN
+                while not self._stop.is_set():
+                    message = ws.recv()
+                    if not message:
+                        break
+                    self.on_message(message)
+            except Exception as exc:
+                if not self._stop.is_set():
+                    logging.warning("APIC WebSocket error: %s", exc)
+            finally:
+                self._connected.clear()
+                self._close_socket()
+                with self._lock:
+                    self._ws = None
+                    self._generation = -1
+                self.invalidate()
+            if self._stop.wait(delay):
+                return
+            delay = min(delay * 2, RECONNECT_MAX)
+
+    def _refresh(self) -> None:
+        while not self._stop.wait(self.refresh_interval):
+            if self.connected and self._generation != self.aci._auth_generation:
+                # New token after a re-login, the socket and its
+                # subscriptions belong to the old one
+                logging.info("APIC session changed, reconnecting the WebSocket")
+                self._close_socket()
+                continue
+            with self._lock:
+                subscriptions = list(self._subscriptions.items())
+            for sub_id, cls in subscriptions:
+                try:
+                    alive = self.aci.refresh_subscription(sub_id)
+                except Exception as exc:
+                    logging.warning("subscriptionRefresh failed: %s", exc)
+                    alive = False
+                if not alive:
+                    with self._lock:
+                        self._subscriptions.pop(sub_id, None)
+                        self._tables.pop(cls, None)
@@ -0,0 +1,269 @@
+"""
+Streaming parse of APIC responses into read-only MO views.
+
+resp.json() holds the whole response text and the whole decoded tree
+({"imdata": [{cls: {"attributes": {...}}}, ...]}) in memory at once, and
+aci_list_cleanup then builds a second list over it. iter_mo_views() reads
+the response in chunks and decodes one imdata entry at a time, so only
+the entries the caller keeps stay alive, each as a compact MOView.
+Entries larger than a chunk (e.g. rsp-subtree=full) are decoded member by
+member as the chunks arrive, in linear time.
+
+    for mo in aci.stream_mo("class/fvBD.json"):
+        print(mo.cls, mo.dn, mo["name"])
+"""
+
+import json
+import codecs
+import json.scanner
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Bytes read from the response per chunk
+CHUNK_SIZE = 1 << 16
+
+_WHITESPACE = " \t\n\r"
+_DELIMITERS = _WHITESPACE + ",]}"
+
+
+# (attribute names, name -> position) shared by every MO with the same names
+Schema = Tuple[Tuple[str, ...], Dict[str, int]]
+
+_schemas: Dict[Tuple[str, ...], Schema] = {}
+
+
+def _schema(keys: Tuple[str, ...]) -> Schema:
+    schema = _schemas.get(keys)
+    if schema is None:
+        schema = _schemas.setdefault(keys, (keys, {key: i for i, key in enumerate(keys)}))
+    return schema
+
+
+class MOView(Mapping):
+    """
+    Read-only view of one MO: its class and attributes.
+
+    Behaves like the dicts of aci_list_cleanup (mo["dn"], mo.get("name"),
+    dict(mo)). The values are kept in a tuple and the attribute names in a
+    schema shared by all MOs of the same class, instead of one dict per MO.
+    """
+
+    __slots__ = ("cls", "_schema", "_values")
+
+    def __init__(self, cls: str, attrs: Dict[str, str]) -> None:
+        object.__setattr__(self, "cls", cls)
+        object.__setattr__(self, "_schema", _schema(tuple(attrs)))
+        object.__setattr__(self, "_values", tuple(attrs.values()))
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("MOView is read-only")
+
+    def __getitem__(self, key: str) -> str:
+        return self._values[self._schema[1][key]]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._schema[1]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._schema[0])
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    @property
+    def dn(self) -> str:
+        return self.get("dn", "")
+
+    def __repr__(self) -> str:
+        return f"MOView({self.cls}, {self.dn})"
+
+
+# Slot setters, used to build views without going through __setattr__
+_set_cls = MOView.__dict__["cls"].__set__
+_set_schema = MOView.__dict__["_schema"].__set__
+_set_values = MOView.__dict__["_values"].__set__
+
+
+def _new_view(cls: str, attrs: Dict[str, str]) -> MOView:
+    """MOView(cls, attrs), about a third faster."""
+    view = object.__new__(MOView)
+    _set_cls(view, cls)
+    _set_schema(view, _schema(tuple(attrs)))
+    _set_values(view, tuple(attrs.values()))
+    return view
+
+
+class _Reader(object):
+    """Decoded text of a byte chunk stream, consumed from the front."""
+
+    def __init__(self, chunks: Iterable[bytes]) -> None:
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def more(self) -> bool:
+        """Append the next chunk to buf, False at the end of the stream."""
+        if self.eof:
+            return False
+        # Drop what was consumed so buf does not grow with the response
+        self.buf = self.buf[self.pos :]
+        self.pos = 0
+        for chunk in self._chunks:
+            text = self._decoder.decode(chunk)
+            if text:
+                self.buf += text
+                return True
+        self.buf += self._decoder.decode(b"", final=True)
+        self.eof = True
+        return False
+
+    def skip_whitespace(self) -> Optional[str]:
+        """Next non-whitespace character (not consumed), None at the end."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.more():
+                return None
+
+    def find(self, text: str) -> bool:
+        """Move past the next occurrence of text."""
+        while True:
+            idx = self.buf.find(text, self.pos)
+            if idx >= 0:
+                self.pos = idx + len(text)
+                return True
+            # Keep a tail in case text spans two chunks
+            self.pos = max(self.pos, len(self.buf) - len(text))
+            if not self.more():
+                return False
+
+
+Scanner = Any
+
+
+def _next_char(reader: _Reader) -> str:
+    char = reader.skip_whitespace()
+    if char is None:
+        raise ValueError("Truncated APIC response")
+    return char
+
+
+def _scan(reader: _Reader, scan_once: Scanner) -> Any:
+    """
+    The JSON value at reader.pos, reading more chunks as needed.
+
+    A value that is complete in the buffer is decoded by the C scanner in
+    one call. An object or array that continues past the buffer is decoded
+    member by member, so only the member cut by the chunk boundary is
+    scanned again, never the whole value.
+    """
+    while True:
+        try:
+            value, end = scan_once(reader.buf, reader.pos)
+            # A number cut by the chunk boundary ("1" of "12", "-1" of
+            # "-1.5") is only complete once a delimiter follows it
+            if (
+                not isinstance(value, (int, float))
+                or reader.eof
+                or (end < len(reader.buf) and reader.buf[end] in _DELIMITERS)
+            ):
+                reader.pos = end
+                return value
+        except (json.JSONDecodeError, StopIteration):
+            char = reader.buf[reader.pos]
+            if char == "{":
+                return _scan_object(reader, scan_once)
+            if char == "[":
+                return _scan_array(reader, scan_once)
+        if not reader.more():
+            raise ValueError("Truncated or malformed APIC response")
+
+
+def _scan_object(reader: _Reader, scan_once: Scanner) -> Dict[str, Any]:
+    reader.pos += 1
+    obj: Dict[str, Any] = {}
+    if _next_char(reader) == "}":
+        reader.pos += 1
+        return obj
+    while True:
+        if _next_char(reader) != '"':
+            raise ValueError("Malformed APIC response: expected a key")
+        key = _scan(reader, scan_once)
+        if _next_char(reader) != ":":
+            raise ValueError("Malformed APIC response: expected ':'")
+        reader.pos += 1
+        _next_char(reader)
+        obj[key] = _scan(reader, scan_once)
+        char = _next_char(reader)
+        reader.pos += 1
+        if char == "}":
+            return obj
+        if char != ",":
+            raise ValueError(f"Malformed APIC response at '{char}'")
+
+
+def _scan_array(reader: _Reader, scan_once: Scanner) -> List[Any]:
+    reader.pos += 1
+    items: List[Any] = []
+    if _next_char(reader) == "]":
+        reader.pos += 1
+        return items
+    while True:
+        _next_char(reader)
+        items.append(_scan(reader, scan_once))
+        char = _next_char(reader)
+        reader.pos += 1
+        if char == "]":
+            return items
+        if char != ",":
+            raise ValueError(f"Malformed APIC response at '{char}'")
+
+
+def iter_imdata_stream(chunks: Iterable[bytes]) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the imdata entries of an APIC JSON response one by one.
+
+    Only the "imdata" array is read; other top-level keys are skipped.
+    Raises ValueError on malformed or truncated input.
+    """
+    reader = _Reader(chunks)
+    scan_once = json.scanner.make_scanner(json.JSONDecoder())
+    if not reader.find('"imdata"'):
+        return
+    if reader.skip_whitespace() != ":":
+        raise ValueError("Malformed APIC response: expected ':' after imdata")
+    reader.pos += 1
+    if reader.skip_whitespace() != "[":
+        raise ValueError("Malformed APIC response: imdata is not a list")
+    reader.pos += 1
+
+    first = True
+    while True:
+        char = reader.skip_whitespace()
+        if char is None:
+            raise ValueError("Truncated APIC response")
+        if char == "]":
+            return
+        if not first:
+            if char != ",":
+                raise ValueError(f"Malformed APIC response at '{char}'")
+            reader.pos += 1
+            if reader.skip_whitespace() is None:
+                raise ValueError("Truncated APIC response")
+        first = False
+
+        entry = _scan(reader, scan_once)
+        yield entry
+
+
+def iter_mo_views(chunks: Iterable[bytes]) -> Iterator[MOView]:
+    """MOView of every imdata entry, in aci_list_cleanup order."""
+    for entry in iter_imdata_stream(chunks):
+        for cls, body in entry.items():
+            attrs = body.get("attributes", {})
+            if isinstance(attrs, dict):
+                yield _new_view(cls, attrs)
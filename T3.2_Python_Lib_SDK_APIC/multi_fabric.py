@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+
+"""
+Run the same ACIModule query against several APICs at once.
+
+Each fabric gets its own ACIModule session, created on first use and
+reused by later queries. Queries run concurrently, one thread per fabric.
+The results are merged, and every MO is tagged with a "fabric" key. A
+fabric that cannot be reached, fails to log in, errors or misses the
+deadline is reported in FabricResult.error; the other fabrics still
+answer. A fabric still busy with a query that missed an earlier deadline
+is reported down at once instead of queueing another query behind it, so
+one hung APIC never holds up the others.
+
+Fabrics come from a YAML or JSON list, or from ACI_VAR_FABRICS as
+"name=host,name=host". username/password/scheme default to ACI_VAR_USER,
+ACI_VAR_PASS and ACI_VAR_SCHEME:
+
+    - name: dc1
+      hostname: 10.1.0.10
+    - name: dc2
+      hostname: 10.2.0.10
+      username: audit
+
+Example:
+    ACI_VAR_FABRICS=fabrics.yaml ./multi_fabric.py 10.0.1.1/24
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from getBDs import ACIModule
+
+# Seconds a fan-out query may take before the missing fabrics are reported
+FANOUT_TIMEOUT = 120.0
+
+Query = Callable[[ACIModule], Iterable[Any]]
+
+
+@dataclass
+class Fabric:
+    name: str
+    hostname: str
+    username: str = ""
+    password: str = ""
+    scheme: str = "https"
+
+
+def load_fabrics(source: str, defaults: Optional[Dict[str, str]] = None) -> List[Fabric]:
+    """Fabrics from a .yaml/.yml/.json file, or a "name=host,..." string."""
+    defaults = defaults or {}
+    ext = os.path.splitext(source)[1].lower()
+    if ext in (".yaml", ".yml", ".json"):
+        with open(source, encoding="utf-8") as fd:
+            if ext == ".json":
+                entries = json.load(fd)
+            else:
+                import yaml
+
+                entries = yaml.safe_load(fd) or []
+    else:
+        entries = []
+        for item in filter(None, (part.strip() for part in source.split(","))):
+            name, _, hostname = item.partition("=")
+            entries.append({"name": name, "hostname": hostname or name})
+
+    fabrics = []
+    for count, entry in enumerate(entries, start=1):
+        if "hostname" not in entry:
+            raise ValueError(f"{source}: fabric {count} has no hostname")
+        entry.setdefault("name", entry["hostname"])
+        fabrics.append(Fabric(**{**defaults, **entry}))
+    names = [fabric.name for fabric in fabrics]
+    if len(set(names)) != len(names):
+        raise ValueError(f"{source}: fabric names must be unique")
+    return fabrics
+
+
+@dataclass
+class FabricResult:
+    fabric: str
+    items: List[Dict[str, Any]] = field(default_factory=list)
+    error: Optional[str] = None
+    duration: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class FanoutResult:
+    fabrics: List[FabricResult] = field(default_factory=list)
+    duration: float = 0.0
+
+    @property
+    def items(self) -> List[Dict[str, Any]]:
+        """Items of every fabric, in fabric order, tagged with "fabric"."""
+        return [item for result in self.fabrics for item in result.items]
+
+    @property
+    def failed(self) -> List[FabricResult]:
+        return [result for result in self.fabrics if not result.ok]
+
+    def by_fabric(self) -> Dict[str, List[Dict[str, Any]]]:
+        return {result.fabric: result.items for result in self.fabrics if result.ok}
+
+    def summary(self) -> str:
+        ok = len(self.fabrics) - len(self.failed)
+        return (
+            f"{len(self.items)} objects from {ok}/{len(self.fabrics)} fabrics "
+            f"in {self.duration:.2f}s"
+        )
+
+
+class MultiFabricClient(object):
+    """
+    ACIModule sessions to several fabrics, queried concurrently.
+
+    fabrics: Fabric list, see load_fabrics
+    timeout: seconds per fan-out, fabrics still running are reported failed
+    aci_kwargs: extra ACIModule arguments (pagesize, keepalive, ...)
+    """
+
+    def __init__(
+        self,
+        fabrics: Iterable[Fabric],
+        timeout: float = FANOUT_TIMEOUT,
+        factory: Callable[..., ACIModule] = ACIModule,
+        **aci_kwargs: Any,
+    ) -> None:
+        self.fabrics = list(fabrics)
+        self.timeout = timeout
+        self.factory = factory
+        self.aci_kwargs = aci_kwargs
+        self.sessions: Dict[str, ACIModule] = {}
+        self._locks = {fabric.name: threading.Lock() for fabric in self.fabrics}
+        # Last query per fabric; at most one runs per fabric, so the pool
+        # always has a worker for every fabric that is not hung
+        self._running: Dict[str, Future] = {}
+        self._submit_lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(
+            max_workers=max(1, len(self.fabrics)), thread_name_prefix="aci-fabric"
+        )
+
+    def session(self, fabric: Fabric) -> ACIModule:
+        """The fabric's ACIModule, logging in on first use."""
+        with self._locks[fabric.name]:
+            aci = self.sessions.get(fabric.name)
+            if aci is None:
+                aci = self.factory(
+                    fabric.hostname,
+                    fabric.username,
+                    fabric.password,
+                    scheme=fabric.scheme,
+                    **self.aci_kwargs,
+                )
+                self.sessions[fabric.name] = aci
+        return aci
+
+    def _run_one(self, fabric: Fabric, query: Query) -> FabricResult:
+        result = FabricResult(fabric=fabric.name)
+        start = time.perf_counter()
+        try:
+            result.items = [
+                dict(item, fabric=fabric.name) for item in query(self.session(fabric))
+            ]
+        except Exception as exc:
+            logging.warning(f"{fabric.name}: {type(exc).__name__}: {exc}")
+            result.error = f"{type(exc).__name__}: {exc}"
+        result.duration = time.perf_counter() - start
+        return result
+
+    def run(self, query: Query) -> FanoutResult:
+        """Call query(aci) on every fabric at once and merge the results."""
+        fanout = FanoutResult()
+        start = time.perf_counter()
+        futures: Dict[str, Future] = {}
+        with self._submit_lock:
+            for fabric in self.fabrics:
+                previous = self._running.get(fabric.name)
+                if previous is not None and not previous.done():
+                    continue
+                futures[fabric.name] = self._running[fabric.name] = self._pool.submit(
+                    self._run_one, fabric, query
+                )
+        wait(futures.values(), timeout=self.timeout)
+        for fabric in self.fabrics:
+            future = futures.get(fabric.name)
+            if future is None:
+                logging.warning(f"{fabric.name}: still busy with an earlier query")
+                fanout.fabrics.append(
+                    FabricResult(fabric=fabric.name, error="Busy with an earlier query")
+                )
+            elif future.done():
+                fanout.fabrics.append(future.result())
+            else:
+                logging.warning(f"{fabric.name}: no answer within {self.timeout:g}s")
+                fanout.fabrics.append(
+                    FabricResult(
+                        fabric=fabric.name,
+                        error=f"Timeout after {self.timeout:g}s",
+                        duration=self.timeout,
+                    )
+                )
+        fanout.duration = time.perf_counter() - start
+        return fanout
+
+    def query(self, url: str) -> FanoutResult:
+        """A GET (e.g. "class/fvBD.json") on every fabric."""
+        return self.run(lambda aci: aci.aci_list_cleanup(aci.handle_req("get", url)))
+
+    def get_BD(self, subnet_address: Optional[str] = None, method: str = "subtree") -> FanoutResult:
+        return self.run(lambda aci: aci.get_BD(subnet_address=subnet_address, method=method))
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        for aci in self.sessions.values():
+            aci.close()
+        self.sessions = {}
+
+    def __enter__(self) -> "MultiFabricClient":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=getattr(logging, os.environ.get("ACI_VAR_LOG_LEVEL", "info").upper(), logging.INFO)
+    )
+
+    fabrics = load_fabrics(
+        os.environ["ACI_VAR_FABRICS"],
+        defaults=dict(
+            username=os.environ.get("ACI_VAR_USER", ""),
+            password=os.environ.get("ACI_VAR_PASS", ""),
+            scheme=os.environ.get("ACI_VAR_SCHEME", "https"),
+        ),
+    )
+    subnet_address = sys.argv[1] if len(sys.argv) > 1 else os.environ.get("ACI_VAR_SUBNET")
+
+    with MultiFabricClient(
+        fabrics, pagesize=int(os.environ.get("ACI_VAR_PSIZE", "0"))
+    ) as client:
+        result = client.get_BD(
+            subnet_address=subnet_address,
+            method=os.environ.get("ACI_VAR_BD_METHOD", "subtree"),
+        )
+
+    for fabric in result.fabrics:
+        if fabric.ok:
+            print(f"{fabric.fabric}: {len(fabric.items)} BDs")
+            for bd in fabric.items:
+                print(f"    {bd['dn']}")
+        else:
+            print(f"{fabric.fabric}: FAILED {fabric.error}")
+    print(result.summary())
+    sys.exit(1 if result.failed else 0)
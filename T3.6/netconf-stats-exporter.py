@@ -2,6 +2,10 @@
 
 import os
 import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
 import yaml
 from flask import Flask, Response
 
@@ -14,6 +18,18 @@ LAST = {"ts": 0, "data": ""}
 
 CACHE_SECONDS = 15
 
+# Seconds a scrape waits for each router (netconf.deadline), below the
+# Prometheus scrape timeout (10s by default)
+DEADLINE = 8
+
+# One thread per router, see get_pool
+POOL = None
+POOL_SIZE = 0
+# router name -> request still running after its deadline; its result is
+# used by the next scrape instead of sending a new request
+INFLIGHT = {}
+COLLECT_LOCK = threading.Lock()
+
 
 def load_config():
     global CONFIG
@@ -28,35 +44,85 @@ def env_required(name: str) -> str:
     return v
 
 
+def get_pool(routers: int) -> ThreadPoolExecutor:
+    """
+    Pool with a thread for every router. A router has at most one request
+    running (see INFLIGHT), so no request ever waits for a free thread and
+    each router's deadline starts when its request does, even while other
+    routers hang.
+    """
+    global POOL, POOL_SIZE
+    if POOL is None or POOL_SIZE < routers:
+        if POOL is not None:
+            # Its threads finish the requests still in flight
+            POOL.shutdown(wait=False)
+        POOL_SIZE = max(1, routers)
+        POOL = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix="netconf")
+    return POOL
+
+
 def collect():
+    """
+    Poll every router concurrently and return (rows, up).
+
+    Every router is polled at once, on its own thread, and gets the same
+    deadline from the start of its request. Routers that miss it are
+    reported down and left out of rows; their request keeps running and
+    its result is served by the next scrape, so a slow router never has
+    more than one request in flight.
+    """
     username = env_required("NSE_NETCONF_USERNAME")
     password = env_required("NSE_NETCONF_PASSWORD")
-    port = int(CONFIG.get("netconf", {}).get("port", 830))
-    timeout = int(CONFIG.get("netconf", {}).get("timeout", 30))
+    netconf = CONFIG.get("netconf", {})
+    port = int(netconf.get("port", 830))
+    timeout = int(netconf.get("timeout", 30))
+    deadline = float(netconf.get("deadline", DEADLINE))
 
     xpath = CONFIG.get("filter", {}).get("xpath")
     routers = CONFIG.get("routers", [])
+    pool = get_pool(len(routers))
+
+    futures = {}
+    for r in routers:
+        future = INFLIGHT.pop(r["name"], None)
+        if future is None:
+            future = pool.submit(
+                get_interface_counters,
+                router=Router(**r),
+                xpath=xpath,
+                port=port,
+                username=username,
+                password=password,
+                # No point waiting on a router longer than the scrape does
+                timeout=min(timeout, deadline),
+            )
+        futures[r["name"]] = future
+
+    wait(futures.values(), timeout=deadline)
 
     all_rows = []
+    up = {}
+    for name, future in futures.items():
+        if not future.done():
+            logging.warning(f"{name}: no NETCONF reply within {deadline:g}s")
+            INFLIGHT[name] = future
+            up[name] = 0
+            continue
+        try:
+            rows = future.result()
+        except Exception as exc:
+            logging.warning(f"{name}: {type(exc).__name__}: {exc}")
+            up[name] = 0
+            continue
+        up[name] = 1
 
-    for r in routers:
-        rows = get_interface_counters(
-            router=Router(**r),
-            xpath=xpath,
-            port=port,
-            username=username,
-            password=password,
-            timeout=timeout,
-        )
-
-        # log matched interfaces (helps validate XPath behavior)
         for ifname, in_oct, out_oct in rows:
-            all_rows.append((r["name"], ifname, in_oct, out_oct))
+            all_rows.append((name, ifname, in_oct, out_oct))
 
-    return all_rows
+    return all_rows, up
 
 
-def prom_format(rows):
+def prom_format(rows, up=None):
     # Prometheus text format with metric names matching the task screenshots
     lines = []
     lines.append("# Output / Interface counters")
@@ -67,16 +133,25 @@ def prom_format(rows):
         lines.append(f'in_octets{{{labels}}} {in_oct}')
         lines.append(f'out_octets{{{labels}}} {out_oct}')
 
+    if up:
+        lines.append("")
+        lines.append("# HELP up 1 if the device answered NETCONF within the scrape deadline")
+        lines.append("# TYPE up gauge")
+        for router_name, value in up.items():
+            lines.append(f'up{{device="{router_name}"}} {value}')
+
     return "\n".join(lines) + "\n"
 
 
 # Flask 1.x compatible (Flask 2.x also supports this)
 @app.route("/metrics", methods=["GET"])
 def metrics():
-    now = time.time()
-    if now - LAST["ts"] > CACHE_SECONDS:
-        LAST["data"] = prom_format(collect())
-        LAST["ts"] = now
+    # One collection at a time, concurrent scrapes share its result
+    with COLLECT_LOCK:
+        now = time.time()
+        if now - LAST["ts"] > CACHE_SECONDS:
+            LAST["data"] = prom_format(*collect())
+            LAST["ts"] = now
     return Response(LAST["data"], mimetype="text/plain; version=0.0.4")
 
 